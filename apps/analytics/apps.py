@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AnalyticsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.analytics"
+
+    def ready(self):
+        """Branche les signaux Django au démarrage de l'app."""
+        from . import signals
+
+        signals.connecter()
@@ -0,0 +1,91 @@
+"""
+Reconstruit les agrégats journaliers des ventes et des dépenses.
+
+À lancer après la migration qui crée `FaitVentesJour` et
+`FaitDepensesJour`, ou pour réparer les agrégats d'une entreprise. Les
+entreprises sont reconstruites en parallèle, chacune dans sa transaction
+(verrou sur sa ligne `Entreprise`) ; son cache analytics est invalidé
+ensuite.
+
+Usage:
+    python manage.py reconstruire_faits
+    python manage.py reconstruire_faits --workers 8
+    python manage.py reconstruire_faits --entreprise <uuid> <uuid>
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.analytics.services.cache import invalider_analytics
+from apps.analytics.services.faits import reconstruire_depenses, reconstruire_ventes
+from apps.tenants.models import Entreprise
+
+
+def reconstruire(entreprise_id):
+    """Reconstruit les agrégats d'une entreprise et invalide son cache."""
+    ventes = reconstruire_ventes(entreprise_id)
+    depenses = reconstruire_depenses(entreprise_id)
+    invalider_analytics(entreprise_id)
+    return ventes, depenses
+
+
+def reconstruire_dans_un_thread(entreprise_id):
+    """`reconstruire` dans un thread du pool, qui ferme ensuite sa connexion."""
+    try:
+        return reconstruire(entreprise_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les agrégats journaliers des ventes et des dépenses"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--entreprise",
+            nargs="+",
+            help="UUID des entreprises à reconstruire (défaut: toutes)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Entreprises reconstruites en parallèle, 1 : à la suite (défaut: 4)",
+        )
+
+    def handle(self, *args, **options):
+        entreprises = Entreprise.objects.order_by("nom")
+        if options["entreprise"]:
+            entreprises = entreprises.filter(pk__in=options["entreprise"])
+        noms = dict(entreprises.values_list("pk", "nom"))
+
+        self.erreurs = 0
+        if options["workers"] <= 1:
+            for pk, nom in noms.items():
+                self.rapporter(nom, lambda pk=pk: reconstruire(pk))
+        else:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                taches = {
+                    pool.submit(reconstruire_dans_un_thread, pk): pk for pk in noms
+                }
+                for tache in as_completed(taches):
+                    self.rapporter(noms[taches[tache]], tache.result)
+
+        reussies = len(noms) - self.erreurs
+        self.stdout.write(f"{reussies}/{len(noms)} entreprises reconstruites")
+
+    def rapporter(self, nom, resultat):
+        """Affiche le résultat de la reconstruction d'une entreprise."""
+        try:
+            ventes, depenses = resultat()
+        except Exception as exc:
+            self.erreurs += 1
+            self.stderr.write(self.style.ERROR(f"{nom} : échec ({exc})"))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{nom} : {ventes} faits de ventes, {depenses} faits de dépenses"
+                )
+            )
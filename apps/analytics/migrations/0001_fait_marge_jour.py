@@ -0,0 +1,137 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:31
+
+from collections import defaultdict
+from decimal import Decimal
+
+import apps.core.fields
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def cumuler_lignes_existantes(apps, schema_editor):
+    """
+    Alimente l'agrégat de marge depuis les lignes des ventes non annulées,
+    au coût unitaire figé sur chaque ligne.
+    """
+    VenteLigne = apps.get_model("commerce", "VenteLigne")
+    FaitMargeJour = apps.get_model("analytics", "FaitMargeJour")
+
+    lignes = VenteLigne.objects.exclude(vente__statut="annulee").values_list(
+        "entreprise_id",
+        "vente__created_at",
+        "produit_id",
+        "vente__client_id",
+        "quantite",
+        "prix_vente",
+        "cout_unitaire",
+    )
+    faits = defaultdict(lambda: [Decimal(0), Decimal(0), Decimal(0)])
+    for (
+        entreprise_id,
+        date,
+        produit_id,
+        client_id,
+        quantite,
+        prix_vente,
+        cout,
+    ) in lignes.iterator(chunk_size=2000):
+        fait = faits[(entreprise_id, timezone.localdate(date), produit_id, client_id)]
+        fait[0] += quantite
+        fait[1] += prix_vente
+        fait[2] += quantite * (cout or 0)
+
+    FaitMargeJour.objects.bulk_create(
+        (
+            FaitMargeJour(
+                entreprise_id=entreprise_id,
+                jour=jour,
+                produit_id=produit_id,
+                client_id=client_id,
+                quantite=quantite,
+                chiffre_affaires=chiffre_affaires,
+                cout=cout.quantize(Decimal("0.0001")),
+            )
+            for (entreprise_id, jour, produit_id, client_id), (
+                quantite,
+                chiffre_affaires,
+                cout,
+            ) in faits.items()
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("commerce", "0017_venteligne_cout_unitaire"),
+        ("partners", "0005_partner_recherche"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FaitMargeJour",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("jour", models.DateField()),
+                ("quantite", apps.core.fields.QuantiteField(default=0)),
+                (
+                    "chiffre_affaires",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                (
+                    "cout",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=18),
+                ),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="partners.partner",
+                    ),
+                ),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="commerce.produit",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("entreprise", "jour", "produit", "client"),
+                        name="unique_fait_marge_jour",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(cumuler_lignes_existantes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:10
+
+import apps.core.fields
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics", "0001_fait_marge_jour"),
+        ("commerce", "0023_produit_codes"),
+        ("partners", "0006_partner_soldes"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FaitDepensesJour",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("jour", models.DateField()),
+                ("type", models.CharField(max_length=50)),
+                (
+                    "montant",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                ("nombre", models.PositiveIntegerField(default=0)),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("entreprise", "jour", "type"),
+                        name="unique_fait_depenses_jour",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="FaitVentesJour",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("jour", models.DateField()),
+                ("statut", models.CharField(max_length=20)),
+                ("quantite", apps.core.fields.QuantiteField(default=0)),
+                (
+                    "chiffre_affaires",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                ("nombre_ventes", models.PositiveIntegerField(default=0)),
+                ("ventes", models.PositiveIntegerField(default=0)),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="partners.partner",
+                    ),
+                ),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="commerce.produit",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("entreprise", "jour", "produit", "client", "statut"),
+                        name="unique_fait_ventes_jour",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,127 @@
 from django.db import models
 
-# Create your models here.
+from apps.core.fields import QuantiteField
+from apps.core.models import TenantModel
+
+
+class FaitMargeJour(TenantModel):
+    """
+    Agrégat de marge brute par jour x produit x client.
+
+    Tenu à jour à chaque écriture de vente (et à son annulation, sur le
+    jour de la vente) : les analyses de marge lisent cette table au lieu
+    de joindre les ventes à leurs coûts.
+
+    Attributs:
+        jour (date): Jour de la vente
+        produit (ForeignKey): Produit vendu
+        client (ForeignKey): Client de la vente
+        quantite (Decimal): Quantité vendue
+        chiffre_affaires (Decimal): Somme des `prix_vente` des lignes
+        cout (Decimal): Coût des lignes (`quantite * cout_unitaire`, FIFO)
+
+    La marge vaut `chiffre_affaires - cout`.
+    """
+
+    jour = models.DateField()
+    produit = models.ForeignKey(
+        "commerce.Produit", on_delete=models.CASCADE, related_name="+"
+    )
+    client = models.ForeignKey(
+        "partners.Partner", on_delete=models.CASCADE, related_name="+"
+    )
+    quantite = QuantiteField(default=0)
+    chiffre_affaires = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    cout = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["entreprise", "jour", "produit", "client"],
+                name="unique_fait_marge_jour",
+            )
+        ]
+
+    def __str__(self):
+        marge = self.chiffre_affaires - self.cout
+        return f"{self.jour} {self.produit_id} {self.client_id}: {marge}"
+
+
+class FaitVentesJour(TenantModel):
+    """
+    Agrégat des lignes de vente par jour x produit x client x statut.
+
+    Les jours touchés par une écriture de vente (création, changement de
+    statut, retour, suppression) sont reconstruits après commit
+    (`apps.analytics.services.faits`) : les analyses de ventes lisent
+    cette table au lieu de reparcourir les ventes.
+
+    Attributs:
+        jour (date): Jour (local) de la vente
+        produit (ForeignKey): Produit vendu
+        client (ForeignKey): Client de la vente
+        statut (str): Statut de la vente (`Vente.STATUT_CHOICES`)
+        quantite (Decimal): Quantité vendue, nette des retours
+        chiffre_affaires (Decimal): Somme des `prix_vente` des lignes
+        nombre_ventes (int): Ventes contenant le produit
+        ventes (int): Ventes du jour x client x statut, portées par une seule
+            ligne du groupe : ne se somme pas par produit
+    """
+
+    jour = models.DateField()
+    produit = models.ForeignKey(
+        "commerce.Produit", on_delete=models.CASCADE, related_name="+"
+    )
+    client = models.ForeignKey(
+        "partners.Partner", on_delete=models.CASCADE, related_name="+"
+    )
+    statut = models.CharField(max_length=20)
+    quantite = QuantiteField(default=0)
+    chiffre_affaires = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    nombre_ventes = models.PositiveIntegerField(default=0)
+    ventes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["entreprise", "jour", "produit", "client", "statut"],
+                name="unique_fait_ventes_jour",
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.jour} {self.produit_id} {self.client_id} {self.statut}: "
+            f"{self.chiffre_affaires}"
+        )
+
+
+class FaitDepensesJour(TenantModel):
+    """
+    Agrégat des dépenses par jour x type.
+
+    Reconstruit après commit pour les jours touchés par une écriture de
+    dépense (`apps.analytics.services.faits`).
+
+    Attributs:
+        jour (date): Jour (local) de la dépense
+        type (str): Type de dépense
+        montant (Decimal): Somme des montants
+        nombre (int): Nombre de dépenses
+    """
+
+    jour = models.DateField()
+    type = models.CharField(max_length=50)
+    montant = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    nombre = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["entreprise", "jour", "type"],
+                name="unique_fait_depenses_jour",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.jour} {self.type}: {self.montant}"
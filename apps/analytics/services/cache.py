@@ -1,43 +1,212 @@
-import json
+"""
+Cache des résultats analytics, par entreprise.
+
+Chaque clé est préfixée par la génération de cache de son entreprise
+(`cle_analytics`), un compteur tenu dans le cache (Redis). Invalider
+toutes les analyses d'une entreprise revient à incrémenter ce compteur
+(`invalider_analytics`, un seul INCR après commit) : les anciennes clés
+ne sont plus lues et expirent d'elles-mêmes, sans énumération.
+
+`cache_get_or_set` protège les clés chaudes contre les recalculs
+simultanés : un seul appel recalcule une clé pendant que les autres
+attendent (clé absente) ou reçoivent la valeur en cache (clé échue).
+
+Les résultats et les générations sont lus à travers le cache mémoire du
+processus (`apps.core.services.cache`) : une génération y est gardée au
+plus `CACHE_L1_VERSION_TTL` secondes, délai sous lequel une invalidation
+faite par un autre worker est vue.
+"""
+
+import math
+import random
+import time
 
 from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
+
+from apps.core.services.cache import ecrire, l1, lire, supprimer
+
+# Valeur absente du cache (une valeur mise en cache peut être None ou vide)
+_ABSENT = object()
+
+# Durée de vie du verrou de recalcul d'une clé (secondes)
+VERROU_TTL = 30
+# Attente maximale du résultat d'un autre appel sur une clé absente (secondes)
+ATTENTE_MAX = 5
+ATTENTE_PAS = 0.05
+# Agressivité du rafraîchissement anticipé (1 : valeur usuelle de XFetch)
+RAFRAICHISSEMENT_BETA = 1.0
+
+
+def _cle_generation(entreprise_id):
+    return f"analytics_gen:{entreprise_id}"
+
+
+def _nouvelle_generation():
+    # Horodatage (ms) : une génération recréée après expulsion du cache ne
+    # retombe jamais sur celle de clés plus anciennes.
+    return int(time.time() * 1000)
+
+
+def generation(entreprise_id):
+    """Génération courante du cache analytics de l'entreprise (créée au besoin)."""
+    cle = _cle_generation(entreprise_id)
+    courante = lire(cle, ttl_local=settings.CACHE_L1_VERSION_TTL)
+    if courante is None:
+        courante = _nouvelle_generation()
+        if not cache.add(cle, courante, None):
+            courante = cache.get(cle, courante)
+        l1.set(cle, courante, settings.CACHE_L1_VERSION_TTL)
+    return courante
+
+
+def cle_analytics(entreprise_id, nom):
+    """
+    Clé de cache d'une analyse, dans la génération courante de l'entreprise.
+
+    Args:
+        entreprise_id: Entreprise concernée
+        nom (str): Nom de l'analyse et de ses paramètres (ex: "top_clients:10")
+
+    Returns:
+        str: "analytics:{entreprise_id}:{generation}:{nom}"
+    """
+    return f"analytics:{entreprise_id}:{generation(entreprise_id)}:{nom}"
+
+
+def _incrementer(entreprise_id):
+    cle = _cle_generation(entreprise_id)
+    # Ce worker voit l'invalidation tout de suite, les autres à la
+    # relecture de la génération.
+    l1.delete(cle)
+    try:
+        cache.incr(cle)
+    except ValueError:
+        # Génération absente (jamais lue ou expulsée du cache).
+        cache.add(cle, _nouvelle_generation(), None)
+
+
+def invalider_analytics(entreprise_id):
+    """
+    Invalide toutes les analyses en cache d'une entreprise.
+
+    L'incrément a lieu après le commit de la transaction en cours (tout de
+    suite hors transaction) : une lecture concurrente ne peut pas remettre
+    en cache un résultat calculé avant l'écriture.
+
+    Args:
+        entreprise_id: Entreprise dont les données ont changé
+    """
+    if entreprise_id:
+        transaction.on_commit(lambda: _incrementer(entreprise_id))
+
+
+def _calculer(key, func, ttl):
+    """Calcule la valeur et la stocke avec son échéance et sa durée de calcul."""
+    debut = time.monotonic()
+    valeur = func()
+    duree = time.monotonic() - debut
+    # Conservée `ttl` secondes de plus que son échéance : servie périmée
+    # le temps qu'un seul worker la recalcule.
+    ecrire(key, (valeur, time.time() + ttl, duree), ttl * 2)
+    return valeur
+
+
+def _a_rafraichir(echeance, duree, maintenant):
+    """
+    Rafraîchissement anticipé probabiliste (XFetch).
+
+    Plus l'échéance approche et plus le calcul est long, plus un appel a de
+    chances de déclencher le recalcul avant l'expiration : les recalculs
+    d'une clé chaude sont étalés au lieu d'arriver tous à l'échéance.
+    """
+    tirage = 1.0 - random.random()  # dans ]0, 1] : log défini
+    return maintenant - duree * RAFRAICHISSEMENT_BETA * math.log(tirage) >= echeance
+
+
+def _entree(key, local=True):
+    """
+    Entrée (valeur, échéance, durée de calcul) en cache, ou `_ABSENT`.
+
+    Lue dans L1 puis Redis, ou dans Redis seul si `local` est faux.
+    """
+    if local:
+        entree = lire(key, _ABSENT)
+    else:
+        entree = cache.get(key, _ABSENT)
+    if isinstance(entree, tuple) and len(entree) == 3:
+        return entree
+    return _ABSENT
 
 
 def cache_get_or_set(key, func=None, ttl=settings.ANALYTICS_CACHE_TTL):
     """
     Vérifie le cache, sinon exécute func(), stocke et renvoie le résultat.
-    
+
+    Toute valeur calculée est mise en cache, y compris vide (0, [], {},
+    None). Un seul appel à la fois recalcule une clé (verrou `{key}:verrou`) :
+
+    - clé absente : les autres appels attendent son résultat (au plus
+      `ATTENTE_MAX` secondes, puis calculent eux-mêmes) ;
+    - clé échue ou proche de l'échéance (`_a_rafraichir`) : les autres
+      appels reçoivent la valeur en cache pendant le recalcul.
+
+    Les valeurs sont stockées telles quelles (sérialisation binaire du
+    cache, sans passage par JSON).
+
     Args:
-        key: Clé de cache
+        key: Clé de cache (`cle_analytics` pour une analyse d'entreprise)
         func: Fonction à exécuter si pas de cache (obligatoire)
         ttl: Time To Live en secondes
-    
+
     Returns:
         Données du cache ou résultat de func()
-    
+
     Raises:
         ValueError: Si func=None et pas de cache
     """
-    cached = cache.get(key)
-    if cached:
+    entree = _entree(key)
+    if entree is not _ABSENT:
+        valeur, echeance, duree = entree
+        if func is None or not _a_rafraichir(echeance, duree, time.time()):
+            return valeur
+        # La copie locale a pu être recalculée entre-temps par un autre worker.
+        partagee = _entree(key, local=False)
+        if partagee is not _ABSENT and partagee[1] > echeance:
+            l1.set(key, partagee)
+            return partagee[0]
+        verrou = f"{key}:verrou"
+        if not cache.add(verrou, 1, VERROU_TTL):
+            # Recalcul en cours ailleurs : servir la valeur existante.
+            return valeur
         try:
-            return json.loads(cached)
-        except json.JSONDecodeError:
-            # Si le cache est corrompu, le supprimer
-            cache.delete(key)
-    
+            return _calculer(key, func, ttl)
+        finally:
+            cache.delete(verrou)
+
     # Si pas de cache, func est obligatoire
     if func is None:
         raise ValueError(
             f"cache_get_or_set() nécessite un argument 'func' "
             f"quand la clé '{key}' n'est pas en cache."
         )
-    
-    result = func()
-    cache.set(key, json.dumps(result, default=str), ttl)
-    return result
+
+    verrou = f"{key}:verrou"
+    limite = time.monotonic() + ATTENTE_MAX
+    while not cache.add(verrou, 1, VERROU_TTL):
+        # Un autre appel calcule la clé : attendre son résultat.
+        if time.monotonic() >= limite:
+            return func()
+        time.sleep(ATTENTE_PAS)
+        entree = _entree(key, local=False)
+        if entree is not _ABSENT:
+            return entree[0]
+    try:
+        return _calculer(key, func, ttl)
+    finally:
+        cache.delete(verrou)
 
 
 def cache_delete(key):
-    cache.delete(key)
+    supprimer(key)
@@ -1,11 +1,61 @@
-from datetime import datetime
-from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum
-from django.utils import timezone
 from dateutil.relativedelta import relativedelta
 
-from apps.analytics.services.cache import cache_get_or_set
-from apps.commerce.models import Vente
-from apps.finance.models import Depense, Stock
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.analytics.models import FaitDepensesJour
+from apps.analytics.services.cache import cache_get_or_set, cle_analytics
+from apps.commerce.models import Paiement
+
+
+def encaissements(entreprise, debut=None, fin=None):
+    """
+    Montant encaissé (paiements reçus) sur une période.
+
+    Un paiement partiel ne compte que pour son montant, à sa date
+    d'encaissement (`Paiement.date`, index `(entreprise, date)`).
+
+    Args:
+        entreprise: Entreprise concernée
+        debut (datetime): Début de période (inclus), optionnel
+        fin (datetime): Fin de période (exclue), optionnelle
+
+    Returns:
+        Decimal: Total des paiements
+    """
+    paiements = Paiement.objects.filter(entreprise=entreprise)
+    if debut is not None:
+        paiements = paiements.filter(date__gte=debut)
+    if fin is not None:
+        paiements = paiements.filter(date__lt=fin)
+    return paiements.aggregate(total=Sum("montant"))["total"] or 0
+
+
+def decaissements(entreprise, debut=None, fin=None):
+    """
+    Montant des dépenses sur une période, lu sur l'agrégat journalier.
+
+    Args:
+        entreprise: Entreprise concernée
+        debut (datetime): Début de période (inclus, minuit local), optionnel
+        fin (datetime): Fin de période (exclue, minuit local), optionnelle
+
+    Returns:
+        Decimal: Total des dépenses
+    """
+    faits = FaitDepensesJour.objects.filter(entreprise=entreprise)
+    if debut is not None:
+        faits = faits.filter(jour__gte=timezone.localdate(debut))
+    if fin is not None:
+        faits = faits.filter(jour__lt=timezone.localdate(fin))
+    return faits.aggregate(total=Sum("montant"))["total"] or 0
+
+
+def _debut_du_mois():
+    """Premier jour du mois courant, à minuit (heure locale)."""
+    return timezone.localtime().replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
 
 
 def cashflow_summary(entreprise):
@@ -18,30 +68,11 @@ def cashflow_summary(entreprise):
     Returns:
         dict: Dictionnaire contenant cash_in, cash_out et balance globaux
     """
-    key = f"cashflow:{entreprise.id}"
+    key = cle_analytics(entreprise.id, "cashflow")
 
     def compute():
-        line_total = ExpressionWrapper(
-            F("prix_unitaire") * F("quantite"),
-            output_field=DecimalField(max_digits=20, decimal_places=2),
-        )
-
-        cash_in = (
-            Vente.objects.filter(
-                entreprise=entreprise,
-                statut__in=['payee', 'paiement_partiel']
-            ).aggregate(
-                total=Sum(line_total)
-            )["total"]
-            or 0
-        )
-
-        cash_out = (
-            Depense.objects.filter(entreprise=entreprise).aggregate(
-                total=Sum("montant")
-            )["total"]
-            or 0
-        )
+        cash_in = encaissements(entreprise)
+        cash_out = decaissements(entreprise)
 
         return {
             "cash_in": float(cash_in),
@@ -62,33 +93,13 @@ def cashflow_current_month(entreprise):
     Returns:
         dict: Dictionnaire contenant cash_in, cash_out et balance du mois courant
     """
-    now = timezone.now()
-    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    start_of_month = _debut_du_mois()
     
-    key = f"cashflow_current_month:{entreprise.id}:{start_of_month.strftime('%Y-%m')}"
+    key = cle_analytics(entreprise.id, f"cashflow_current_month:{start_of_month:%Y-%m}")
 
     def compute():
-        line_total = ExpressionWrapper(
-            F("prix_unitaire") * F("quantite"),
-            output_field=DecimalField(max_digits=20, decimal_places=2),
-        )
-
-        cash_in = (
-            Vente.objects.filter(
-                entreprise=entreprise,
-                statut__in=['payee', 'paiement_partiel'],
-                created_at__gte=start_of_month
-            ).aggregate(total=Sum(line_total))["total"]
-            or 0
-        )
-
-        cash_out = (
-            Depense.objects.filter(
-                entreprise=entreprise,
-                created_at__gte=start_of_month
-            ).aggregate(total=Sum("montant"))["total"]
-            or 0
-        )
+        cash_in = encaissements(entreprise, debut=start_of_month)
+        cash_out = decaissements(entreprise, debut=start_of_month)
 
         return {
             "cash_in": float(cash_in),
@@ -109,41 +120,26 @@ def cashflow_previous_month(entreprise):
     Returns:
         dict: Dictionnaire contenant cash_in, cash_out et balance du mois précédent
     """
-    now = timezone.now()
-    start_of_current_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    start_of_current_month = _debut_du_mois()
     start_of_previous_month = start_of_current_month - relativedelta(months=1)
     
-    key = f"cashflow_previous_month:{entreprise.id}:{start_of_previous_month.strftime('%Y-%m')}"
+    key = cle_analytics(
+        entreprise.id, f"cashflow_previous_month:{start_of_previous_month:%Y-%m}"
+    )
 
     def compute():
-        line_total = ExpressionWrapper(
-            F("prix_unitaire") * F("quantite"),
-            output_field=DecimalField(max_digits=20, decimal_places=2),
-        )
-
         # stock_total_expr = ExpressionWrapper(
         #     F("quantite") * F("prix_achat"),
         #     output_field=DecimalField(max_digits=20, decimal_places=2),
         # )
 
-        cash_in = (
-            Vente.objects.filter(
-                entreprise=entreprise,
-                statut__in=['payee', 'paiement_partiel'],
-                created_at__gte=start_of_previous_month,
-                created_at__lt=start_of_current_month
-            ).aggregate(total=Sum(line_total))["total"]
-            or 0
+        cash_in = encaissements(
+            entreprise, debut=start_of_previous_month, fin=start_of_current_month
         )
 
-        cash_out = (
-            Depense.objects.filter(
-                entreprise=entreprise,
-                created_at__gte=start_of_previous_month,
-                created_at__lt=start_of_current_month
-            ).aggregate(total=Sum("montant"))["total"]
-            or 0
-        ) 
+        cash_out = decaissements(
+            entreprise, debut=start_of_previous_month, fin=start_of_current_month
+        )
 
         return {
             "cash_in": float(cash_in),
@@ -0,0 +1,75 @@
+"""
+Balance âgée des créances clients.
+
+Lue sur les soldes dénormalisés `Vente.reste_a_payer` (tenus par
+`apps.commerce.services.paiements`), par l'index partiel des ventes non
+soldées : aucun paiement n'est resommé.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from apps.commerce.models import Vente
+
+# Tranches d'ancienneté (jours depuis la vente) : (clé, borne basse, borne haute)
+TRANCHES = (
+    ("0_30", 0, 30),
+    ("31_60", 31, 60),
+    ("61_90", 61, 90),
+    ("plus_90", 91, None),
+)
+
+
+def balance_agee(entreprise_id, maintenant=None):
+    """
+    Reste à payer par client, réparti par ancienneté de la vente.
+
+    Une seule requête groupée par client, avec une somme filtrée par tranche.
+
+    Args:
+        entreprise_id: Entreprise concernée
+        maintenant (datetime): Date de référence (défaut: maintenant)
+
+    Returns:
+        dict: {
+            "total": {"total": Decimal, "0_30": ..., "31_60": ...,
+                      "61_90": ..., "plus_90": ...},
+            "clients": [{"id", "nom", "total", "0_30", ...}] par encours décroissant
+        }
+    """
+    maintenant = maintenant or timezone.now()
+    jour = timezone.localtime(maintenant).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+    tranches = {}
+    for cle, bas, haut in TRANCHES:
+        # Une vente d'il y a N jours (calendaires) tombe dans la tranche [bas, haut].
+        condition = Q(created_at__lt=jour - timedelta(days=bas - 1))
+        if haut is not None:
+            condition &= Q(created_at__gte=jour - timedelta(days=haut))
+        tranches[cle] = Sum("reste_a_payer", filter=condition)
+
+    lignes = (
+        Vente.objects.filter(entreprise_id=entreprise_id, reste_a_payer__gt=0)
+        .values("client_id", "client__nom")
+        .annotate(total_du=Sum("reste_a_payer"), **tranches)
+        .order_by("-total_du", "client__nom")
+    )
+
+    total = dict.fromkeys(["total", *tranches], Decimal(0))
+    clients = []
+    for ligne in lignes:
+        client = {
+            "id": ligne["client_id"],
+            "nom": ligne["client__nom"],
+            "total": ligne["total_du"],
+            **{cle: ligne[cle] or Decimal(0) for cle in tranches},
+        }
+        clients.append(client)
+        for cle in total:
+            total[cle] += client[cle]
+    return {"total": total, "clients": clients}
@@ -0,0 +1,231 @@
+"""
+Agrégats journaliers des ventes et des dépenses.
+
+`FaitVentesJour` (jour x produit x client x statut) et `FaitDepensesJour`
+(jour x type) sont lus par les analyses à la place des ventes et des
+dépenses brutes.
+
+Une écriture signale les jours qu'elle touche (`reporter_ventes`,
+`reporter_depenses`) ; après le commit de la transaction, ces jours sont
+reconstruits depuis les données brutes (`reconstruire_ventes`,
+`reconstruire_depenses`) : une requête groupée par jour touché, quelle
+que soit l'écriture (création, changement de statut, retour,
+suppression). Les reconstructions d'une même entreprise sont sérialisées
+par un verrou sur sa ligne `Entreprise`.
+
+Un jour signalé dans une transaction annulée est reconstruit au commit
+suivant du même thread : la reconstruction est idempotente.
+"""
+
+import threading
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.analytics.models import FaitDepensesJour, FaitVentesJour
+from apps.analytics.services.cache import invalider_analytics
+from apps.commerce.models import Vente, VenteLigne
+from apps.finance.models import Depense
+from apps.tenants.models import Entreprise
+
+# Jours à reconstruire après commit, par thread : {(faits, entreprise_id): {jour}}
+_file = threading.local()
+
+
+def _jours_en_attente():
+    if not hasattr(_file, "jours"):
+        _file.jours = defaultdict(set)
+    return _file.jours
+
+
+def _reporter(faits, objets):
+    jours = _jours_en_attente()
+    for objet in objets:
+        if objet.entreprise_id and objet.created_at:
+            jours[(faits, objet.entreprise_id)].add(
+                timezone.localdate(objet.created_at)
+            )
+    transaction.on_commit(_vider)
+
+
+def reporter_ventes(ventes):
+    """
+    Signale des ventes écrites : leurs jours sont reconstruits après commit.
+
+    Args:
+        ventes (iterable[Vente]): Ventes créées, modifiées ou supprimées
+    """
+    _reporter("ventes", ventes)
+
+
+def reporter_depenses(depenses):
+    """
+    Signale des dépenses écrites : leurs jours sont reconstruits après commit.
+
+    Args:
+        depenses (iterable[Depense]): Dépenses créées, modifiées ou supprimées
+    """
+    _reporter("depenses", depenses)
+
+
+def _vider():
+    jours = _jours_en_attente()
+    while jours:
+        (faits, entreprise_id), a_reconstruire = jours.popitem()
+        if faits == "ventes":
+            reconstruire_ventes(entreprise_id, a_reconstruire)
+        else:
+            reconstruire_depenses(entreprise_id, a_reconstruire)
+        # Les analyses mises en cache avant la reconstruction sont écartées.
+        invalider_analytics(entreprise_id)
+
+
+def _periodes(champ, jours):
+    """Filtre `champ` sur les journées locales `jours` (None : aucun filtre)."""
+    if jours is None:
+        return Q()
+    condition = Q(pk__in=[])
+    for jour in jours:
+        debut = timezone.make_aware(datetime.combine(jour, time.min))
+        fin = timezone.make_aware(datetime.combine(jour + timedelta(days=1), time.min))
+        condition |= Q(**{f"{champ}__gte": debut, f"{champ}__lt": fin})
+    return condition
+
+
+def _verrouiller(entreprise_id):
+    """Verrouille l'entreprise : ses reconstructions ne s'entrelacent pas."""
+    list(
+        Entreprise.objects.select_for_update()
+        .filter(pk=entreprise_id)
+        .values_list("pk")
+    )
+
+
+def _remplacer(modele, entreprise_id, jours, faits):
+    """Remplace les faits des jours donnés (tous si None) de l'entreprise."""
+    existants = modele.objects.filter(entreprise_id=entreprise_id)
+    if jours is not None:
+        existants = existants.filter(jour__in=jours)
+    existants.delete()
+    modele.objects.bulk_create(faits, batch_size=1000)
+
+
+def reconstruire_ventes(entreprise_id, jours=None):
+    """
+    Reconstruit `FaitVentesJour` depuis les lignes de vente.
+
+    Args:
+        entreprise_id: Entreprise concernée
+        jours (iterable[date]): Jours (locaux) à reconstruire ; None : tous
+
+    Returns:
+        int: Nombre de faits écrits
+    """
+    jours = None if jours is None else set(jours)
+    with transaction.atomic():
+        # Lecture après le verrou : les écritures déjà commitées sont vues.
+        _verrouiller(entreprise_id)
+        faits = _faits_ventes(entreprise_id, jours)
+        _remplacer(FaitVentesJour, entreprise_id, jours, faits)
+    return len(faits)
+
+
+def _faits_ventes(entreprise_id, jours):
+    periodes = _periodes("vente__created_at", jours)
+    groupes = (
+        VenteLigne.objects.filter(periodes, entreprise_id=entreprise_id)
+        .annotate(jour=TruncDate("vente__created_at"))
+        .values("jour", "produit_id", "vente__client_id", "vente__statut")
+        .annotate(
+            total_quantite=Sum("quantite"),
+            total_ca=Sum("prix_vente"),
+            total_ventes=Count("vente_id", distinct=True),
+        )
+        .order_by()
+    )
+    faits = {}
+    for groupe in groupes:
+        cle = (
+            groupe["jour"],
+            groupe["vente__client_id"],
+            groupe["vente__statut"],
+            groupe["produit_id"],
+        )
+        faits[cle] = FaitVentesJour(
+            entreprise_id=entreprise_id,
+            jour=groupe["jour"],
+            produit_id=groupe["produit_id"],
+            client_id=groupe["vente__client_id"],
+            statut=groupe["vente__statut"],
+            quantite=groupe["total_quantite"] or 0,
+            chiffre_affaires=groupe["total_ca"] or 0,
+            nombre_ventes=groupe["total_ventes"],
+        )
+
+    # Nombre de ventes par jour x client x statut, porté par le fait du
+    # premier produit du groupe (une vente compte une fois).
+    premiers = {}
+    for cle in sorted(faits, key=lambda cle: (cle[:3], str(cle[3]))):
+        premiers.setdefault(cle[:3], faits[cle])
+    comptes = (
+        Vente.objects.filter(
+            _periodes("created_at", jours),
+            entreprise_id=entreprise_id,
+            lignes__isnull=False,
+        )
+        .annotate(jour=TruncDate("created_at"))
+        .values("jour", "client_id", "statut")
+        .annotate(total=Count("id", distinct=True))
+        .order_by()
+    )
+    for compte in comptes:
+        fait = premiers.get((compte["jour"], compte["client_id"], compte["statut"]))
+        if fait is not None:
+            fait.ventes = compte["total"]
+
+    return list(faits.values())
+
+
+def reconstruire_depenses(entreprise_id, jours=None):
+    """
+    Reconstruit `FaitDepensesJour` depuis les dépenses.
+
+    Args:
+        entreprise_id: Entreprise concernée
+        jours (iterable[date]): Jours (locaux) à reconstruire ; None : tous
+
+    Returns:
+        int: Nombre de faits écrits
+    """
+    jours = None if jours is None else set(jours)
+    with transaction.atomic():
+        _verrouiller(entreprise_id)
+        faits = _faits_depenses(entreprise_id, jours)
+        _remplacer(FaitDepensesJour, entreprise_id, jours, faits)
+    return len(faits)
+
+
+def _faits_depenses(entreprise_id, jours):
+    groupes = (
+        Depense.objects.filter(
+            _periodes("created_at", jours), entreprise_id=entreprise_id
+        )
+        .annotate(jour=TruncDate("created_at"))
+        .values("jour", "type")
+        .annotate(total=Sum("montant"), nombre=Count("id"))
+        .order_by()
+    )
+    return [
+        FaitDepensesJour(
+            entreprise_id=entreprise_id,
+            jour=groupe["jour"],
+            type=groupe["type"],
+            montant=groupe["total"] or 0,
+            nombre=groupe["nombre"],
+        )
+        for groupe in groupes
+    ]
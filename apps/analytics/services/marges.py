@@ -0,0 +1,174 @@
+"""
+Marge brute par produit, catégorie et client.
+
+Chaque ligne de vente fige son coût unitaire FIFO à l'écriture
+(`VenteLigne.cout_unitaire`) et est reportée, dans la même transaction,
+dans l'agrégat `FaitMargeJour` (jour x produit x client). Une annulation
+retranche ses lignes du jour de la vente d'origine.
+
+Les classements de marge lisent cet agrégat : leur coût dépend du nombre
+de produits (ou clients) vendus sur la période, pas du nombre de ventes.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from apps.analytics.models import FaitMargeJour
+
+# Regroupements disponibles : {nom: champs de `FaitMargeJour.values()`}
+DIMENSIONS = {
+    "produit": ("produit_id", "produit__nom"),
+    "categorie": ("produit__categorie", "produit__categorie"),
+    "client": ("client_id", "client__nom"),
+}
+
+_MARGE = ExpressionWrapper(
+    F("chiffre_affaires") - F("cout"),
+    output_field=DecimalField(max_digits=18, decimal_places=4),
+)
+
+
+def cumuler_marges(lignes, signe=1):
+    """
+    Reporte des lignes de vente dans `FaitMargeJour`.
+
+    A appeler dans la transaction qui écrit (ou annule) les lignes. Les
+    faits concernés sont verrouillés, mis à jour en une requête et les
+    manquants créés en une autre.
+
+    Args:
+        lignes (list[VenteLigne]): Lignes sauvegardées, avec leur vente
+            (`created_at`, `client_id`) et leur `cout_unitaire`
+        signe (int): 1 à l'écriture des lignes, -1 à leur annulation
+    """
+    deltas = defaultdict(lambda: [Decimal(0), Decimal(0), Decimal(0)])
+    for ligne in lignes:
+        vente = ligne.vente
+        cle = (
+            vente.entreprise_id,
+            timezone.localdate(vente.created_at),
+            ligne.produit_id,
+            vente.client_id,
+        )
+        delta = deltas[cle]
+        delta[0] += signe * ligne.quantite
+        delta[1] += signe * ligne.prix_vente
+        delta[2] += signe * ligne.quantite * (ligne.cout_unitaire or 0)
+    if not deltas:
+        return
+
+    for tentative in range(2):
+        try:
+            with transaction.atomic():
+                _appliquer(deltas)
+            return
+        except IntegrityError:
+            # Fait créé entre-temps par une transaction concurrente :
+            # la seconde passe le verrouille et le met à jour.
+            if tentative:
+                raise
+
+
+def _appliquer(deltas):
+    """Verrouille les faits existants, les met à jour et crée les manquants."""
+    cles = list(deltas)
+    faits = FaitMargeJour.objects.select_for_update().filter(
+        entreprise_id__in={cle[0] for cle in cles},
+        jour__in={cle[1] for cle in cles},
+        produit_id__in={cle[2] for cle in cles},
+        client_id__in={cle[3] for cle in cles},
+    )
+    existants = {
+        (fait.entreprise_id, fait.jour, fait.produit_id, fait.client_id): fait
+        for fait in faits
+    }
+
+    maintenant = timezone.now()
+    a_modifier, a_creer = [], []
+    for cle, (quantite, chiffre_affaires, cout) in deltas.items():
+        fait = existants.get(cle)
+        if fait is None:
+            entreprise_id, jour, produit_id, client_id = cle
+            fait = FaitMargeJour(
+                entreprise_id=entreprise_id,
+                jour=jour,
+                produit_id=produit_id,
+                client_id=client_id,
+                quantite=0,
+                chiffre_affaires=0,
+                cout=0,
+            )
+            a_creer.append(fait)
+        else:
+            fait.updated_at = maintenant
+            a_modifier.append(fait)
+        fait.quantite += quantite
+        fait.chiffre_affaires += chiffre_affaires
+        fait.cout += cout.quantize(Decimal("0.0001"))
+
+    FaitMargeJour.objects.bulk_update(
+        a_modifier,
+        ["quantite", "chiffre_affaires", "cout", "updated_at"],
+        batch_size=1000,
+    )
+    FaitMargeJour.objects.bulk_create(a_creer, batch_size=1000)
+
+
+def contributeurs_marge(entreprise_id, debut, fin, par="produit", limite=10):
+    """
+    Plus fortes et plus faibles contributions à la marge brute d'une période.
+
+    Args:
+        entreprise_id: Entreprise concernée
+        debut (date): Premier jour (inclus)
+        fin (date): Dernier jour (inclus)
+        par (str): Regroupement (`DIMENSIONS` : produit, categorie, client)
+        limite (int): Nombre de contributeurs par classement
+
+    Returns:
+        dict: {
+            "total": {chiffre_affaires, cout, marge},
+            "top": [...], "bottom": [...]
+        } ; chaque contributeur porte `id`, `nom`, `quantite`,
+        `chiffre_affaires`, `cout` et `marge` (Decimal)
+    """
+    identifiant, nom = DIMENSIONS[par]
+    faits = FaitMargeJour.objects.filter(
+        entreprise_id=entreprise_id, jour__gte=debut, jour__lte=fin
+    )
+    groupes = faits.values(*dict.fromkeys((identifiant, nom))).annotate(
+        total_quantite=Sum("quantite"),
+        total_ca=Sum("chiffre_affaires"),
+        total_cout=Sum("cout"),
+        marge=Sum(_MARGE),
+    )
+
+    def contributeurs(ordre):
+        return [
+            {
+                "id": groupe[identifiant],
+                "nom": groupe[nom],
+                "quantite": groupe["total_quantite"],
+                "chiffre_affaires": groupe["total_ca"],
+                "cout": groupe["total_cout"],
+                "marge": groupe["marge"],
+            }
+            for groupe in groupes.order_by(ordre, identifiant)[:limite]
+        ]
+
+    total = faits.aggregate(
+        total_ca=Sum("chiffre_affaires"), total_cout=Sum("cout"), marge=Sum(_MARGE)
+    )
+    return {
+        "total": {
+            "chiffre_affaires": total["total_ca"] or Decimal(0),
+            "cout": total["total_cout"] or Decimal(0),
+            "marge": total["marge"] or Decimal(0),
+        },
+        "top": contributeurs("-marge"),
+        "bottom": contributeurs("marge"),
+    }
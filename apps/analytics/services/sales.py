@@ -1,26 +1,19 @@
 from datetime import datetime
-from django.db.models import Sum, Count
+
+from django.db.models import Sum
 from django.utils import timezone
 
-from apps.analytics.services.cache import cache_get_or_set, cache_delete
-from apps.commerce.models import Vente
+from apps.analytics.models import FaitVentesJour
+from apps.analytics.services.cache import (
+    cache_get_or_set,
+    cle_analytics,
+    invalider_analytics,
+)
 
 
 def invalidate_analytics_cache(entreprise):
-    keys = [
-        f"cashflow:{entreprise}",
-        f"kpis:{entreprise}",
-        f"monthly_trend:{entreprise}",
-        f"top_products:{entreprise}",
-        f"total_produits:{entreprise.id}",
-        f"total_fournisseurs:{entreprise.id}",
-        # Note: top_clients and dernieres_ventes have limit parameters
-        # We'll invalidate common limits
-        f"top_clients:{entreprise.id}:10",
-        f"dernieres_ventes:{entreprise.id}:5",
-    ]
-    for key in keys:
-        cache_delete(key)
+    """Invalide les analyses en cache de l'entreprise (voir `invalider_analytics`)."""
+    invalider_analytics(entreprise.id)
 
 
 def top_products_month(entreprise, limit=10):
@@ -37,33 +30,33 @@ def top_products_month(entreprise, limit=10):
                   'produit_id': int,
                   'produit_nom': str,
                   'categorie': str,
-                  'quantite_vendue': int,
+                  'quantite_vendue': Decimal,
                   'nombre_ventes': int,
-                  'prix_unitaire': Decimal,
+                  'prix_unitaire': float (prix moyen réalisé sur le mois),
                   'chiffre_affaires': Decimal,
               }
     """
-    cache_key = f"top_products:{entreprise.id}"
+    # Mois courant (jour local) : un classement mis en cache ne sert pas au
+    # mois suivant.
+    month_start = timezone.localdate().replace(day=1)
+    cache_key = cle_analytics(entreprise.id, f"top_products:{month_start:%Y-%m}")
     
     def calculate_top_products():
         
-        # Récupérer le mois courant
-        now = timezone.now()
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Requête pour les produits les plus vendus
+        # Requête pour les produits les plus vendus (agrégat journalier)
         top_products = (
-            Vente.objects
+            FaitVentesJour.objects
             .filter(
                 entreprise=entreprise,
-                statut__in=['payee', 'paiement_partiel'],  # Seules les ventes payées/partiellement payées
-                created_at__gte=month_start
+                # Seules les ventes payées/partiellement payées
+                statut__in=['payee', 'paiement_partiel'],
+                jour__gte=month_start
             )
-            .values('produit', 'produit__nom', 'produit__categorie', 'prix_unitaire')
+            .values('produit', 'produit__nom', 'produit__categorie', 'produit__prix')
             .annotate(
                 quantite_vendue=Sum('quantite'),
-                nombre_ventes=Count('id'),
-                chiffre_affaires=Sum('prix_vente')
+                nombre_ventes=Sum('nombre_ventes'),
+                chiffre_affaires=Sum('chiffre_affaires')
             )
             .order_by('-quantite_vendue')
         )
@@ -77,7 +70,11 @@ def top_products_month(entreprise, limit=10):
                 'categorie': item['produit__categorie'],
                 'quantite_vendue': item['quantite_vendue'],
                 'nombre_ventes': item['nombre_ventes'],
-                'prix_unitaire': float(item['prix_unitaire']),
+                'prix_unitaire': (
+                    round(float(item['chiffre_affaires'] / item['quantite_vendue']), 2)
+                    if item['quantite_vendue']
+                    else float(item['produit__prix'])
+                ),
                 'chiffre_affaires': float(item['chiffre_affaires']),
             })
 
@@ -0,0 +1,287 @@
+"""
+Tableau de bord analytics calculé en une passe.
+
+`tableau_de_bord` produit le document complet de `GET
+/api/analytics/dashboard/`. Il ne lance pas l'un après l'autre les services
+qui le composent (KPIs, cashflow, tendance, classements). Chaque table est
+lue au plus une fois :
+
+- agrégat des ventes (`FaitVentesJour`) : un regroupement par mois (CA,
+  nombre de ventes, revenus), un par produit (les deux classements de
+  produits) et un par client ;
+- agrégat des dépenses (`FaitDepensesJour`) : un regroupement par mois, qui
+  donne aussi le total et les deux derniers mois ;
+- paiements, entrées de stock et partenaires : une agrégation
+  conditionnelle chacun (`Sum(..., filter=Q(...))`) ;
+- nombre de produits et dernières ventes : une requête chacun.
+
+Le document est mis en cache en une seule entrée, dans la génération
+analytics de l'entreprise.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time
+
+from dateutil.relativedelta import relativedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.analytics.models import FaitDepensesJour, FaitVentesJour
+from apps.analytics.services.cache import cache_get_or_set, cle_analytics
+from apps.commerce.models import Paiement, Produit, Vente
+from apps.finance.models import Stock
+from apps.partners.models import Partner
+
+# Statuts des ventes comptées comme revenus et dans les classements
+STATUTS_ENCAISSES = ("payee", "paiement_partiel")
+
+# Nombre de produits du classement global des KPIs
+TOP_PRODUITS_KPIS = 10
+
+
+def _flux(cash_in, cash_out):
+    return {
+        "cash_in": float(cash_in),
+        "cash_out": float(cash_out),
+        "balance": float(cash_in - cash_out),
+    }
+
+
+def _mois_ventes(entreprise):
+    """Ventes par mois : CA (tous statuts), nombre de ventes et revenus."""
+    return (
+        FaitVentesJour.objects.filter(entreprise=entreprise)
+        .annotate(mois=TruncMonth("jour"))
+        .values("mois")
+        .annotate(
+            ca=Sum("chiffre_affaires"),
+            ventes=Sum("ventes"),
+            revenus=Sum("chiffre_affaires", filter=Q(statut__in=STATUTS_ENCAISSES)),
+        )
+        .order_by("mois")
+    )
+
+
+def _mois_depenses(entreprise):
+    return (
+        FaitDepensesJour.objects.filter(entreprise=entreprise)
+        .annotate(mois=TruncMonth("jour"))
+        .values("mois")
+        .annotate(total=Sum("montant"))
+        .order_by("mois")
+    )
+
+
+def _classements_produits(entreprise, debut_mois, limit):
+    """
+    Les deux classements de produits en une requête groupée par produit.
+
+    Returns:
+        tuple: (plus vendus tous statuts confondus, au format des KPIs ;
+        plus vendus du mois, ventes encaissées, au format de
+        `top_products_month`)
+    """
+    du_mois = Q(statut__in=STATUTS_ENCAISSES, jour__gte=debut_mois)
+    groupes = list(
+        FaitVentesJour.objects.filter(entreprise=entreprise)
+        .values("produit", "produit__nom", "produit__categorie", "produit__prix")
+        .annotate(
+            total_qty=Sum("quantite"),
+            mois_qty=Sum("quantite", filter=du_mois),
+            mois_ventes=Sum("nombre_ventes", filter=du_mois),
+            mois_ca=Sum("chiffre_affaires", filter=du_mois),
+        )
+        .order_by()
+    )
+
+    globaux = sorted(groupes, key=lambda g: g["total_qty"] or 0, reverse=True)
+    top_kpis = [
+        {
+            "produit_id": g["produit"],
+            "nom": g["produit__nom"],
+            "quantite": g["total_qty"],
+        }
+        for g in globaux[:TOP_PRODUITS_KPIS]
+    ]
+
+    mensuels = sorted(
+        (g for g in groupes if g["mois_qty"] is not None),
+        key=lambda g: g["mois_qty"],
+        reverse=True,
+    )
+    top_mois = [
+        {
+            "produit_id": g["produit"],
+            "produit_nom": g["produit__nom"],
+            "categorie": g["produit__categorie"],
+            "quantite_vendue": g["mois_qty"],
+            "nombre_ventes": g["mois_ventes"],
+            "prix_unitaire": (
+                round(float(g["mois_ca"] / g["mois_qty"]), 2)
+                if g["mois_qty"]
+                else float(g["produit__prix"])
+            ),
+            "chiffre_affaires": float(g["mois_ca"]),
+        }
+        for g in mensuels[:limit]
+    ]
+    return top_kpis, top_mois
+
+
+def _top_clients(entreprise, limit):
+    groupes = (
+        FaitVentesJour.objects.filter(
+            entreprise=entreprise, statut__in=STATUTS_ENCAISSES
+        )
+        .values("client", "client__nom", "client__prenom")
+        .annotate(total_ventes=Sum("ventes"), somme_total=Sum("chiffre_affaires"))
+        .order_by("-somme_total")[:limit]
+    )
+    return [
+        {
+            "client_id": g["client"],
+            "nom": g["client__nom"],
+            "prenom": g["client__prenom"] or "",
+            "total_ventes": g["total_ventes"],
+            "somme_total": float(g["somme_total"]) if g["somme_total"] else 0,
+        }
+        for g in groupes
+    ]
+
+
+def _dernieres_ventes(entreprise, limit):
+    ventes = (
+        Vente.objects.filter(entreprise=entreprise)
+        .select_related("client", "produit")
+        .order_by("-created_at")[:limit]
+    )
+    return [
+        {
+            "vente_id": vente.id,
+            "client_nom": vente.client.nom,
+            "client_prenom": vente.client.prenom or "",
+            "produit_nom": vente.produit.nom if vente.produit else "",
+            "quantite": vente.quantite,
+            "prix_unitaire": float(vente.prix_unitaire),
+            "prix_vente": float(vente.prix_vente) if vente.prix_vente else 0,
+            "statut": vente.statut,
+            "date_creation": vente.created_at.isoformat(),
+        }
+        for vente in ventes
+    ]
+
+
+def calculer_tableau_de_bord(
+    entreprise, limit=10, top_clients_limit=10, dernieres_ventes_limit=5
+):
+    """
+    Calcule le tableau de bord sans passer par le cache (voir `tableau_de_bord`).
+    """
+    debut_mois = timezone.localtime().replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    debut_mois_precedent = debut_mois - relativedelta(months=1)
+    mois_courant = debut_mois.date()
+    mois_precedent = debut_mois_precedent.date()
+
+    # Ventes et dépenses par mois : tendance, totaux et deux derniers mois.
+    tendance = defaultdict(lambda: {"income": 0.0, "expenses": 0.0})
+    ca, total_ventes = 0, 0
+    for mois in _mois_ventes(entreprise):
+        ca += mois["ca"] or 0
+        total_ventes += mois["ventes"] or 0
+        if mois["revenus"] is not None:
+            tendance[mois["mois"]]["income"] = float(mois["revenus"])
+
+    depenses = {"total": 0, mois_courant: 0, mois_precedent: 0}
+    for mois in _mois_depenses(entreprise):
+        depenses["total"] += mois["total"] or 0
+        tendance[mois["mois"]]["expenses"] = float(mois["total"] or 0)
+        if mois["mois"] in depenses:
+            depenses[mois["mois"]] = mois["total"] or 0
+
+    encaissements = Paiement.objects.filter(entreprise=entreprise).aggregate(
+        courant=Sum("montant", filter=Q(date__gte=debut_mois)),
+        precedent=Sum(
+            "montant", filter=Q(date__gte=debut_mois_precedent, date__lt=debut_mois)
+        ),
+    )
+    stock = Stock.objects.filter(entreprise=entreprise).aggregate(
+        total=Sum("quantite"),
+        mois=Sum("quantite", filter=Q(created_at__gte=debut_mois)),
+    )
+    partenaires = Partner.objects.filter(entreprise=entreprise).aggregate(
+        clients=Count("id", filter=Q(type="client")),
+        fournisseurs=Count("id", filter=Q(type="fournisseur")),
+    )
+    top_kpis, top_mois = _classements_produits(entreprise, mois_courant, limit)
+
+    return {
+        "cashflow": {
+            "current_month": _flux(
+                encaissements["courant"] or 0, depenses[mois_courant]
+            ),
+            "previous_month": _flux(
+                encaissements["precedent"] or 0, depenses[mois_precedent]
+            ),
+        },
+        "kpis": {
+            "total_clients": partenaires["clients"],
+            "total_ventes": total_ventes,
+            "chiffre_affaire": ca,
+            "depenses": depenses["total"],
+            "total_stock": stock["total"] or 0,
+            "total_stock_month": stock["mois"] or 0,
+            "panier_moyen": float(ca) / float(total_ventes) if total_ventes else 0,
+            "top_products": top_kpis,
+        },
+        "sales_trend": [
+            {
+                "month": timezone.make_aware(datetime.combine(mois, time.min)),
+                "income": valeurs["income"],
+                "expenses": valeurs["expenses"],
+                "total": valeurs["income"] - valeurs["expenses"],
+            }
+            for mois, valeurs in sorted(tendance.items())
+        ],
+        "top_products": top_mois,
+        "total_produits": Produit.objects.filter(entreprise=entreprise).count(),
+        "total_fournisseurs": partenaires["fournisseurs"],
+        "top_clients": _top_clients(entreprise, top_clients_limit),
+        "dernieres_ventes": _dernieres_ventes(entreprise, dernieres_ventes_limit),
+    }
+
+
+def tableau_de_bord(
+    entreprise, limit=10, top_clients_limit=10, dernieres_ventes_limit=5
+):
+    """
+    Document complet du tableau de bord, mis en cache en une entrée.
+
+    La clé porte le mois courant : les chiffres du mois ne sont pas
+    resservis le mois suivant.
+
+    Args:
+        entreprise: Entreprise pour laquelle récupérer les données
+        limit: Nombre de produits du classement du mois
+        top_clients_limit: Nombre de meilleurs clients
+        dernieres_ventes_limit: Nombre de dernières ventes
+
+    Returns:
+        dict: {"cashflow", "kpis", "sales_trend", "top_products",
+        "total_produits", "total_fournisseurs", "top_clients",
+        "dernieres_ventes"}
+    """
+    key = cle_analytics(
+        entreprise.id,
+        f"tableau_de_bord:{timezone.localdate():%Y-%m}:"
+        f"{limit}:{top_clients_limit}:{dernieres_ventes_limit}",
+    )
+    return cache_get_or_set(
+        key,
+        lambda: calculer_tableau_de_bord(
+            entreprise, limit, top_clients_limit, dernieres_ventes_limit
+        ),
+    )
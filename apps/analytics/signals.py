@@ -0,0 +1,65 @@
+"""
+Signaux Django de l'app analytics.
+
+Invalide le cache analytics d'une entreprise (`invalider_analytics`) à
+chaque enregistrement ou suppression d'un objet dont dépendent ses
+analyses. Les écritures groupées (`bulk_create`, `QuerySet.update`) ne
+déclenchent pas ces signaux : les services qui en font invalident
+eux-mêmes (journal des mouvements de stock, changements de statut).
+
+Les ventes et dépenses enregistrées ou supprimées signalent aussi leur
+jour aux agrégats journaliers (`apps.analytics.services.faits`).
+"""
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .services.cache import invalider_analytics
+from .services.faits import reporter_depenses, reporter_ventes
+
+# Modèles lus par les analyses en cache.
+MODELES_ANALYSES = (
+    "commerce.Vente",
+    "commerce.Produit",
+    "commerce.Paiement",
+    "finance.Depense",
+    "finance.Stock",
+    "partners.Partner",
+)
+
+
+def donnees_modifiees(sender, instance, **kwargs):
+    """Invalide les analyses de l'entreprise de l'objet, après commit."""
+    invalider_analytics(instance.entreprise_id)
+
+
+def vente_modifiee(sender, instance, **kwargs):
+    """Reconstruit après commit l'agrégat du jour de la vente."""
+    reporter_ventes([instance])
+
+
+def depense_modifiee(sender, instance, **kwargs):
+    """Reconstruit après commit l'agrégat du jour de la dépense."""
+    reporter_depenses([instance])
+
+
+def connecter():
+    """Branche les signaux d'invalidation et de tenue des agrégats journaliers."""
+    for label in MODELES_ANALYSES:
+        modele = apps.get_model(label)
+        for signal in (post_save, post_delete):
+            signal.connect(
+                donnees_modifiees,
+                sender=modele,
+                dispatch_uid=f"analytics:{signal is post_save}:{label}",
+            )
+    for label, recepteur in (
+        ("commerce.Vente", vente_modifiee),
+        ("finance.Depense", depense_modifiee),
+    ):
+        for signal in (post_save, post_delete):
+            signal.connect(
+                recepteur,
+                sender=apps.get_model(label),
+                dispatch_uid=f"faits:{signal is post_save}:{label}",
+            )
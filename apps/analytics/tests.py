@@ -1 +1,140 @@
-# Create your tests here.
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.analytics.services.creances import balance_agee
+from apps.analytics.services.tableau import tableau_de_bord
+from apps.commerce.models import Produit, Vente
+from apps.commerce.services.depots import depot_principal
+from apps.commerce.services.stock import increment_stock
+from apps.commerce.services.ventes import creer_vente
+from apps.core.services.cache import l1
+from apps.finance.models import Depense
+from apps.partners.models import Partner
+from apps.tenants.models import Entreprise
+
+CACHE_LOCAL = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class TableauDeBordRequetesTests(TestCase):
+    """Nombre de requêtes du tableau de bord, à froid et depuis le cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.entreprise = Entreprise.objects.create(
+            nom="E", secteur="commerce", type="boutique", adresse="Bujumbura"
+        )
+        client = Partner.objects.create(
+            entreprise=cls.entreprise, type="client", nom="C", email="c@e.bi"
+        )
+        Partner.objects.create(
+            entreprise=cls.entreprise, type="fournisseur", nom="F", email="f@e.bi"
+        )
+        produits = [
+            Produit.objects.create(
+                entreprise=cls.entreprise, nom=nom, categorie="c", prix=prix
+            )
+            for nom, prix in (("P1", 10), ("P2", 3))
+        ]
+        depot_id = depot_principal(cls.entreprise.pk)
+        for produit in produits:
+            increment_stock(produit.pk, 20, depot_id)
+
+        # Les agrégats journaliers sont reconstruits au commit.
+        with cls.captureOnCommitCallbacks(execute=True):
+            for statut, quantites in (
+                ("payee", (2, 1)),
+                ("en_attente", (0, 3)),
+                ("paiement_partiel", (1, 0)),
+            ):
+                lignes = [
+                    {
+                        "produit": produit,
+                        "quantite": quantite,
+                        "prix_unitaire": produit.prix,
+                    }
+                    for produit, quantite in zip(produits, quantites)
+                    if quantite
+                ]
+                creer_vente(cls.entreprise, client, statut, lignes)
+            Depense.objects.create(
+                entreprise=cls.entreprise, montant=7, type="loyer", description="x"
+            )
+
+    def setUp(self):
+        cache.clear()
+        l1.clear()
+
+    def test_calcul_a_froid_puis_lecture_en_cache(self):
+        with self.assertNumQueries(9):
+            froid = tableau_de_bord(self.entreprise)
+        with self.assertNumQueries(0):
+            chaud = tableau_de_bord(self.entreprise)
+        self.assertEqual(froid, chaud)
+        self.assertEqual(froid["kpis"]["total_ventes"], 3)
+
+
+class BalanceAgeeTests(TestCase):
+    """Répartition des créances par ancienneté, aux bornes des tranches."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.entreprise = Entreprise.objects.create(
+            nom="E", secteur="commerce", type="boutique", adresse="Bujumbura"
+        )
+        cls.client_a, cls.client_b = [
+            Partner.objects.create(
+                entreprise=cls.entreprise, type="client", nom=nom, email=f"{nom}@e.bi"
+            )
+            for nom in ("A", "B")
+        ]
+        # Midi : une vente d'il y a N jours reste le même jour calendaire.
+        cls.maintenant = timezone.localtime().replace(
+            hour=12, minute=0, second=0, microsecond=0
+        )
+        for client, jours, reste in (
+            (cls.client_a, 0, 1),
+            (cls.client_a, 30, 2),
+            (cls.client_a, 31, 4),
+            (cls.client_a, 60, 8),
+            (cls.client_a, 61, 16),
+            (cls.client_a, 90, 32),
+            (cls.client_a, 91, 64),
+            (cls.client_b, 45, 5),
+            (cls.client_b, 10, 0),  # soldée : hors balance
+        ):
+            vente = Vente.objects.create(
+                entreprise=cls.entreprise,
+                client=client,
+                statut="en_attente",
+                prix_vente=reste or 9,
+                reste_a_payer=reste,
+            )
+            Vente.objects.filter(pk=vente.pk).update(
+                created_at=cls.maintenant - timedelta(days=jours)
+            )
+
+    def test_bornes_des_tranches(self):
+        balance = balance_agee(self.entreprise.pk, self.maintenant)
+        self.assertEqual(
+            [(client["nom"], client["total"]) for client in balance["clients"]],
+            [("A", 127), ("B", 5)],
+        )
+        self.assertEqual(
+            {cle: balance["clients"][0][cle] for cle in balance["total"]},
+            {"total": 127, "0_30": 3, "31_60": 12, "61_90": 48, "plus_90": 64},
+        )
+        self.assertEqual(
+            balance["total"],
+            {
+                "total": Decimal(132),
+                "0_30": Decimal(3),
+                "31_60": Decimal(17),
+                "61_90": Decimal(48),
+                "plus_90": Decimal(64),
+            },
+        )
@@ -1,8 +1,19 @@
 from django.urls import path
 
-from apps.analytics.views.dashboard import CashflowView, DashboardAnalyticsView
+from apps.analytics.views.dashboard import (
+    BalanceAgeeView,
+    CacheStatsView,
+    CashflowView,
+    DashboardAnalyticsView,
+    MargesView,
+    ValorisationView,
+)
 
 urlpatterns = [
     path("dashboard/", DashboardAnalyticsView.as_view()),
     path("cashflow/", CashflowView.as_view()),
+    path("valorisation/", ValorisationView.as_view()),
+    path("margins/", MargesView.as_view()),
+    path("receivables-aging/", BalanceAgeeView.as_view()),
+    path("cache-stats/", CacheStatsView.as_view()),
 ]
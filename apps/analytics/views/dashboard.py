@@ -1,18 +1,21 @@
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from django.utils import timezone
+
 from apps.analytics.services.cashflow import cashflow_comparison, cashflow_summary
-from apps.analytics.services.dashboard import (
-    dernieres_ventes,
-    top_clients,
-    total_fournisseurs,
-    total_produits,
-)
-from apps.analytics.services.kpis import global_kpis
-from apps.analytics.services.trends import monthly_sales_trend
-from apps.analytics.services.sales import top_products_month
-from apps.core.permissions import IsFinance, IsReadOnly, IsSales
+from apps.analytics.services.creances import balance_agee
+from apps.analytics.services.marges import DIMENSIONS, contributeurs_marge
+from apps.analytics.services.tableau import tableau_de_bord
+from apps.core.permissions import IsFinance, IsReadOnly, IsSales, IsSuperUser
+from apps.core.serializers import lire_date
+from apps.core.services.cache import statistiques
+from apps.finance.services.valorisation import cout_des_ventes, valeur_stock
 
 
 class DashboardAnalyticsView(APIView):
@@ -33,17 +36,13 @@ class DashboardAnalyticsView(APIView):
         if dernieres_ventes_limit < 1 or dernieres_ventes_limit > 50:
             dernieres_ventes_limit = 5
 
-        data = {
-            # "cashflow": cashflow_summary(entreprise),
-            "cashflow": cashflow_comparison(entreprise),
-            "kpis": global_kpis(entreprise),
-            "sales_trend": monthly_sales_trend(entreprise),
-            "top_products": top_products_month(entreprise, limit=limit),
-            "total_produits": total_produits(entreprise),
-            "total_fournisseurs": total_fournisseurs(entreprise),
-            "top_clients": top_clients(entreprise, limit=top_clients_limit),
-            "dernieres_ventes": dernieres_ventes(entreprise, limit=dernieres_ventes_limit),
-        }
+        # Calculé en une passe et mis en cache comme un seul document
+        data = tableau_de_bord(
+            entreprise,
+            limit=limit,
+            top_clients_limit=top_clients_limit,
+            dernieres_ventes_limit=dernieres_ventes_limit,
+        )
 
         return Response(data)
 
@@ -57,3 +56,173 @@ class CashflowView(APIView):
             "summary": cashflow_summary(entreprise),
             "comparison": cashflow_comparison(entreprise)
         })
+
+
+class ValorisationView(APIView):
+    """
+    Valeur du stock et coût des marchandises vendues (FIFO et CMP).
+
+    GET /api/analytics/valorisation/?debut=2026-01-01&fin=2026-01-31
+
+    La période (bornes incluses) vaut par défaut le mois en cours. La
+    valeur du stock est la valeur courante ; le coût des ventes est celui
+    de la période, annulations déduites.
+
+    Returns:
+        {
+            "debut": str, "fin": str,
+            "valeur_stock": {"fifo": float, "cmp": float},
+            "cout_des_ventes": {"fifo": float, "cmp": float}
+        }
+    """
+
+    permission_classes = [IsAuthenticated, IsFinance | IsReadOnly]
+
+    def get(self, request):
+        entreprise = request.user.entreprise
+        debut = lire_date(request, "debut") or timezone.now().replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        fin = lire_date(request, "fin", fin_de_journee=True)
+        fin = fin or debut + relativedelta(months=1)
+
+        def en_float(totaux):
+            return {cle: float(round(total, 2)) for cle, total in totaux.items()}
+
+        return Response(
+            {
+                "debut": debut.isoformat(),
+                "fin": fin.isoformat(),
+                "valeur_stock": en_float(valeur_stock(entreprise.id)),
+                "cout_des_ventes": en_float(cout_des_ventes(entreprise.id, debut, fin)),
+            }
+        )
+
+
+class MargesView(APIView):
+    """
+    Plus fortes et plus faibles contributions à la marge brute.
+
+    GET /api/analytics/margins/?par=produit&debut=2026-01-01&fin=2026-01-31&limit=10
+
+    Lu depuis l'agrégat `FaitMargeJour` (jour x produit x client) : le coût
+    ne dépend pas du nombre de ventes de la période. `par` vaut `produit`
+    (défaut), `categorie` ou `client` ; la période (bornes incluses) vaut
+    par défaut le mois en cours.
+
+    Returns:
+        {
+            "debut": str, "fin": str, "par": str,
+            "total": {"chiffre_affaires": float, "cout": float, "marge": float},
+            "top": [{"id", "nom", "quantite", "chiffre_affaires", "cout", "marge"}],
+            "bottom": [...]
+        }
+    """
+
+    permission_classes = [IsAuthenticated, IsFinance | IsReadOnly]
+
+    def get(self, request):
+        entreprise = request.user.entreprise
+        par = request.query_params.get("par", "produit")
+        if par not in DIMENSIONS:
+            raise ValidationError(
+                {"par": f"Valeurs possibles : {', '.join(DIMENSIONS)}."}
+            )
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        if limit < 1 or limit > 100:
+            limit = 10
+
+        debut = lire_date(request, "debut")
+        debut = (
+            timezone.localdate(debut) if debut else timezone.localdate().replace(day=1)
+        )
+        fin = lire_date(request, "fin")
+        fin = (
+            timezone.localdate(fin) if fin else debut + relativedelta(months=1, days=-1)
+        )
+
+        marges = contributeurs_marge(entreprise.id, debut, fin, par=par, limite=limit)
+
+        def en_float(valeurs):
+            return {
+                cle: float(valeur if cle == "quantite" else round(valeur, 2))
+                if isinstance(valeur, Decimal)
+                else valeur
+                for cle, valeur in valeurs.items()
+            }
+
+        return Response(
+            {
+                "debut": debut.isoformat(),
+                "fin": fin.isoformat(),
+                "par": par,
+                "total": en_float(marges["total"]),
+                "top": [en_float(ligne) for ligne in marges["top"]],
+                "bottom": [en_float(ligne) for ligne in marges["bottom"]],
+            }
+        )
+
+
+class BalanceAgeeView(APIView):
+    """
+    Balance âgée des créances clients.
+
+    GET /api/analytics/receivables-aging/
+
+    Reste à payer par client, réparti par ancienneté de la vente (0-30,
+    31-60, 61-90 et plus de 90 jours), lu sur les soldes tenus à chaque
+    paiement (`Vente.reste_a_payer`).
+
+    Returns:
+        {
+            "date": str,
+            "total": {"total": float, "0_30": float, "31_60": float,
+                      "61_90": float, "plus_90": float},
+            "clients": [{"id", "nom", "total", "0_30", "31_60", "61_90", "plus_90"}]
+        }
+    """
+
+    permission_classes = [IsAuthenticated, IsFinance | IsReadOnly]
+
+    def get(self, request):
+        balance = balance_agee(request.user.entreprise.id)
+
+        def en_float(valeurs):
+            return {
+                cle: float(valeur) if isinstance(valeur, Decimal) else valeur
+                for cle, valeur in valeurs.items()
+            }
+
+        return Response(
+            {
+                "date": timezone.localdate().isoformat(),
+                "total": en_float(balance["total"]),
+                "clients": [en_float(client) for client in balance["clients"]],
+            }
+        )
+
+
+class CacheStatsView(APIView):
+    """
+    Compteurs du cache à deux niveaux (mémoire du processus, puis Redis).
+
+    GET /api/analytics/cache-stats/
+
+    Les compteurs sont ceux du worker qui répond (`pid`), depuis son
+    démarrage, toutes entreprises confondues : réservé aux superutilisateurs.
+
+    Returns:
+        {
+            "pid": int,
+            "l1": {"hits": int, "misses": int, "entrees": int, "capacite": int},
+            "redis": {"hits": int, "misses": int}
+        }
+    """
+
+    permission_classes = [IsSuperUser]
+
+    def get(self, request):
+        return Response(statistiques())
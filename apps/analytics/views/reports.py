@@ -20,7 +20,7 @@ class TopProductsMonthView(APIView):
                     "produit_id": int,
                     "produit_nom": str,
                     "categorie": str,
-                    "quantite_vendue": int,
+                    "quantite_vendue": float,
                     "nombre_ventes": int,
                     "prix_unitaire": float,
                     "chiffre_affaires": float
@@ -2,7 +2,20 @@ from django.contrib import admin
 
 from apps.core.admin_mixins import TenantAdminMixin
 
-from .models import Produit, Vente
+from .models import (
+    Depot,
+    Inventaire,
+    InventaireLigne,
+    MouvementStock,
+    Paiement,
+    Produit,
+    Retour,
+    RetourLigne,
+    StockDepot,
+    Vente,
+    VenteLigne,
+)
+from .services.ventes import supprimer_vente
 
 
 @admin.register(Produit)
@@ -17,12 +30,125 @@ class ProduitAdmin(TenantAdminMixin, admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 
+class VenteLigneInline(admin.TabularInline):
+    model = VenteLigne
+    fields = ("produit", "quantite", "prix_unitaire", "prix_vente")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+class PaiementInline(admin.TabularInline):
+    model = Paiement
+    fields = ("montant", "mode", "reference", "date")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Vente)
 class VenteAdmin(TenantAdminMixin, admin.ModelAdmin):
-    list_display = ("client", "statut", "created_at")
+    list_display = ("client", "statut", "reste_a_payer", "created_at")
     list_filter = ("statut",)
+    readonly_fields = ("montant_paye", "reste_a_payer")
+    inlines = [VenteLigneInline, PaiementInline]
 
     def save_model(self, request, obj, form, change):
         if not obj.entreprise and not request.user.is_superuser:
             obj.entreprise = request.user.entreprise
         super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        # Soldes du client et agrégat de marge suivent la suppression.
+        supprimer_vente(obj.pk)
+
+    def delete_queryset(self, request, queryset):
+        for pk in queryset.values_list("pk", flat=True):
+            supprimer_vente(pk)
+
+
+@admin.register(MouvementStock)
+class MouvementStockAdmin(TenantAdminMixin, admin.ModelAdmin):
+    list_display = ("produit", "type", "quantite", "created_at")
+    list_filter = ("type",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Depot)
+class DepotAdmin(TenantAdminMixin, admin.ModelAdmin):
+    list_display = ("nom", "principal", "created_at")
+    readonly_fields = ("principal",)
+
+
+@admin.register(StockDepot)
+class StockDepotAdmin(TenantAdminMixin, admin.ModelAdmin):
+    """Lecture seule : le stock par dépôt ne change que par le moteur de stock."""
+
+    list_display = ("produit", "depot", "quantite", "updated_at")
+    list_filter = ("depot",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class InventaireLigneInline(admin.TabularInline):
+    model = InventaireLigne
+    fields = ("produit", "quantite_comptee", "quantite_systeme", "ecart")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(Inventaire)
+class InventaireAdmin(TenantAdminMixin, admin.ModelAdmin):
+    """Lecture seule : les comptages et la validation passent par l'API."""
+
+    list_display = ("depot", "statut", "created_at", "valide_le")
+    list_filter = ("statut",)
+    inlines = [InventaireLigneInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class RetourLigneInline(admin.TabularInline):
+    model = RetourLigne
+    fields = ("produit", "quantite", "montant")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(Retour)
+class RetourAdmin(TenantAdminMixin, admin.ModelAdmin):
+    """Lecture seule : les retours passent par l'API (stock, marges et soldes)."""
+
+    list_display = ("vente", "montant", "montant_rembourse", "mode", "created_at")
+    list_filter = ("mode",)
+    inlines = [RetourLigneInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
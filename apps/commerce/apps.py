@@ -7,5 +7,5 @@ class CommerceConfig(AppConfig):
 
     def ready(self):
         """Importe les signaux Django au démarrage de l'app."""
-        # from . import signals
-        pass 
+        # Invalidation du cache de scan (`produits/scan/{code}/`)
+        from .services import scan  # noqa: F401
@@ -0,0 +1,116 @@
+"""
+Benchmark de concurrence du moteur de stock.
+
+Plusieurs threads vendent en boucle le même produit "chaud" jusqu'à
+épuisement du stock. Le benchmark vérifie qu'il n'y a aucune survente
+(nombre de décréments réussis == stock initial, stock final == 0) et
+affiche le débit obtenu pour chaque nombre de threads.
+
+À exécuter sur la base de production (PostgreSQL/MySQL) : SQLite
+sérialise toutes les écritures et ne mesure pas la concurrence.
+
+Usage:
+    python manage.py bench_stock
+    python manage.py bench_stock --stock 5000 --threads 1 2 4 8 16
+"""
+
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.commerce.models import Produit, StockDepot
+from apps.commerce.services.depots import depot_principal
+from apps.commerce.services.stock import StockInsuffisantError, decrement_stock
+from apps.tenants.models import Entreprise
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit et vérifie l'absence de survente du moteur de stock"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stock",
+            type=int,
+            default=2000,
+            help="Stock initial du produit chaud (défaut: 2000)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            nargs="+",
+            default=[1, 2, 4, 8],
+            help="Nombres de threads à tester (défaut: 1 2 4 8)",
+        )
+
+    def handle(self, *args, **options):
+        stock = options["stock"]
+
+        entreprise = Entreprise.objects.create(
+            nom="bench_stock", secteur="bench", type="bench", adresse="-"
+        )
+        try:
+            produit = Produit.objects.create(
+                entreprise=entreprise,
+                nom="Produit chaud",
+                categorie="bench",
+                prix=1,
+                quantite=0,
+            )
+            depot_id = depot_principal(entreprise.pk)
+            StockDepot.objects.create(
+                entreprise=entreprise, produit=produit, depot_id=depot_id, quantite=0
+            )
+            for nb_threads in options["threads"]:
+                Produit.objects.filter(pk=produit.pk).update(quantite=stock)
+                StockDepot.objects.filter(produit=produit).update(quantite=stock)
+                self._run(produit, depot_id, stock, nb_threads)
+        finally:
+            Produit.objects.filter(entreprise=entreprise).delete()
+            entreprise.delete()
+
+    def _run(self, produit, depot_id, stock, nb_threads):
+        """Lance `nb_threads` vendeurs concurrents et contrôle le résultat."""
+        vendus = [0] * nb_threads
+        depart = threading.Barrier(nb_threads + 1)
+
+        def vendeur(index):
+            depart.wait()
+            try:
+                while True:
+                    try:
+                        decrement_stock(produit.pk, 1, depot_id)
+                    except StockInsuffisantError:
+                        return
+                    vendus[index] += 1
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=vendeur, args=(i,)) for i in range(nb_threads)
+        ]
+        for thread in threads:
+            thread.start()
+
+        depart.wait()
+        debut = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        duree = time.perf_counter() - debut
+
+        total_vendu = sum(vendus)
+        restant = Produit.objects.values_list("quantite", flat=True).get(pk=produit.pk)
+
+        if total_vendu != stock or restant != 0:
+            raise CommandError(
+                f"Survente détectée avec {nb_threads} thread(s) : "
+                f"{total_vendu} ventes pour un stock de {stock}, reste {restant}."
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{nb_threads:>3} thread(s) : {total_vendu} ventes en {duree:.3f}s "
+                f"({total_vendu / duree:.0f} ventes/s), stock final {restant}"
+            )
+        )
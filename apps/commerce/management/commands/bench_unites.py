@@ -0,0 +1,92 @@
+"""
+Micro-benchmark des conversions d'unités.
+
+Compare, sur un lot de quantités, l'ancien chemin "un appel par quantité"
+(double recherche d'unité et reconstruction des facteurs `Decimal(str(float))`
+à chaque appel) à la conversion par lot de `CatalogueUnites`, et vérifie
+que les deux donnent les mêmes résultats.
+
+Usage:
+    python manage.py bench_unites
+    python manage.py bench_unites --taille 100000 --repetitions 5
+"""
+
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.commerce.models import CatalogueUnites
+
+# Facteurs tels que stockés avant la matrice (float).
+_FACTEURS_FLOAT = {
+    code: float(unite.facteur_conversion)
+    for code, unite in CatalogueUnites.UNITES.items()
+}
+
+
+def _convertir_par_appel(quantite, source_code, cible_code):
+    """Reproduit l'ancien `Produit.convert_quantity_from` (un appel par quantité)."""
+    source = CatalogueUnites.get(source_code)
+    cible = CatalogueUnites.get(cible_code)
+    if not source or not cible or source.type != cible.type:
+        raise ValueError("Conversion impossible")
+    q = Decimal(str(quantite))
+    facteur_source = Decimal(str(_FACTEURS_FLOAT[source_code]))
+    facteur_cible = Decimal(str(_FACTEURS_FLOAT[cible_code]))
+    return q * (facteur_source / facteur_cible)
+
+
+class Command(BaseCommand):
+    help = "Compare la conversion d'unités par appel et par lot"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--taille",
+            type=int,
+            default=10000,
+            help="Nombre de quantités par lot (défaut: 10000)",
+        )
+        parser.add_argument(
+            "--repetitions",
+            type=int,
+            default=3,
+            help="Nombre de mesures, la meilleure est retenue (défaut: 3)",
+        )
+
+    def handle(self, *args, **options):
+        taille = options["taille"]
+        repetitions = options["repetitions"]
+        quantites = [random.randint(1, 5000) for _ in range(taille)]
+
+        for source, cible in (("g", "kg"), ("kg", "t"), ("mL", "L")):
+            par_appel, resultat_appel = self._mesurer(
+                repetitions,
+                lambda: [_convertir_par_appel(q, source, cible) for q in quantites],
+            )
+            par_lot, resultat_lot = self._mesurer(
+                repetitions,
+                lambda: CatalogueUnites.convertir_lot(quantites, source, cible),
+            )
+            if resultat_appel != resultat_lot:
+                raise CommandError(f"Résultats différents pour {source} -> {cible}.")
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{source:>2} -> {cible:<2} x{taille} : "
+                    f"par appel {par_appel * 1000:.1f} ms, "
+                    f"par lot {par_lot * 1000:.1f} ms (x{par_appel / par_lot:.1f})"
+                )
+            )
+
+    @staticmethod
+    def _mesurer(repetitions, fonction):
+        """Retourne (meilleure durée en secondes, dernier résultat)."""
+        meilleure = None
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            resultat = fonction()
+            duree = time.perf_counter() - debut
+            meilleure = duree if meilleure is None else min(meilleure, duree)
+        return meilleure, resultat
@@ -0,0 +1,126 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:56
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_lignes(apps, schema_editor):
+    """Crée une ligne pour chaque vente mono-produit existante."""
+    Vente = apps.get_model("commerce", "Vente")
+    VenteLigne = apps.get_model("commerce", "VenteLigne")
+
+    ventes = (
+        Vente.objects.filter(produit__isnull=False, quantite__gt=0)
+        .values_list("id", "entreprise_id", "produit_id", "quantite", "prix_unitaire")
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+    for vente_id, entreprise_id, produit_id, quantite, prix_unitaire in ventes:
+        batch.append(
+            VenteLigne(
+                vente_id=vente_id,
+                entreprise_id=entreprise_id,
+                produit_id=produit_id,
+                quantite=quantite,
+                prix_unitaire=prix_unitaire,
+                prix_vente=quantite * prix_unitaire,
+            )
+        )
+        if len(batch) >= 2000:
+            VenteLigne.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        VenteLigne.objects.bulk_create(batch)
+
+    # auto_now_add a horodaté les lignes à maintenant : reprendre la date
+    # de la vente pour que les agrégats mensuels restent corrects.
+    VenteLigne.objects.update(
+        created_at=Subquery(
+            Vente.objects.filter(pk=OuterRef("vente_id")).values("created_at")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "commerce",
+            "0011_alter_categorie_entreprise_alter_produit_entreprise_and_more",
+        ),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VenteLigne",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "quantite",
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(1)]
+                    ),
+                ),
+                (
+                    "prix_unitaire",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=10),
+                ),
+                (
+                    "prix_vente",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="lignes_vente",
+                        to="commerce.produit",
+                    ),
+                ),
+                (
+                    "vente",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lignes",
+                        to="commerce.vente",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["entreprise", "created_at"],
+                        name="commerce_ve_entrepr_9e5f5d_idx",
+                    ),
+                    models.Index(
+                        fields=["entreprise", "produit"],
+                        name="commerce_ve_entrepr_b33e2e_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_lignes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0012_venteligne"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="produit",
+            index=models.Index(
+                fields=["entreprise", "updated_at"],
+                name="commerce_pr_entrepr_21e6ac_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:08
+
+import apps.core.fields
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import F
+
+ECHELLE = 1000
+MODELES = ("Produit", "Vente", "VenteLigne")
+
+
+def vers_milliemes(apps, schema_editor):
+    """Les quantités entières existantes deviennent des millièmes."""
+    for nom in MODELES:
+        apps.get_model("commerce", nom).objects.update(quantite=F("quantite") * ECHELLE)
+
+
+def depuis_milliemes(apps, schema_editor):
+    for nom in MODELES:
+        apps.get_model("commerce", nom).objects.update(quantite=F("quantite") / ECHELLE)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0013_produit_updated_at_index"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="produit",
+            name="quantite",
+            field=apps.core.fields.QuantiteField(
+                default=0, validators=[django.core.validators.MinValueValidator(0)]
+            ),
+        ),
+        migrations.AlterField(
+            model_name="vente",
+            name="quantite",
+            field=apps.core.fields.QuantiteField(
+                blank=True,
+                null=True,
+                validators=[django.core.validators.MinValueValidator(0)],
+            ),
+        ),
+        migrations.AlterField(
+            model_name="venteligne",
+            name="quantite",
+            field=apps.core.fields.QuantiteField(
+                validators=[django.core.validators.MinValueValidator(0)]
+            ),
+        ),
+        migrations.RunPython(vers_milliemes, depuis_milliemes),
+        migrations.AddConstraint(
+            model_name="produit",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("quantite__gte", 0)),
+                name="produit_quantite_positive",
+            ),
+        ),
+    ]
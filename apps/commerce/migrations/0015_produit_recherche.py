@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:11
+
+import apps.core.fields
+from django.db import migrations, models
+
+
+def remplir_recherche(apps, schema_editor):
+    """Calcule la colonne de recherche des lignes existantes."""
+    Produit = apps.get_model("commerce", "Produit")
+    champ = Produit._meta.get_field("recherche")
+    lot = []
+    for objet in Produit.objects.only("id", *champ.sources).iterator(chunk_size=2000):
+        objet.recherche = champ.calculer(objet)
+        lot.append(objet)
+        if len(lot) >= 2000:
+            Produit.objects.bulk_update(lot, ["recherche"])
+            lot = []
+    if lot:
+        Produit.objects.bulk_update(lot, ["recherche"])
+
+
+def creer_index_trigramme(apps, schema_editor):
+    """Index trigramme (PostgreSQL) pour `recherche LIKE '%...%'`."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS commerce_produit_recherche_trgm "
+        "ON commerce_produit USING gin (recherche gin_trgm_ops)"
+    )
+
+
+def supprimer_index_trigramme(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS commerce_produit_recherche_trgm")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0014_quantites_decimales"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="produit",
+            name="recherche",
+            field=apps.core.fields.RechercheField(
+                blank=True, default="", max_length=500, sources=("nom", "categorie")
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="produit",
+            index=models.Index(
+                fields=["entreprise", "recherche"],
+                name="commerce_pr_entrepr_cd872d_idx",
+            ),
+        ),
+        migrations.RunPython(remplir_recherche, migrations.RunPython.noop),
+        migrations.RunPython(creer_index_trigramme, supprimer_index_trigramme),
+    ]
@@ -0,0 +1,142 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:17
+
+import apps.core.fields
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+def soldes_ouverture(apps, schema_editor):
+    """Le stock existant devient un mouvement d'ajustement initial par produit."""
+    Produit = apps.get_model("commerce", "Produit")
+    MouvementStock = apps.get_model("commerce", "MouvementStock")
+    produits = Produit.objects.exclude(quantite=0).values_list(
+        "pk", "entreprise_id", "quantite"
+    )
+    MouvementStock.objects.bulk_create(
+        (
+            MouvementStock(
+                entreprise_id=entreprise_id,
+                produit_id=pk,
+                type="ajustement",
+                quantite=quantite,
+            )
+            for pk, entreprise_id, quantite in produits.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0015_produit_recherche"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MouvementStock",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("entree", "Entrée de stock"),
+                            ("vente", "Vente"),
+                            ("annulation", "Annulation de vente"),
+                            ("ajustement", "Ajustement"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("quantite", apps.core.fields.QuantiteField()),
+                ("reference", models.UUIDField(blank=True, null=True)),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="mouvements",
+                        to="commerce.produit",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["entreprise", "created_at"],
+                        name="commerce_mo_entrepr_cf101c_idx",
+                    ),
+                    models.Index(
+                        fields=["produit", "created_at"],
+                        name="commerce_mo_produit_d202ea_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="PointStock",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("date", models.DateTimeField()),
+                ("quantite", apps.core.fields.QuantiteField()),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="points_stock",
+                        to="commerce.produit",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("produit", "date"),
+                        name="unique_point_stock_produit_date",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(soldes_ouverture, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:31
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def couts_lignes_existantes(apps, schema_editor):
+    """
+    Fige le coût unitaire des lignes existantes : coût FIFO de la vente
+    (`CoutVente`) lorsqu'il existe, sinon coût moyen courant du produit
+    (approximation pour les ventes antérieures à la valorisation).
+    """
+    VenteLigne = apps.get_model("commerce", "VenteLigne")
+    CoutVente = apps.get_model("finance", "CoutVente")
+    ValeurStock = apps.get_model("finance", "ValeurStock")
+
+    couts_vente = {
+        (cout["vente_id"], cout["produit_id"]): cout["fifo"] / cout["quantite"]
+        for cout in CoutVente.objects.filter(quantite__gt=0)
+        .values("vente_id", "produit_id")
+        .annotate(quantite=Sum("quantite"), fifo=Sum("cout_fifo"))
+        if cout["quantite"]
+    }
+    couts_moyens = {
+        produit_id: valeur / quantite
+        for produit_id, quantite, valeur in ValeurStock.objects.filter(
+            quantite__gt=0
+        ).values_list("produit_id", "quantite", "valeur_cmp")
+    }
+
+    lignes = VenteLigne.objects.filter(cout_unitaire__isnull=True).only(
+        "pk", "vente_id", "produit_id"
+    )
+    a_modifier = []
+    for ligne in lignes.iterator(chunk_size=2000):
+        cout = couts_vente.get((ligne.vente_id, ligne.produit_id))
+        if cout is None:
+            cout = couts_moyens.get(ligne.produit_id)
+        if cout is None:
+            continue
+        ligne.cout_unitaire = cout.quantize(Decimal("0.0001"))
+        a_modifier.append(ligne)
+        if len(a_modifier) >= 2000:
+            VenteLigne.objects.bulk_update(a_modifier, ["cout_unitaire"])
+            a_modifier = []
+    VenteLigne.objects.bulk_update(a_modifier, ["cout_unitaire"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0016_mouvementstock_pointstock"),
+        ("finance", "0009_valorisation_stock"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="venteligne",
+            name="cout_unitaire",
+            field=models.DecimalField(
+                blank=True, decimal_places=4, max_digits=14, null=True
+            ),
+        ),
+        migrations.RunPython(couts_lignes_existantes, migrations.RunPython.noop),
+    ]
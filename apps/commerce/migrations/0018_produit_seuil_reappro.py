@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:34
+
+import apps.core.fields
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0017_venteligne_cout_unitaire"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="produit",
+            name="seuil_reappro",
+            field=apps.core.fields.QuantiteField(
+                blank=True,
+                null=True,
+                validators=[django.core.validators.MinValueValidator(0)],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="produit",
+            index=models.Index(
+                condition=models.Q(("quantite__gt", 0)),
+                fields=["entreprise", "nom"],
+                name="produit_en_stock_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="produit",
+            index=models.Index(
+                condition=models.Q(("quantite__lte", models.F("seuil_reappro"))),
+                fields=["entreprise", "nom"],
+                name="produit_stock_bas_idx",
+            ),
+        ),
+    ]
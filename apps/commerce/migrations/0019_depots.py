@@ -0,0 +1,205 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:39
+
+import apps.core.fields
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+def depots_principaux(apps, schema_editor):
+    """
+    Crée le dépôt principal de chaque entreprise ayant des produits et y
+    place le stock existant.
+    """
+    Produit = apps.get_model("commerce", "Produit")
+    Depot = apps.get_model("commerce", "Depot")
+    StockDepot = apps.get_model("commerce", "StockDepot")
+
+    entreprises = (
+        Produit.objects.filter(entreprise__isnull=False)
+        .values_list("entreprise_id", flat=True)
+        .distinct()
+    )
+    depots = {
+        depot.entreprise_id: depot.pk
+        for depot in Depot.objects.bulk_create(
+            [
+                Depot(entreprise_id=entreprise_id, nom="Principal", principal=True)
+                for entreprise_id in entreprises
+            ],
+            batch_size=2000,
+        )
+    }
+    produits = Produit.objects.filter(
+        entreprise__isnull=False, quantite__gt=0
+    ).values_list("pk", "entreprise_id", "quantite")
+    StockDepot.objects.bulk_create(
+        (
+            StockDepot(
+                entreprise_id=entreprise_id,
+                produit_id=pk,
+                depot_id=depots[entreprise_id],
+                quantite=quantite,
+            )
+            for pk, entreprise_id, quantite in produits.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0018_produit_seuil_reappro"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="mouvementstock",
+            name="type",
+            field=models.CharField(
+                choices=[
+                    ("entree", "Entrée de stock"),
+                    ("vente", "Vente"),
+                    ("annulation", "Annulation de vente"),
+                    ("ajustement", "Ajustement"),
+                    ("transfert", "Transfert entre dépôts"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.CreateModel(
+            name="Depot",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("nom", models.CharField(max_length=100)),
+                ("principal", models.BooleanField(default=False)),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="mouvementstock",
+            name="depot",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="mouvements",
+                to="commerce.depot",
+            ),
+        ),
+        migrations.AddField(
+            model_name="vente",
+            name="depot",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="ventes",
+                to="commerce.depot",
+            ),
+        ),
+        migrations.CreateModel(
+            name="StockDepot",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "quantite",
+                    apps.core.fields.QuantiteField(
+                        default=0,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                (
+                    "depot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="stocks",
+                        to="commerce.depot",
+                    ),
+                ),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stocks_depot",
+                        to="commerce.produit",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="depot",
+            constraint=models.UniqueConstraint(
+                fields=("entreprise", "nom"), name="unique_depot_nom_par_entreprise"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="depot",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("principal", True)),
+                fields=("entreprise",),
+                name="unique_depot_principal_par_entreprise",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stockdepot",
+            index=models.Index(
+                fields=["depot", "produit"], name="commerce_st_depot_i_5fa8c3_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="stockdepot",
+            constraint=models.UniqueConstraint(
+                fields=("produit", "depot"), name="unique_stock_produit_depot"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="stockdepot",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("quantite__gte", 0)),
+                name="stock_depot_quantite_positive",
+            ),
+        ),
+        migrations.RunPython(depots_principaux, migrations.RunPython.noop),
+    ]
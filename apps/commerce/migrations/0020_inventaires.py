@@ -0,0 +1,126 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:44
+
+import apps.core.fields
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0019_depots"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Inventaire",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "statut",
+                    models.CharField(
+                        choices=[("ouvert", "Ouvert"), ("valide", "Validé")],
+                        default="ouvert",
+                        max_length=20,
+                    ),
+                ),
+                ("valide_le", models.DateTimeField(blank=True, null=True)),
+                (
+                    "depot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="inventaires",
+                        to="commerce.depot",
+                    ),
+                ),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="InventaireLigne",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "quantite_comptee",
+                    apps.core.fields.QuantiteField(
+                        validators=[django.core.validators.MinValueValidator(0)]
+                    ),
+                ),
+                (
+                    "quantite_systeme",
+                    apps.core.fields.QuantiteField(blank=True, null=True),
+                ),
+                ("ecart", apps.core.fields.QuantiteField(blank=True, null=True)),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "inventaire",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lignes",
+                        to="commerce.inventaire",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lignes_inventaire",
+                        to="commerce.produit",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="inventaire",
+            index=models.Index(
+                fields=["entreprise", "created_at"],
+                name="commerce_in_entrepr_67e3a4_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="inventaireligne",
+            constraint=models.UniqueConstraint(
+                fields=("inventaire", "produit"), name="unique_inventaire_produit"
+            ),
+        ),
+    ]
@@ -0,0 +1,145 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:50
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def soldes_existants(apps, schema_editor):
+    """
+    Soldes des ventes existantes : une vente payée l'a été en totalité (un
+    paiement à sa date) ; une vente en attente ou en paiement partiel doit
+    son total, les montants déjà reçus n'ayant pas été enregistrés.
+    """
+    Vente = apps.get_model("commerce", "Vente")
+    Paiement = apps.get_model("commerce", "Paiement")
+    Partner = apps.get_model("partners", "Partner")
+
+    total = Coalesce(F("prix_vente"), Value(Decimal(0)))
+    Vente.objects.filter(statut="payee").update(montant_paye=total, reste_a_payer=0)
+    Vente.objects.filter(statut__in=("en_attente", "paiement_partiel")).update(
+        montant_paye=0, reste_a_payer=total
+    )
+
+    payees = Vente.objects.filter(statut="payee", montant_paye__gt=0).values_list(
+        "pk", "entreprise_id", "montant_paye", "created_at"
+    )
+    paiements = []
+    for pk, entreprise_id, montant, date in payees.iterator(chunk_size=2000):
+        paiements.append(
+            Paiement(
+                entreprise_id=entreprise_id,
+                vente_id=pk,
+                montant=montant,
+                mode="autre",
+                date=date,
+            )
+        )
+        if len(paiements) >= 2000:
+            Paiement.objects.bulk_create(paiements)
+            paiements = []
+    Paiement.objects.bulk_create(paiements)
+
+    soldes = Vente.objects.filter(client=OuterRef("pk")).values("client")
+    zero = Value(Decimal(0))
+    Partner.objects.filter(type="client").update(
+        montant_paye=Coalesce(
+            Subquery(soldes.annotate(total=Sum("montant_paye")).values("total")), zero
+        ),
+        reste_a_payer=Coalesce(
+            Subquery(soldes.annotate(total=Sum("reste_a_payer")).values("total")), zero
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0020_inventaires"),
+        ("partners", "0006_partner_soldes"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Paiement",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("montant", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "mode",
+                    models.CharField(
+                        choices=[
+                            ("especes", "Espèces"),
+                            ("mobile_money", "Mobile money"),
+                            ("banque", "Banque"),
+                            ("autre", "Autre"),
+                        ],
+                        default="especes",
+                        max_length=20,
+                    ),
+                ),
+                ("reference", models.CharField(blank=True, max_length=100)),
+                ("date", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="vente",
+            name="montant_paye",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="vente",
+            name="reste_a_payer",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name="vente",
+            index=models.Index(
+                condition=models.Q(("reste_a_payer__gt", 0)),
+                fields=["entreprise", "created_at"],
+                name="vente_creance_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="paiement",
+            name="entreprise",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="%(class)s_set",
+                to="tenants.entreprise",
+            ),
+        ),
+        migrations.AddField(
+            model_name="paiement",
+            name="vente",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="paiements",
+                to="commerce.vente",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="paiement",
+            index=models.Index(
+                fields=["entreprise", "date"], name="commerce_pa_entrepr_fae4c7_idx"
+            ),
+        ),
+        migrations.RunPython(soldes_existants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,165 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:55
+
+import apps.core.fields
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0021_paiements"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="mouvementstock",
+            name="type",
+            field=models.CharField(
+                choices=[
+                    ("entree", "Entrée de stock"),
+                    ("vente", "Vente"),
+                    ("annulation", "Annulation de vente"),
+                    ("retour", "Retour client"),
+                    ("ajustement", "Ajustement"),
+                    ("transfert", "Transfert entre dépôts"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.CreateModel(
+            name="Retour",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "montant",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "montant_rembourse",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "mode",
+                    models.CharField(
+                        choices=[
+                            ("especes", "Espèces"),
+                            ("mobile_money", "Mobile money"),
+                            ("banque", "Banque"),
+                            ("autre", "Autre"),
+                        ],
+                        default="especes",
+                        max_length=20,
+                    ),
+                ),
+                ("motif", models.CharField(blank=True, max_length=255)),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "vente",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="retours",
+                        to="commerce.vente",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RetourLigne",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "quantite",
+                    apps.core.fields.QuantiteField(
+                        validators=[django.core.validators.MinValueValidator(0)]
+                    ),
+                ),
+                (
+                    "montant",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="lignes_retour",
+                        to="commerce.produit",
+                    ),
+                ),
+                (
+                    "retour",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lignes",
+                        to="commerce.retour",
+                    ),
+                ),
+                (
+                    "vente_ligne",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="retours",
+                        to="commerce.venteligne",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name="retour",
+            index=models.Index(
+                fields=["entreprise", "created_at"],
+                name="commerce_re_entrepr_88850f_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="retourligne",
+            index=models.Index(
+                fields=["entreprise", "created_at"],
+                name="commerce_re_entrepr_022fad_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0022_retours"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="produit",
+            name="code_barre",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="produit",
+            name="sku",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="produit",
+            constraint=models.UniqueConstraint(
+                fields=("entreprise", "code_barre"), name="unique_produit_code_barre"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="produit",
+            constraint=models.UniqueConstraint(
+                fields=("entreprise", "sku"), name="unique_produit_sku"
+            ),
+        ),
+    ]
@@ -1,9 +1,12 @@
-from decimal import Decimal
+from decimal import ROUND_HALF_UP, Decimal
+from types import MappingProxyType
 
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.db.models.functions import Lower
+from django.utils import timezone
 
+from apps.core.fields import QuantiteField, RechercheField
 from apps.core.models import BaseModel, TenantModel
 
 
@@ -12,14 +15,17 @@ class UniteMesure:
     Classe pour représenter une unité de mesure avec facteur de conversion.
     
     Permet de gérer les conversions entre différentes unités sans stocker
-    les unités en base de données.
+    les unités en base de données. Les instances sont immuables (`__slots__`)
+    et partagées par tout le processus via `CatalogueUnites`.
     
     Attributs:
         code (str): Code unique (ex: 'kg', 'L', 'm', 't', 'hL')
         label (str): Libellé affiché (ex: 'Kilogramme', 'Tonne')
         type (str): Type d'unité ('poids', 'volume', 'longueur', 'unite')
-        facteur_conversion (float): Facteur de conversion vers l'unité de base
+        facteur_conversion (Decimal): Facteur exact de conversion vers l'unité de base
     """
+
+    __slots__ = ("code", "label", "type", "facteur_conversion")
     
     def __init__(self, code, label, type_mesure, facteur_conversion=1):
         """
@@ -29,12 +35,18 @@ class UniteMesure:
             code (str): Code unique de l'unité (ex: 'kg', 'L', 'm')
             label (str): Libellé affiché (ex: 'Kilogramme')
             type_mesure (str): Type d'unité ('poids', 'volume', 'longueur', 'unite')
-            facteur_conversion (float): Facteur de conversion (défaut: 1)
+            facteur_conversion (int/str/Decimal): Facteur de conversion (défaut: 1)
         """
-        self.code = code
-        self.label = label
-        self.type = type_mesure
-        self.facteur_conversion = facteur_conversion
+        object.__setattr__(self, "code", code)
+        object.__setattr__(self, "label", label)
+        object.__setattr__(self, "type", type_mesure)
+        object.__setattr__(self, "facteur_conversion", Decimal(str(facteur_conversion)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UniteMesure est immuable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("UniteMesure est immuable.")
     
     def __str__(self):
         """Retourne le libellé de l'unité."""
@@ -45,6 +57,15 @@ class UniteMesure:
         return f"UniteMesure({self.code}, {self.facteur_conversion})"
 
 
+def _en_decimal(quantite):
+    """Convertit une quantité en Decimal (les float passent par `str`)."""
+    if isinstance(quantite, Decimal):
+        return quantite
+    if isinstance(quantite, float):
+        return Decimal(str(quantite))
+    return Decimal(quantite)
+
+
 class CatalogueUnites:
     """
     Catalogue centralisé de toutes les unités de mesure disponibles.
@@ -53,6 +74,13 @@ class CatalogueUnites:
     - Récupération d'une unité par code
     - Génération de choix pour les champs Django
     - Filtrage par type d'unité
+    - Conversion de quantités, unitaire ou par lot
+
+    Les rapports de conversion entre unités compatibles sont calculés une
+    seule fois au chargement (`RATIOS`, en lecture seule) : une conversion
+    se réduit à une recherche dans un dictionnaire et une multiplication
+    `Decimal` exacte. Le code `None` désigne un produit sans mesure,
+    convertible uniquement vers les unités de type 'unite' (rapport 1).
     
     Unités disponibles:
     - **Poids**: t (tonne, 1000), kg, g, mg
@@ -61,23 +89,26 @@ class CatalogueUnites:
     - **Unité**: unite, paire, piece, carton
     """
     
-    UNITES = {
+    UNITES = MappingProxyType({
         't': UniteMesure('t', 'Tonne', 'poids', 1000),
         'kg': UniteMesure('kg', 'Kilogramme', 'poids', 1),
-        'hg': UniteMesure('hg', 'Hectogramme', 'poids', 0.1),
-        'g': UniteMesure('g', 'Gramme', 'poids', 0.001),
-        'mg': UniteMesure('mg', 'Milligramme', 'poids', 0.000001),
+        'hg': UniteMesure('hg', 'Hectogramme', 'poids', '0.1'),
+        'g': UniteMesure('g', 'Gramme', 'poids', '0.001'),
+        'mg': UniteMesure('mg', 'Milligramme', 'poids', '0.000001'),
         'hL': UniteMesure('hL', 'Hectolitre', 'volume', 100),
         'L': UniteMesure('L', 'Litre', 'volume', 1),
-        'mL': UniteMesure('mL', 'Millilitre', 'volume', 0.001),
+        'mL': UniteMesure('mL', 'Millilitre', 'volume', '0.001'),
         'm': UniteMesure('m', 'Mètre', 'longueur', 1),
-        'cm': UniteMesure('cm', 'Centimètre', 'longueur', 0.01),
-        'mm': UniteMesure('mm', 'Millimètre', 'longueur', 0.001),
+        'cm': UniteMesure('cm', 'Centimètre', 'longueur', '0.01'),
+        'mm': UniteMesure('mm', 'Millimètre', 'longueur', '0.001'),
         'unite': UniteMesure('unite', 'Unité', 'unite', 1),
         'paire': UniteMesure('paire', 'Paire', 'unite', 1),
         'piece': UniteMesure('piece', 'Pièce', 'unite', 1),
         'carton': UniteMesure('carton', 'Carton', 'unite', 1),
-    }
+    })
+
+    # {(code_source, code_cible): rapport}, rempli après la définition de la classe.
+    RATIOS = MappingProxyType({})
     
     @classmethod
     def get(cls, code):
@@ -115,6 +146,123 @@ class CatalogueUnites:
         """
         return [unite for unite in cls.UNITES.values() if unite.type == type_mesure]
 
+    @classmethod
+    def _construire_ratios(cls):
+        """Calcule les rapports exacts entre toutes les unités de même type."""
+        ratios = {}
+        for source in cls.UNITES.values():
+            for cible in cls.UNITES.values():
+                if source.type == cible.type:
+                    ratios[(source.code, cible.code)] = (
+                        source.facteur_conversion / cible.facteur_conversion
+                    )
+        # Produit sans mesure : simple compte d'unités.
+        ratios[(None, None)] = Decimal(1)
+        for unite in cls.get_by_type("unite"):
+            ratios[(None, unite.code)] = Decimal(1)
+            ratios[(unite.code, None)] = Decimal(1)
+        return MappingProxyType(ratios)
+
+    @classmethod
+    def ratio(cls, source_code, cible_code):
+        """
+        Retourne le rapport de conversion `source -> cible`.
+
+        Args:
+            source_code (str): Code de l'unité source (None: produit sans mesure)
+            cible_code (str): Code de l'unité cible (None: produit sans mesure)
+
+        Returns:
+            Decimal: Rapport exact (quantité cible = quantité source * rapport)
+
+        Raises:
+            ValueError: Si une unité est inconnue ou les types incompatibles
+        """
+        try:
+            return cls.RATIOS[(source_code, cible_code)]
+        except KeyError:
+            pass
+
+        if source_code is not None and source_code not in cls.UNITES:
+            raise ValueError(f"Unité source inconnue: {source_code}")
+        if cible_code is not None and cible_code not in cls.UNITES:
+            raise ValueError(f"Unité cible inconnue: {cible_code}")
+        if source_code is None or cible_code is None:
+            raise ValueError("Produit sans mesure ne peut être converti.")
+        raise ValueError(
+            f"Types d'unité incompatibles: {cls.UNITES[source_code].type} "
+            f"vs {cls.UNITES[cible_code].type}"
+        )
+
+    @classmethod
+    def convertir(cls, quantite, source_code, cible_code):
+        """
+        Convertit une quantité d'une unité vers une autre.
+
+        Args:
+            quantite (int/float/Decimal): Quantité exprimée dans `source_code`
+            source_code (str): Code de l'unité source
+            cible_code (str): Code de l'unité cible
+
+        Returns:
+            Decimal: Quantité exprimée dans `cible_code`
+
+        Raises:
+            ValueError: Si une unité est inconnue ou les types incompatibles
+        """
+        return _en_decimal(quantite) * cls.ratio(source_code, cible_code)
+
+    @classmethod
+    def convertir_lot(cls, quantites, source_code, cible_code):
+        """
+        Convertit en un appel une liste de quantités de même unité.
+
+        Le rapport n'est recherché qu'une fois pour tout le lot.
+
+        Args:
+            quantites (iterable): Quantités exprimées dans `source_code`
+            source_code (str): Code de l'unité source
+            cible_code (str): Code de l'unité cible
+
+        Returns:
+            list: Quantités (Decimal) exprimées dans `cible_code`, dans le même ordre
+
+        Raises:
+            ValueError: Si une unité est inconnue ou les types incompatibles
+
+        Exemple:
+            >>> CatalogueUnites.convertir_lot([500, 250], 'g', 'kg')
+            [Decimal('0.500'), Decimal('0.250')]
+        """
+        ratio = cls.ratio(source_code, cible_code)
+        return [_en_decimal(quantite) * ratio for quantite in quantites]
+
+    @classmethod
+    def convertir_lignes(cls, lignes):
+        """
+        Convertit en un appel des quantités d'unités hétérogènes.
+
+        Args:
+            lignes (iterable): Triplets (quantite, source_code, cible_code)
+
+        Returns:
+            list: Quantités converties (Decimal), dans le même ordre
+
+        Raises:
+            ValueError: Pour la première ligne dont la conversion est impossible
+        """
+        ratios = cls.RATIOS
+        resultats = []
+        for quantite, source_code, cible_code in lignes:
+            ratio = ratios.get((source_code, cible_code))
+            if ratio is None:
+                ratio = cls.ratio(source_code, cible_code)
+            resultats.append(_en_decimal(quantite) * ratio)
+        return resultats
+
+
+CatalogueUnites.RATIOS = CatalogueUnites._construire_ratios()
+
 
 class Categorie(TenantModel):
     nom = models.CharField(max_length=100, db_index=True)
@@ -139,7 +287,13 @@ class Produit(TenantModel):
         categorie (str): Catégorie du produit (max 100 caractères)
         prix (Decimal): Prix unitaire dans l'unité du produit
         mesure (str): Code de l'unité de mesure (ex: 'kg', 'L', 'unite')
-        quantite (int): Quantité disponible en stock (>= 0)
+        quantite (Decimal): Quantité disponible en stock, dans l'unité du produit
+            (>= 0, 3 décimales)
+        seuil_reappro (Decimal): Point de commande ; le produit est "en stock bas"
+            dès que `quantite <= seuil_reappro` (aucune alerte si vide)
+        recherche (str): nom + catégorie normalisés (recherche, calculé automatiquement)
+        code_barre (str): Code-barres (EAN/UPC...), unique par entreprise (optionnel)
+        sku (str): Référence interne, unique par entreprise (optionnel)
         entreprise (ForeignKey): Lien vers l'entreprise propriétaire
     
     Méthodes de conversion:
@@ -155,12 +309,45 @@ class Produit(TenantModel):
         null=True,
         blank=True,
     )
-    quantite = models.PositiveIntegerField(default=0, validators=[MinValueValidator(0)])
+    quantite = QuantiteField(default=0, validators=[MinValueValidator(0)])
+    seuil_reappro = QuantiteField(
+        null=True, blank=True, validators=[MinValueValidator(0)]
+    )
+    recherche = RechercheField(sources=("nom", "categorie"))
+    # Codes lus en caisse (`produits/scan/{code}/`) ; vides : NULL, non contraints.
+    code_barre = models.CharField(max_length=64, null=True, blank=True)
+    sku = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
         indexes = [
             models.Index(fields=["entreprise", "categorie"]),
             models.Index(fields=["entreprise", "nom"]),
+            models.Index(fields=["entreprise", "updated_at"]),
+            models.Index(fields=["entreprise", "recherche"]),
+            # Index partiels : `en-stock/` et `low-stock/` ne lisent que les
+            # produits concernés, dans l'ordre de la liste (nom).
+            models.Index(
+                fields=["entreprise", "nom"],
+                condition=models.Q(quantite__gt=0),
+                name="produit_en_stock_idx",
+            ),
+            models.Index(
+                fields=["entreprise", "nom"],
+                condition=models.Q(quantite__lte=models.F("seuil_reappro")),
+                name="produit_stock_bas_idx",
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(quantite__gte=0), name="produit_quantite_positive"
+            ),
+            # Index uniques (entreprise, code) : un scan est une lecture par index.
+            models.UniqueConstraint(
+                fields=["entreprise", "code_barre"], name="unique_produit_code_barre"
+            ),
+            models.UniqueConstraint(
+                fields=["entreprise", "sku"], name="unique_produit_sku"
+            ),
         ]
 
     def __str__(self):
@@ -199,28 +386,9 @@ class Produit(TenantModel):
         """
         if quantity is None:
             return Decimal(0)
-
-        source_unite = self.get_unite_mesure()
-        target_unite = CatalogueUnites.get(target_unite_code)
-        
-        if not target_unite:
-            raise ValueError(f"Unité cible inconnue: {target_unite_code}")
-
-        if source_unite is None:
-            # produit sans mesure (compte d'unités)
-            if target_unite.type != "unite":
-                raise ValueError("Produit sans mesure ne peut être converti.")
-            return Decimal(quantity)
-
-        if source_unite.type != target_unite.type:
-            raise ValueError(f"Types d'unité incompatibles: {source_unite.type} vs {target_unite.type}")
-
-        q = Decimal(str(quantity))
-        factor_from = Decimal(str(source_unite.facteur_conversion))
-        factor_to = Decimal(str(target_unite.facteur_conversion))
-
-        # conversion: q * (factor_from / factor_to)
-        return q * (factor_from / factor_to)
+        return CatalogueUnites.convertir(
+            quantity, self.get_code_mesure(), target_unite_code
+        )
 
     def convert_quantity_from(self, quantity, source_unite_code):
         """
@@ -245,54 +413,132 @@ class Produit(TenantModel):
         """
         if quantity is None:
             return Decimal(0)
+        return CatalogueUnites.convertir(
+            quantity, source_unite_code, self.get_code_mesure()
+        )
 
-        source_unite = CatalogueUnites.get(source_unite_code)
-        target_unite = self.get_unite_mesure()
-        
-        if not source_unite:
-            raise ValueError(f"Unité source inconnue: {source_unite_code}")
+    def get_code_mesure(self):
+        """
+        Retourne le code de l'unité du produit.
+
+        Returns:
+            str ou None: Code de l'unité, ou None si non configurée ou inconnue
+        """
+        unite = self.get_unite_mesure()
+        return unite.code if unite else None
+
+
+class Depot(TenantModel):
+    """
+    Emplacement de stock (magasin, réserve, comptoir).
+
+    Chaque entreprise a un dépôt principal, créé au besoin : les ventes,
+    entrées et ajustements qui ne précisent pas de dépôt le visent.
+
+    Attributs:
+        nom (str): Nom du dépôt (unique par entreprise)
+        principal (bool): Dépôt par défaut de l'entreprise (un seul)
+    """
+
+    nom = models.CharField(max_length=100)
+    principal = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["entreprise", "nom"], name="unique_depot_nom_par_entreprise"
+            ),
+            models.UniqueConstraint(
+                fields=["entreprise"],
+                condition=models.Q(principal=True),
+                name="unique_depot_principal_par_entreprise",
+            ),
+        ]
+
+    def __str__(self):
+        return self.nom
+
+
+class StockDepot(TenantModel):
+    """
+    Stock d'un produit dans un dépôt.
 
-        if target_unite is None:
-            if source_unite.type != "unite":
-                raise ValueError("Produit sans mesure ne peut être converti.")
-            return Decimal(quantity)
+    Tenu par le moteur de stock (`services.stock`) dans la même transaction
+    que `Produit.quantite`, qui reste le stock total : la somme des lignes
+    d'un produit est égale à sa quantité (index unique `(produit, depot)`).
 
-        if source_unite.type != target_unite.type:
-            raise ValueError(f"Types d'unité incompatibles: {source_unite.type} vs {target_unite.type}")
+    Attributs:
+        produit (ForeignKey): Produit stocké
+        depot (ForeignKey): Dépôt
+        quantite (Decimal): Quantité disponible dans le dépôt (>= 0)
+    """
+
+    produit = models.ForeignKey(
+        Produit, on_delete=models.CASCADE, related_name="stocks_depot"
+    )
+    depot = models.ForeignKey(Depot, on_delete=models.RESTRICT, related_name="stocks")
+    quantite = QuantiteField(default=0, validators=[MinValueValidator(0)])
+
+    class Meta:
+        indexes = [models.Index(fields=["depot", "produit"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["produit", "depot"], name="unique_stock_produit_depot"
+            ),
+            models.CheckConstraint(
+                condition=models.Q(quantite__gte=0),
+                name="stock_depot_quantite_positive",
+            ),
+        ]
 
-        q = Decimal(str(quantity))
-        factor_source = Decimal(str(source_unite.facteur_conversion))
-        factor_product = Decimal(str(target_unite.facteur_conversion))
+    def __str__(self):
+        return f"{self.produit_id} @ {self.depot_id}: {self.quantite}"
+
+
+def calculer_montant(quantite, prix_unitaire):
+    """
+    Calcule le montant d'une ligne, arrondi au centime.
 
-        # conversion to product unit: q * (factor_source / factor_product)
-        return q * (factor_source / factor_product)
+    Args:
+        quantite (Decimal): Quantité dans l'unité du produit (peut être fractionnaire)
+        prix_unitaire (Decimal): Prix par unité du produit
+
+    Returns:
+        Decimal: quantite * prix_unitaire, arrondi à 2 décimales (demi supérieur)
+    """
+    return (Decimal(quantite) * prix_unitaire).quantize(
+        Decimal("0.01"), rounding=ROUND_HALF_UP
+    )
 
 
 class Vente(TenantModel):
     """
     Modèle pour représenter une vente (facture/bon de vente).
     
-    Une vente représente la vente d'un produit unique à un client.
-    Relation: une seule vente par combinaison (client, produit, entreprise).
+    Une vente (commande) regroupe une ou plusieurs lignes `VenteLigne`.
+    Les champs `produit`/`quantite`/`prix_unitaire` ne sont renseignés que
+    pour les ventes mono-produit (compatibilité avec l'API historique) ;
+    `prix_vente` contient toujours le total de la commande.
     
     Attributs:
         client (ForeignKey): Partenaire de type "client"
         produit (ForeignKey): Produit vendu (PROTECT: impossible de supprimer)
-        quantite (int): Quantité vendue (en unité du produit)
+        quantite (Decimal): Quantité vendue (en unité du produit, 3 décimales)
         prix_unitaire (Decimal): Prix par unité appliqué au moment de la vente
-        prix_vente (Decimal): Montant total (quantite * prix_unitaire)
+        prix_vente (Decimal): Montant total (quantite * prix_unitaire), net des retours
         statut (str): État (en_attente, payee, annulee, paiement_partiel, rembourse)
+        montant_paye (Decimal): Somme des paiements reçus (`Paiement`)
+        reste_a_payer (Decimal): Créance restante (0 pour une vente annulée)
         entreprise (ForeignKey): Entreprise propriétaire
     
     Workflow:
-    1. Créer une vente avec un client et un produit
-    2. Le stock du produit est décrémenté automatiquement
+    1. Créer une vente avec un client et un ou plusieurs produits
+    2. Le stock des produits est décrémenté automatiquement
     3. Le prix_vente est calculé automatiquement
     4. Changer le statut au besoin (payée, annulée, etc.)
     5. En cas d'annulation, le stock est restauré
-    
-    Contrainte d'unicité:
-        - Un seul enregistrement par (client, produit, entreprise)
+    6. Un retour (`Retour`) réintègre tout ou partie des quantités ; la vente
+       entièrement retournée passe "rembourse"
     """
     STATUT_CHOICES = (
         ("en_attente", "En attente"),
@@ -310,7 +556,12 @@ class Vente(TenantModel):
 
     produit = models.ForeignKey(Produit, on_delete=models.PROTECT, null=True, blank=True)
 
-    quantite = models.IntegerField(null=True, blank=True, validators=[MinValueValidator(1)])
+    # Dépôt d'où sort la marchandise (vide : dépôt principal, ventes antérieures)
+    depot = models.ForeignKey(
+        Depot, on_delete=models.RESTRICT, null=True, blank=True, related_name="ventes"
+    )
+
+    quantite = QuantiteField(null=True, blank=True, validators=[MinValueValidator(0)])
     
     prix_unitaire = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     
@@ -320,17 +571,32 @@ class Vente(TenantModel):
 
     statut = models.CharField(max_length=20, choices=STATUT_CHOICES, db_index=True)
 
+    # Soldes tenus par `services.paiements` dans la transaction de chaque paiement
+    montant_paye = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    reste_a_payer = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
     class Meta:
         indexes = [
             models.Index(fields=["entreprise", "statut"]),
             models.Index(fields=["entreprise", "created_at"]),
             models.Index(fields=["client", "produit"]),
+            # Balance âgée : seules les ventes non soldées sont indexées.
+            models.Index(
+                fields=["entreprise", "created_at"],
+                condition=models.Q(reste_a_payer__gt=0),
+                name="vente_creance_idx",
+            ),
         ]
         
 
     def __str__(self):
         """Retourne une représentation lisible de la vente."""
-        return f"Vente {self.id} - {self.client.nom} - {self.produit.nom} ({self.quantite})"
+        if self.produit_id:
+            return (
+                f"Vente {self.id} - {self.client.nom} - "
+                f"{self.produit.nom} ({self.quantite})"
+            )
+        return f"Vente {self.id} - {self.client.nom}"
 
     def save(self, *args, **kwargs):
         """
@@ -339,5 +605,302 @@ class Vente(TenantModel):
         prix_vente = quantite * prix_unitaire
         """
         if self.quantite and self.prix_unitaire:
-            self.prix_vente = Decimal(str(self.quantite)) * self.prix_unitaire
+            self.prix_vente = calculer_montant(self.quantite, self.prix_unitaire)
         super().save(*args, **kwargs)
+
+
+class VenteLigne(TenantModel):
+    """
+    Ligne d'une vente : un produit, une quantité et un prix appliqué.
+
+    Les lignes d'une commande sont créées en une seule requête
+    (`bulk_create`) ; les agrégats analytics (CA, produits les plus
+    vendus) sont calculés sur ces lignes. Un retour diminue `quantite`
+    et `prix_vente` de la ligne (le détail reste dans `RetourLigne`).
+
+    Attributs:
+        vente (ForeignKey): Vente (commande) parente
+        produit (ForeignKey): Produit vendu (PROTECT)
+        quantite (Decimal): Quantité vendue, nette des retours (unité du produit,
+            3 décimales)
+        prix_unitaire (Decimal): Prix par unité appliqué
+        prix_vente (Decimal): Total de la ligne, net des retours
+        cout_unitaire (Decimal): Coût unitaire FIFO figé à l'écriture de la
+            ligne (valorisation du stock) ; vide pour les lignes antérieures
+    """
+
+    vente = models.ForeignKey(Vente, on_delete=models.CASCADE, related_name="lignes")
+    produit = models.ForeignKey(
+        Produit, on_delete=models.PROTECT, related_name="lignes_vente"
+    )
+    quantite = QuantiteField(validators=[MinValueValidator(0)])
+    prix_unitaire = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    prix_vente = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cout_unitaire = models.DecimalField(
+        max_digits=14, decimal_places=4, null=True, blank=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["entreprise", "created_at"]),
+            models.Index(fields=["entreprise", "produit"]),
+        ]
+
+    def __str__(self):
+        return f"{self.produit_id} x {self.quantite}"
+
+
+class Paiement(TenantModel):
+    """
+    Paiement reçu pour une vente (sous-journal des encaissements).
+
+    Une vente payée à la création ou marquée payée reçoit un paiement du
+    montant restant ; un paiement partiel laisse la vente en
+    "paiement_partiel". `Vente.montant_paye`/`reste_a_payer` et les soldes
+    du client sont mis à jour dans la même transaction.
+
+    Attributs:
+        vente (ForeignKey): Vente réglée
+        montant (Decimal): Montant encaissé (> 0) ; négatif pour un
+            remboursement (`Retour`)
+        mode (str): especes, mobile_money, banque, autre
+        reference (str): Référence de la transaction (relevé mobile money, chèque)
+        date (datetime): Date d'encaissement (trésorerie)
+    """
+
+    MODE_CHOICES = (
+        ("especes", "Espèces"),
+        ("mobile_money", "Mobile money"),
+        ("banque", "Banque"),
+        ("autre", "Autre"),
+    )
+
+    vente = models.ForeignKey(Vente, on_delete=models.CASCADE, related_name="paiements")
+    montant = models.DecimalField(max_digits=12, decimal_places=2)
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES, default="especes")
+    reference = models.CharField(max_length=100, blank=True)
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["entreprise", "date"])]
+
+    def __str__(self):
+        return f"{self.vente_id}: {self.montant} ({self.mode})"
+
+
+class Retour(TenantModel):
+    """
+    Retour de marchandise sur une vente (avoir), total ou partiel.
+
+    Les quantités retournées sont réintégrées dans le dépôt de la vente
+    (mouvements "retour" de référence la vente, valorisés au coût de la
+    vente d'origine) et déduites des lignes de la vente. Le montant
+    crédité diminue d'abord le reste à payer ; l'excédent déjà encaissé
+    est remboursé par un `Paiement` négatif.
+
+    Attributs:
+        vente (ForeignKey): Vente concernée
+        montant (Decimal): Montant crédité (somme des lignes)
+        montant_rembourse (Decimal): Part remboursée au client
+        mode (str): Mode du remboursement (`Paiement.MODE_CHOICES`)
+        motif (str): Motif du retour (optionnel)
+    """
+
+    vente = models.ForeignKey(Vente, on_delete=models.CASCADE, related_name="retours")
+    montant = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    montant_rembourse = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    mode = models.CharField(
+        max_length=20, choices=Paiement.MODE_CHOICES, default="especes"
+    )
+    motif = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["entreprise", "created_at"])]
+
+    def __str__(self):
+        return f"Retour {self.vente_id}: {self.montant}"
+
+
+class RetourLigne(TenantModel):
+    """
+    Quantité retournée d'une ligne de vente.
+
+    Attributs:
+        retour (ForeignKey): Retour parent
+        vente_ligne (ForeignKey): Ligne de vente d'origine
+        produit (ForeignKey): Produit retourné
+        quantite (Decimal): Quantité retournée (unité du produit)
+        montant (Decimal): Montant crédité pour la ligne
+    """
+
+    retour = models.ForeignKey(Retour, on_delete=models.CASCADE, related_name="lignes")
+    vente_ligne = models.ForeignKey(
+        VenteLigne, on_delete=models.CASCADE, related_name="retours"
+    )
+    produit = models.ForeignKey(
+        Produit, on_delete=models.PROTECT, related_name="lignes_retour"
+    )
+    quantite = QuantiteField(validators=[MinValueValidator(0)])
+    montant = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.produit_id} x {self.quantite}"
+
+
+class MouvementStock(TenantModel):
+    """
+    Mouvement de stock (journal append-only).
+
+    Chaque variation de `Produit.quantite` faite par le moteur de stock
+    (entrée, vente, annulation, retour, ajustement) est journalisée : la somme des
+    mouvements d'un produit est égale à son stock. Les lignes ne sont
+    jamais modifiées ; une correction est un nouveau mouvement.
+
+    Attributs:
+        produit (ForeignKey): Produit concerné
+        depot (ForeignKey): Dépôt concerné (vide : dépôt principal, mouvements
+            antérieurs)
+        type (str): entree, vente, annulation, retour, ajustement, transfert
+        quantite (Decimal): Variation signée du stock (unité du produit)
+        reference (UUID): Objet à l'origine du mouvement (Stock, Vente, transfert),
+            optionnel
+        created_at (datetime): Date du mouvement
+
+    Un transfert entre dépôts est journalisé en deux mouvements de même
+    référence (sortie du dépôt source, entrée dans le dépôt destination) :
+    le stock total du produit est inchangé.
+    """
+
+    TYPE_CHOICES = (
+        ("entree", "Entrée de stock"),
+        ("vente", "Vente"),
+        ("annulation", "Annulation de vente"),
+        ("retour", "Retour client"),
+        ("ajustement", "Ajustement"),
+        ("transfert", "Transfert entre dépôts"),
+    )
+
+    produit = models.ForeignKey(
+        Produit, on_delete=models.CASCADE, related_name="mouvements"
+    )
+    depot = models.ForeignKey(
+        Depot,
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name="mouvements",
+    )
+    type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    quantite = QuantiteField()
+    reference = models.UUIDField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["entreprise", "created_at"]),
+            models.Index(fields=["produit", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.type} {self.produit_id} {self.quantite:+}"
+
+
+class PointStock(TenantModel):
+    """
+    Point de contrôle du stock d'un produit à une date.
+
+    `quantite` est la somme des mouvements du produit jusqu'à `date`
+    incluse. Le stock à une date X se lit à partir du dernier point
+    antérieur à X, plus les seuls mouvements intermédiaires.
+
+    Attributs:
+        produit (ForeignKey): Produit concerné
+        date (datetime): Date du point
+        quantite (Decimal): Stock du produit à `date`
+    """
+
+    produit = models.ForeignKey(
+        Produit, on_delete=models.CASCADE, related_name="points_stock"
+    )
+    date = models.DateTimeField()
+    quantite = QuantiteField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["produit", "date"], name="unique_point_stock_produit_date"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.produit_id} @ {self.date:%Y-%m-%d %H:%M}: {self.quantite}"
+
+
+class Inventaire(TenantModel):
+    """
+    Session d'inventaire physique (comptage) d'un dépôt.
+
+    Les quantités comptées sont chargées en lot (`InventaireLigne`) tant que
+    la session est ouverte ; la validation compare chaque comptage au stock
+    du dépôt et passe tous les écarts en ajustements dans une seule
+    transaction (mouvements "ajustement" de référence `id`). Seuls les
+    produits comptés sont ajustés.
+
+    Attributs:
+        depot (ForeignKey): Dépôt compté
+        statut (str): ouvert, valide
+        valide_le (datetime): Date de validation (écarts figés)
+    """
+
+    STATUT_CHOICES = (
+        ("ouvert", "Ouvert"),
+        ("valide", "Validé"),
+    )
+
+    depot = models.ForeignKey(
+        Depot, on_delete=models.RESTRICT, related_name="inventaires"
+    )
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default="ouvert")
+    valide_le = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["entreprise", "created_at"])]
+
+    def __str__(self):
+        return f"Inventaire {self.depot_id} ({self.statut})"
+
+
+class InventaireLigne(TenantModel):
+    """
+    Quantité comptée d'un produit dans une session d'inventaire.
+
+    `quantite_systeme` et `ecart` (compté - système) sont figés à la
+    validation, en une seule requête ; ils restent vides tant que la
+    session est ouverte.
+
+    Attributs:
+        inventaire (ForeignKey): Session parente
+        produit (ForeignKey): Produit compté
+        quantite_comptee (Decimal): Quantité physique comptée (>= 0)
+        quantite_systeme (Decimal): Stock du dépôt au moment de la validation
+        ecart (Decimal): Ajustement passé (positif : surplus, négatif : manquant)
+    """
+
+    inventaire = models.ForeignKey(
+        Inventaire, on_delete=models.CASCADE, related_name="lignes"
+    )
+    produit = models.ForeignKey(
+        Produit, on_delete=models.CASCADE, related_name="lignes_inventaire"
+    )
+    quantite_comptee = QuantiteField(validators=[MinValueValidator(0)])
+    quantite_systeme = QuantiteField(null=True, blank=True)
+    ecart = QuantiteField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["inventaire", "produit"], name="unique_inventaire_produit"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.produit_id}: {self.quantite_comptee}"
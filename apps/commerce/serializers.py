@@ -4,10 +4,92 @@ from rest_framework import serializers
 
 from django.db import transaction
 
+from apps.core.serializers import DynamicFieldsModelSerializer, QuantiteField
 from apps.partners.models import Partner
 from apps.partners.serializers import PartnerSerializer
 
-from .models import Categorie, Produit, Vente
+from .models import (
+    CatalogueUnites,
+    Categorie,
+    Depot,
+    Inventaire,
+    MouvementStock,
+    Paiement,
+    Produit,
+    Retour,
+    RetourLigne,
+    StockDepot,
+    Vente,
+    VenteLigne,
+)
+from .services.depots import depot_principal
+from .services.mouvements import enregistrer_mouvements
+from .services.retours import RetourRefuseError, retourner_vente
+from .services.stock import StockInsuffisantError, decrement_stock, increment_stock
+from .services.ventes import (
+    STATUTS_GROUPES,
+    TRANSITIONS_STATUT,
+    changer_statut_ventes,
+    convertir_quantites,
+    creer_vente,
+    quantites_par_produit,
+)
+
+
+def valider_depot(serializer, depot):
+    """Vérifie qu'un dépôt appartient à l'entreprise de l'utilisateur."""
+    request = serializer.context.get("request")
+    if depot and request and not request.user.is_superuser:
+        if depot.entreprise_id != request.user.entreprise_id:
+            raise serializers.ValidationError("Dépôt invalide pour cette entreprise.")
+    return depot
+
+
+def resoudre_lignes(lignes, entreprise_id, cle="produit"):
+    """
+    Résout les produits des lignes d'une saisie en une seule requête.
+
+    Contrôle commun aux ventes, transferts, comptages et retours : les
+    produits doivent appartenir à l'entreprise, puis les quantités sont
+    exprimées dans l'unité de leur produit (`convertir_quantites`).
+
+    Args:
+        lignes (list): Lignes validées {<cle>: UUID, quantite, unite (optionnel)}
+        entreprise_id: Entreprise des produits (None: pas de filtre, superadmin)
+        cle (str): Clé de l'UUID du produit dans les lignes
+
+    Returns:
+        list: Lignes {produit (Produit), quantite} ; les autres clés (ex:
+            `prix_unitaire`) sont conservées
+
+    Raises:
+        serializers.ValidationError: Produit inconnu ou unité incompatible
+    """
+    produits = Produit.objects.filter(pk__in={ligne[cle] for ligne in lignes})
+    if entreprise_id is not None:
+        produits = produits.filter(entreprise_id=entreprise_id)
+    produits = produits.in_bulk()
+
+    inconnus = [str(ligne[cle]) for ligne in lignes if ligne[cle] not in produits]
+    if inconnus:
+        raise serializers.ValidationError(
+            {
+                "items": "Produit(s) invalide(s) pour cette entreprise : "
+                f"{', '.join(inconnus)}."
+            }
+        )
+
+    resolues = []
+    for ligne in lignes:
+        resolue = {champ: valeur for champ, valeur in ligne.items() if champ != cle}
+        resolue["produit"] = produits[ligne[cle]]
+        resolues.append(resolue)
+    try:
+        # Un comptage nul n'a pas d'unité à convertir.
+        convertir_quantites([ligne for ligne in resolues if ligne["quantite"]])
+    except ValueError as exc:
+        raise serializers.ValidationError({"items": str(exc)})
+    return resolues
 
 
 class CategorieSerializer(serializers.ModelSerializer):
@@ -45,7 +127,7 @@ class CategorieSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ProduitSerializer(serializers.ModelSerializer):
+class ProduitSerializer(DynamicFieldsModelSerializer):
     """
     Serializer pour la gestion des produits.
     
@@ -63,7 +145,12 @@ class ProduitSerializer(serializers.ModelSerializer):
     - `categorie`: Catégorie du produit (max 100 caractères)
     - `prix`: Prix unitaire (Decimal 10,2)
     - `mesure`: Code unité (kg, L, m, unite, paire, piece, carton, etc.)
-    - `quantite`: Quantité en stock (>= 0)
+    - `quantite`: Quantité en stock dans l'unité du produit (>= 0, 3 décimales) ;
+      une saisie directe est journalisée comme mouvement "ajustement"
+    - `seuil_reappro`: Point de commande (optionnel) ; le produit apparaît dans
+      `low-stock/` dès que `quantite <= seuil_reappro`
+    - `code_barre`, `sku`: Codes lus en caisse (optionnels, uniques par entreprise,
+      `GET /api/produits/scan/{code}/`)
     - `entreprise`: Défini automatiquement à partir du request user (lecture seule)
     - `created_at`, `updated_at`: Timestamps (lecture seule)
 
@@ -84,9 +171,13 @@ class ProduitSerializer(serializers.ModelSerializer):
         produit = serializer.save()
     ```
     """
+
+    quantite = QuantiteField(min_value=0, required=False)
+    seuil_reappro = QuantiteField(min_value=0, required=False, allow_null=True)
+
     class Meta:
         model = Produit
-        fields = "__all__"
+        exclude = ("recherche",)
         read_only_fields = ("entreprise",)
 
     def validate(self, data):
@@ -94,47 +185,195 @@ class ProduitSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La quantité ne peut pas être négative.")
         return data
 
+    def _valider_code(self, champ, value):
+        """Code vide -> NULL ; un code déjà porté par un autre produit est refusé."""
+        value = (value or "").strip() or None
+        if value is None:
+            return None
+        if self.instance:
+            entreprise_id = self.instance.entreprise_id
+        else:
+            entreprise_id = self.context["request"].user.entreprise_id
+        qs = Produit.objects.filter(entreprise_id=entreprise_id, **{champ: value})
+        if self.instance:
+            qs = qs.exclude(pk=self.instance.pk)
+        if qs.exists():
+            raise serializers.ValidationError(
+                "Un produit avec ce code existe déjà pour cette entreprise."
+            )
+        return value
+
+    def validate_code_barre(self, value):
+        return self._valider_code("code_barre", value)
+
+    def validate_sku(self, value):
+        return self._valider_code("sku", value)
+
+    @transaction.atomic
     def create(self, validated_data):
         validated_data["entreprise"] = self.context["request"].user.entreprise
-        return super().create(validated_data)
+        quantite = validated_data.pop("quantite", 0)
+        produit = super().create(validated_data)
+        self._ajuster(produit, quantite)
+        return produit
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """
+        Enregistre les seuls champs transmis : `quantite` n'est jamais réécrite.
+
+        La quantité chargée avec l'instance peut être périmée (ventes,
+        réceptions concurrentes) ; une quantité saisie directement est
+        journalisée comme ajustement par le moteur de stock.
+        """
+        quantite = validated_data.pop("quantite", None)
+        if quantite is not None:
+            actuelle = (
+                Produit.objects.select_for_update()
+                .values_list("quantite", flat=True)
+                .get(pk=instance.pk)
+            )
+        for champ, valeur in validated_data.items():
+            setattr(instance, champ, valeur)
+        champs = [*validated_data, "updated_at"]
+        if {"nom", "categorie"} & validated_data.keys():
+            champs.append("recherche")
+        instance.save(update_fields=champs)
+        if quantite is not None:
+            self._ajuster(instance, quantite - actuelle)
+        return instance
+
+    def _ajuster(self, produit, ecart):
+        """
+        Applique un écart de stock saisi au dépôt principal, par le moteur de stock.
+
+        Raises:
+            ValidationError: Si le retrait dépasse le stock du dépôt principal
+        """
+        if ecart:
+            depot_id = depot_principal(produit.entreprise_id)
+            try:
+                if ecart > 0:
+                    increment_stock(produit.pk, ecart, depot_id)
+                else:
+                    decrement_stock(produit.pk, -ecart, depot_id)
+            except StockInsuffisantError as exc:
+                raise serializers.ValidationError(
+                    {
+                        "quantite": "Le stock du dépôt principal est insuffisant "
+                        f"(disponible: {exc.disponible})."
+                    }
+                )
+            enregistrer_mouvements(
+                produit.entreprise_id,
+                "ajustement",
+                {produit.pk: ecart},
+                depot_id=depot_id,
+            )
+        produit.refresh_from_db(fields=["quantite", "updated_at"])
+
+
+class VenteLigneSerializer(serializers.ModelSerializer):
+    """
+    Serializer d'une ligne de vente.
+
+    Le produit est transmis par son UUID ; sa résolution (et le contrôle
+    tenant) est faite par `VenteSerializer` en une seule requête pour
+    toutes les lignes de la commande.
+
+    **Fields** :
+    - `produit` : UUID du produit vendu
+    - `produit_nom` : Nom du produit (lecture seule)
+    - `quantite` : Quantité vendue (> 0, décimale possible : 0.25 kg)
+    - `unite` : Unité de `quantite` (écriture seule, optionnel, défaut: unité
+      du produit) ; convertie côté serveur dans l'unité du produit
+    - `prix_unitaire` : Prix par unité du produit (optionnel, défaut: prix du produit)
+    - `prix_vente` : Total de la ligne (lecture seule)
+    """
+
+    produit = serializers.UUIDField(source="produit_id")
+    produit_nom = serializers.CharField(source="produit.nom", read_only=True)
+    quantite = QuantiteField()
+    unite = serializers.ChoiceField(
+        choices=CatalogueUnites.get_choices(), write_only=True, required=False
+    )
+    prix_unitaire = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
 
+    class Meta:
+        model = VenteLigne
+        fields = (
+            "id",
+            "produit",
+            "produit_nom",
+            "quantite",
+            "unite",
+            "prix_unitaire",
+            "prix_vente",
+        )
+        read_only_fields = ("id", "prix_vente")
+
+    def validate_quantite(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("La quantité doit être positive.")
+        return value
 
-class VenteSerializer(serializers.ModelSerializer):
+
+class VenteSerializer(DynamicFieldsModelSerializer):
     """
-    Serializer pour gérer les ventes (une vente = un client + un produit).
+    Serializer pour gérer les ventes (une vente = un client + une ou plusieurs lignes).
 
     **Workflow** :
-    1. Création : une Vente unique par combinaison (client, produit, entreprise)
-    2. Gestion du stock : Produit.quantite décrémentée automatiquement
-    3. Calcul du total : prix_vente = quantite * prix_unitaire (auto-calculé)
-    4. Changement de statut : en attente, payée, annulée, paiement partiel, remboursée
+    1. Création : soit `produit`/`quantite` (vente mono-produit), soit `items[]`
+    2. Gestion du stock : stock du dépôt et Produit.quantite décrémentés
+       automatiquement (un UPDATE groupé pour toutes les lignes)
+    3. Calcul du total : prix_vente = somme des lignes (auto-calculé)
+    4. Changement de statut : en attente, payée, annulée, paiement partiel, remboursée ;
+       le passage à "payee" règle le reste à payer, le passage à "annulee"
+       restaure le stock et annule la créance, le passage à "rembourse"
+       retourne toute la vente (`POST /api/ventes/{id}/retours/`)
 
     **Fields** :
     - `id` : UUID unique (lecture seule)
-    - `client` : UUID du partenaire de type "client"
-    - `produit` : UUID du produit vendu
-    - `quantite` : Quantité vendue (>= 1)
-    - `prix_unitaire` : Prix par unité appliqué
-    - `statut` : En attente, Payée, Annulée, Paiement partiel, Remboursée
-    - `prix_vente` : Total calculé (quantite * prix_unitaire, lecture seule)
+    - `client` : UUID du partenaire de type "client" (non modifiable)
+    - `depot` : UUID du dépôt d'où sort la marchandise (optionnel, défaut:
+      dépôt principal ; non modifiable)
+    - `produit` : UUID du produit vendu (vente mono-produit, non modifiable)
+    - `client_detail`, `produit_detail` : objets liés (lecture seule,
+      uniquement avec `?expand=client` / `?expand=produit`)
+    - `quantite` : Quantité vendue (> 0, vente mono-produit, non modifiable)
+    - `unite` : Unité de `quantite` (écriture seule, optionnel, vente mono-produit)
+    - `prix_unitaire` : Prix par unité appliqué (vente mono-produit, défaut: prix
+      du produit, non modifiable)
+    - `items` : Lignes de la vente (`produit`, `quantite`, `unite`, `prix_unitaire`)
+    - `statut` : En attente, Payée, Annulée, Paiement partiel, Remboursée ;
+      seul champ modifiable, selon `TRANSITIONS_STATUT` (une vente annulée
+      ou remboursée ne change plus de statut)
+    - `prix_vente` : Total calculé (somme des lignes, net des retours, lecture seule)
+    - `montant_paye`, `reste_a_payer` : Soldes de la vente (lecture seule,
+      tenus par les paiements `POST /api/ventes/{id}/paiements/`)
     - `entreprise` : Lien vers l'entreprise (lecture seule, défini automatiquement)
     - `created_at` : Timestamp de création (lecture seule)
 
     **Validations** :
-    - Quantité > 0
+    - Quantité > 0, convertie dans l'unité du produit (3 décimales au plus)
     - Prix unitaire >= 0
     - Vérification du stock disponible
-    - Vérification de compatibilité tenant (produit appartient à l'entreprise)
-    - Une seule vente par combinaison (client, produit, entreprise)
+    - Vérification de compatibilité tenant (produits appartenant à l'entreprise,
+      résolus en une seule requête)
 
     **Exemple de création** :
     ```json
     {
       "client": "550e8400-e29b-41d4-a716-446655440000",
-      "produit": "650e8400-e29b-41d4-a716-446655440001",
-      "quantite": 5,
-      "prix_unitaire": "10.50",
-      "statut": "payee"
+      "statut": "payee",
+      "items": [
+        {"produit": "650e8400-e29b-41d4-a716-446655440001", "quantite": 5,
+         "prix_unitaire": "10.50"},
+        {"produit": "650e8400-e29b-41d4-a716-446655440002", "quantite": 250,
+         "unite": "g"}
+      ]
     }
     ```
 
@@ -143,80 +382,592 @@ class VenteSerializer(serializers.ModelSerializer):
     {
       "id": "750e8400-e29b-41d4-a716-446655440000",
       "client": "550e8400-e29b-41d4-a716-446655440000",
-      "produit": "650e8400-e29b-41d4-a716-446655440001",
-      "quantite": 5,
-      "prix_unitaire": "10.50",
-      "prix_vente": "52.50",
+      "produit": null,
+      "quantite": null,
+      "prix_unitaire": "0.00",
+      "prix_vente": "60.50",
+      "items": [...],
       "statut": "payee",
       "created_at": "2026-01-09T10:30:00Z"
+    }
+    ```
     """
 
-    client = serializers.PrimaryKeyRelatedField(queryset=Partner.objects.filter(type="client"), write_only=True)
-    produit = serializers.PrimaryKeyRelatedField(queryset=Produit.objects.all(), write_only=True)
+    client = serializers.PrimaryKeyRelatedField(
+        queryset=Partner.objects.filter(type="client")
+    )
+    produit = serializers.PrimaryKeyRelatedField(
+        queryset=Produit.objects.all(), required=False, allow_null=True
+    )
 
     client_detail = PartnerSerializer(source="client", read_only=True)
     produit_detail = ProduitSerializer(source="produit", read_only=True)
 
+    quantite = QuantiteField(required=False, allow_null=True)
+    unite = serializers.ChoiceField(
+        choices=CatalogueUnites.get_choices(), write_only=True, required=False
+    )
+
+    items = VenteLigneSerializer(source="lignes", many=True, required=False)
+
     class Meta:
         model = Vente
         fields = (
             "id",
             "client",
+            "depot",
             "produit",
             "client_detail",
             "produit_detail",
             "quantite",
+            "unite",
             "prix_unitaire",
             "prix_vente",
+            "items",
             "statut",
+            "montant_paye",
+            "reste_a_payer",
             "created_at",
         )
-        read_only_fields = ("entreprise", "prix_vente", "created_at", "id")
+        read_only_fields = (
+            "entreprise",
+            "prix_vente",
+            "montant_paye",
+            "reste_a_payer",
+            "created_at",
+            "id",
+        )
+        expandable_fields = {"client": "client_detail", "produit": "produit_detail"}
 
     def validate(self, data):
         """Valide les données de la vente."""
-        if data.get("quantite", 0) <= 0:
-            raise serializers.ValidationError("La quantité doit être positive.")
-        
         if data.get("prix_unitaire") is not None and data["prix_unitaire"] < 0:
             raise serializers.ValidationError("Le prix unitaire ne peut pas être négatif.")
-        
+
+        if self.instance is not None:
+            if "lignes" in data or "unite" in data:
+                raise serializers.ValidationError(
+                    {"items": "Les lignes d'une vente ne sont pas modifiables."}
+                )
+            if "depot" in data:
+                raise serializers.ValidationError(
+                    {"depot": "Le dépôt d'une vente n'est pas modifiable."}
+                )
+            # Soldes, stock et agrégats sont tenus à la création : seul le
+            # statut change ensuite.
+            figes = [
+                champ
+                for champ in ("client", "produit", "quantite", "prix_unitaire")
+                if champ in data
+            ]
+            if figes:
+                raise serializers.ValidationError(
+                    {
+                        champ: "Non modifiable après la création de la vente."
+                        for champ in figes
+                    }
+                )
+            return data
+
+        if data.get("lignes"):
+            if data.get("produit") or data.get("quantite") or data.get("unite"):
+                raise serializers.ValidationError(
+                    "Fournir soit `items`, soit `produit`/`quantite`, pas les deux."
+                )
+            data["lignes"] = self._resolve_lignes(data["lignes"])
+            return data
+
+        if not data.get("produit"):
+            raise serializers.ValidationError({"produit": "Ce champ est obligatoire."})
+        if (data.get("quantite") or 0) <= 0:
+            raise serializers.ValidationError("La quantité doit être positive.")
+        produit = data.pop("produit")
+        prix = data.pop("prix_unitaire", None)
+        data["lignes"] = self._convertir(
+            [
+                {
+                    "produit": produit,
+                    "quantite": data.pop("quantite"),
+                    "unite": data.pop("unite", None),
+                    "prix_unitaire": produit.prix if prix is None else prix,
+                }
+            ]
+        )
         return data
 
+    def _convertir(self, lignes):
+        """Convertit les quantités dans l'unité des produits (un seul appel)."""
+        try:
+            convertir_quantites(lignes)
+        except ValueError as exc:
+            raise serializers.ValidationError({"items": str(exc)})
+        return lignes
+
+    def _resolve_lignes(self, lignes):
+        """Résout les lignes (`resoudre_lignes`) ; prix par défaut du produit."""
+        request = self.context.get("request")
+        entreprise_id = (
+            request.user.entreprise_id
+            if request and not request.user.is_superuser
+            else None
+        )
+        lignes = resoudre_lignes(lignes, entreprise_id, cle="produit_id")
+        for ligne in lignes:
+            if ligne.get("prix_unitaire") is None:
+                ligne["prix_unitaire"] = ligne["produit"].prix
+        return lignes
+
     def validate_produit(self, value):
         """Valide que le produit appartient à la bonne entreprise."""
         request = self.context.get("request")
         if request and not request.user.is_superuser:
-            if value.entreprise != request.user.entreprise:
+            if value.entreprise_id != request.user.entreprise_id:
                 raise serializers.ValidationError("Produit invalide pour cette entreprise.")
         return value
 
+    def validate_depot(self, value):
+        """Valide que le dépôt appartient à la bonne entreprise."""
+        return valider_depot(self, value)
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """
+        Change le statut de la vente, seul champ modifiable (`validate`).
+
+        La transition doit figurer dans `TRANSITIONS_STATUT`. Un passage à
+        "payee" ou "annulee" suit `changer_statut_ventes`, un passage à
+        "rembourse" est un retour total (`retourner_vente`) : soldes et
+        stock suivent le statut.
+        """
+        statut = validated_data.get("statut", instance.statut)
+        if statut == instance.statut:
+            return instance
+        if instance.statut not in TRANSITIONS_STATUT.get(statut, ()):
+            raise serializers.ValidationError(
+                {"statut": f"Transition {instance.statut} -> {statut} non autorisée."}
+            )
+        if statut == "rembourse":
+            try:
+                retourner_vente(instance.pk)
+            except RetourRefuseError as exc:
+                raise serializers.ValidationError({"statut": str(exc)})
+        else:
+            resultat = changer_statut_ventes(
+                instance.entreprise, [instance.pk], statut
+            )[0]
+            if resultat["resultat"] == "rejetee":
+                raise serializers.ValidationError({"statut": resultat["erreurs"]})
+        instance.refresh_from_db()
+        return instance
+
     def create(self, validated_data):
         request = self.context.get("request")
-        produit = validated_data.get("produit")
-        quantite = validated_data.get("quantite")
+        lignes = validated_data.pop("lignes")
+
+        # Supprimer 'entreprise' de validated_data s'il existe déjà
+        validated_data.pop("entreprise", None)
+
+        try:
+            return creer_vente(
+                entreprise=request.user.entreprise, lignes=lignes, **validated_data
+            )
+        except StockInsuffisantError as exc:
+            produit = next(
+                ligne["produit"]
+                for ligne in lignes
+                if ligne["produit"].pk == exc.produit_id
+            )
+            raise serializers.ValidationError(
+                f"Produit {produit.nom} en rupture (disponible: {exc.disponible})."
+            )
+
+
+class VenteStatutBulkSerializer(serializers.Serializer):
+    """
+    Changement de statut d'un lot de ventes (`PATCH /api/ventes/bulk-status/`).
+
+    **Fields** :
+    - `ids` : UUID des ventes
+    - `statut` : Statut cible, `payee` ou `annulee`
+    """
+
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+    statut = serializers.ChoiceField(choices=list(STATUTS_GROUPES))
+
+
+class VenteBulkSerializer(serializers.Serializer):
+    """
+    Serializer d'une vente dans un lot de synchronisation (`POST /api/ventes/bulk/`).
+
+    Aucune requête n'est faite ici : les clients et produits sont résolus
+    pour tout le lot par `importer_ventes`.
+
+    **Fields** :
+    - `id` : UUID généré par le POS (optionnel, rend le rejeu idempotent)
+    - `client` : UUID du client
+    - `statut` : Statut de la vente
+    - `depot` : UUID du dépôt (optionnel, défaut: dépôt principal)
+    - `produit`, `quantite`, `unite`, `prix_unitaire` : vente mono-produit
+    - `items` : lignes de la vente (`produit`, `quantite`, `unite`, `prix_unitaire`)
+    """
+
+    id = serializers.UUIDField(required=False)
+    client = serializers.UUIDField()
+    statut = serializers.ChoiceField(choices=Vente.STATUT_CHOICES)
+    depot = serializers.UUIDField(required=False)
+    produit = serializers.UUIDField(required=False)
+    quantite = QuantiteField(required=False)
+    unite = serializers.ChoiceField(
+        choices=CatalogueUnites.get_choices(), required=False
+    )
+    prix_unitaire = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    items = VenteLigneSerializer(many=True, required=False)
+
+    def validate(self, data):
+        items = data.pop("items", None)
+        produit = data.pop("produit", None)
+        quantite = data.pop("quantite", None)
+        unite = data.pop("unite", None)
+        prix_unitaire = data.pop("prix_unitaire", None)
+
+        if items:
+            if produit or quantite:
+                raise serializers.ValidationError(
+                    "Fournir soit `items`, soit `produit`/`quantite`, pas les deux."
+                )
+            data["lignes"] = items
+        elif produit and quantite:
+            if quantite <= 0:
+                raise serializers.ValidationError("La quantité doit être positive.")
+            data["lignes"] = [
+                {
+                    "produit_id": produit,
+                    "quantite": quantite,
+                    "unite": unite,
+                    "prix_unitaire": prix_unitaire,
+                }
+            ]
+        else:
+            raise serializers.ValidationError(
+                "Fournir `items` ou `produit` et `quantite`."
+            )
+        return data
+
+
+class MouvementStockSerializer(serializers.ModelSerializer):
+    """
+    Serializer (lecture seule) d'un mouvement de stock.
+
+    **Fields** :
+    - `type` : entree, vente, annulation, ajustement, transfert
+    - `depot` : UUID du dépôt concerné (vide : dépôt principal, mouvements antérieurs)
+    - `quantite` : Variation signée du stock (unité du produit)
+    - `reference` : UUID de l'entrée de stock, de la vente ou du transfert d'origine
+    - `created_at` : Date du mouvement
+    """
+
+    quantite = QuantiteField(read_only=True)
+
+    class Meta:
+        model = MouvementStock
+        fields = (
+            "id",
+            "produit",
+            "depot",
+            "type",
+            "quantite",
+            "reference",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
+class StockADateSerializer(serializers.ModelSerializer):
+    """
+    Stock d'un produit à une date (`GET /api/produits/stock-a-date/?date=`).
+
+    **Fields** :
+    - `quantite` : Stock à la date demandée (unité du produit)
+    """
+
+    quantite = QuantiteField(source="quantite_a_date", read_only=True)
+
+    class Meta:
+        model = Produit
+        fields = ("id", "nom", "mesure", "quantite")
+        read_only_fields = fields
+
+
+class DepotSerializer(serializers.ModelSerializer):
+    """
+    Serializer d'un dépôt (emplacement de stock).
+
+    **Fields** :
+    - `id` : UUID unique (lecture seule)
+    - `nom` : Nom du dépôt (unique par entreprise, max 100 caractères)
+    - `principal` : Dépôt par défaut de l'entreprise (lecture seule, créé
+      automatiquement)
+    - `entreprise` : Défini automatiquement (lecture seule)
+    - `created_at`, `updated_at` : Timestamps (lecture seule)
+    """
+
+    class Meta:
+        model = Depot
+        fields = ("id", "nom", "principal", "entreprise", "created_at", "updated_at")
+        read_only_fields = ("principal", "entreprise")
+
+    def validate_nom(self, value):
+        request = self.context.get("request")
+        entreprise = getattr(request.user, "entreprise", None) if request else None
 
-        # Vérifier le stock
-        if produit.quantite < quantite:
+        qs = Depot.objects.filter(entreprise=entreprise, nom__iexact=value)
+        if self.instance:
+            qs = qs.exclude(pk=self.instance.pk)
+        if qs.exists():
             raise serializers.ValidationError(
-                f"Produit {produit.nom} en rupture (disponible: {produit.quantite})."
+                "Un dépôt avec ce nom existe déjà pour cette entreprise."
             )
+        return value
+
+
+class StockDepotSerializer(serializers.ModelSerializer):
+    """
+    Stock d'un produit dans un dépôt (`GET /api/depots/{id}/stock/`).
+
+    **Fields** :
+    - `produit` : UUID du produit
+    - `produit_nom` : Nom du produit
+    - `quantite` : Quantité disponible dans le dépôt (unité du produit)
+    """
+
+    produit_nom = serializers.CharField(source="produit.nom", read_only=True)
+    quantite = QuantiteField(read_only=True)
+
+    class Meta:
+        model = StockDepot
+        fields = ("produit", "produit_nom", "quantite", "updated_at")
+        read_only_fields = fields
 
-        with transaction.atomic():
-            # Décrémenter le stock
-            produit.quantite -= quantite
-            produit.save()
 
-            # Supprimer 'entreprise' de validated_data s'il existe déjà
-            validated_data.pop('entreprise', None)
+class TransfertLigneSerializer(serializers.Serializer):
+    """Ligne d'un transfert : produit et quantité (unité du produit ou `unite`)."""
 
-            # Créer la vente avec l'entreprise
-            vente = Vente.objects.create(
-                entreprise=request.user.entreprise,
-                **validated_data
+    produit = serializers.UUIDField()
+    quantite = QuantiteField()
+    unite = serializers.ChoiceField(
+        choices=CatalogueUnites.get_choices(), required=False
+    )
+
+    def validate_quantite(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("La quantité doit être positive.")
+        return value
+
+
+class TransfertSerializer(serializers.Serializer):
+    """
+    Transfert de stock entre deux dépôts (`POST /api/depots/transferts/`).
+
+    **Fields** :
+    - `source` : UUID du dépôt d'origine
+    - `destination` : UUID du dépôt de destination
+    - `items` : Lignes `{produit, quantite, unite (optionnel)}`
+    """
+
+    source = serializers.PrimaryKeyRelatedField(queryset=Depot.objects.all())
+    destination = serializers.PrimaryKeyRelatedField(queryset=Depot.objects.all())
+    items = TransfertLigneSerializer(many=True, allow_empty=False)
+
+    def validate_source(self, value):
+        return valider_depot(self, value)
+
+    def validate_destination(self, value):
+        return valider_depot(self, value)
+
+    def validate(self, data):
+        if data["source"] == data["destination"]:
+            raise serializers.ValidationError(
+                {"destination": "La destination doit différer de la source."}
             )
+        if data["source"].entreprise_id != data["destination"].entreprise_id:
+            raise serializers.ValidationError(
+                {
+                    "destination": "Les deux dépôts doivent appartenir "
+                    "à la même entreprise."
+                }
+            )
+        lignes = resoudre_lignes(data["items"], data["source"].entreprise_id)
+        data["quantites"] = quantites_par_produit(lignes)
+        return data
 
-        return vente
 
+class InventaireSerializer(serializers.ModelSerializer):
+    """
+    Session d'inventaire physique (`/api/inventaires/`).
+
+    **Fields** :
+    - `id` : UUID unique (lecture seule)
+    - `depot` : Dépôt compté (optionnel à la création, défaut : dépôt
+      principal ; non modifiable ensuite)
+    - `statut` : ouvert, valide (lecture seule)
+    - `valide_le` : Date de validation (lecture seule)
+    - `entreprise`, `created_at`, `updated_at` : lecture seule
+    """
 
+    depot = serializers.PrimaryKeyRelatedField(
+        queryset=Depot.objects.all(), required=False
+    )
 
+    class Meta:
+        model = Inventaire
+        fields = (
+            "id",
+            "depot",
+            "statut",
+            "valide_le",
+            "entreprise",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = ("statut", "valide_le", "entreprise")
+
+    def validate_depot(self, value):
+        if self.instance and value != self.instance.depot:
+            raise serializers.ValidationError(
+                "Le dépôt d'un inventaire ne peut pas être modifié."
+            )
+        return valider_depot(self, value)
+
+    def create(self, validated_data):
+        if not validated_data.get("depot"):
+            validated_data["depot_id"] = depot_principal(
+                validated_data["entreprise"].pk
+            )
+        return super().create(validated_data)
+
+
+class ComptageLigneSerializer(serializers.Serializer):
+    """Quantité comptée d'un produit (unité du produit ou `unite`)."""
+
+    produit = serializers.UUIDField()
+    quantite = QuantiteField(min_value=0)
+    unite = serializers.ChoiceField(
+        choices=CatalogueUnites.get_choices(), required=False
+    )
+
+
+class ComptageSerializer(serializers.Serializer):
+    """
+    Lot de comptages d'une session (`POST /api/inventaires/{id}/comptages/`).
+
+    **Fields** :
+    - `items` : Lignes `{produit, quantite, unite (optionnel)}` ; un
+      produit présent plusieurs fois (plusieurs emplacements) est additionné
+
+    Le contexte doit fournir l'`inventaire` : les produits sont résolus en
+    une requête, dans son entreprise. Sortie : `quantites` {produit_id: quantite}.
+    """
+
+    items = ComptageLigneSerializer(many=True, allow_empty=False)
+
+    def validate(self, data):
+        lignes = resoudre_lignes(
+            data["items"], self.context["inventaire"].entreprise_id
+        )
+        data["quantites"] = quantites_par_produit(lignes)
+        return data
+
+
+class PaiementSerializer(serializers.ModelSerializer):
+    """
+    Paiement reçu pour une vente (`/api/ventes/{id}/paiements/`).
+
+    **Fields** :
+    - `id` : UUID unique (lecture seule)
+    - `vente` : UUID de la vente (lecture seule, celle de l'URL)
+    - `montant` : Montant encaissé (> 0, au plus le reste à payer)
+    - `mode` : especes (défaut), mobile_money, banque, autre
+    - `reference` : Référence de la transaction (optionnel)
+    - `date` : Date d'encaissement (optionnel, défaut: maintenant)
+    """
+
+    montant = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal("0.01")
+    )
+
+    class Meta:
+        model = Paiement
+        fields = ("id", "vente", "montant", "mode", "reference", "date", "created_at")
+        read_only_fields = ("id", "vente", "created_at")
+
+
+class RetourLigneSerializer(serializers.ModelSerializer):
+    """Quantité retournée d'une ligne de vente et montant crédité (lecture seule)."""
+
+    quantite = QuantiteField()
+
+    class Meta:
+        model = RetourLigne
+        fields = ("produit", "vente_ligne", "quantite", "montant")
+        read_only_fields = fields
+
+
+class RetourArticleSerializer(serializers.Serializer):
+    """Quantité retournée d'un produit (unité du produit ou `unite`)."""
+
+    produit = serializers.UUIDField()
+    quantite = QuantiteField(min_value=Decimal("0.001"))
+    unite = serializers.ChoiceField(
+        choices=CatalogueUnites.get_choices(), required=False
+    )
+
+
+class RetourSerializer(serializers.ModelSerializer):
+    """
+    Retour sur une vente (`/api/ventes/{id}/retours/`).
+
+    **Fields** :
+    - `id` : UUID unique (lecture seule)
+    - `vente` : UUID de la vente (lecture seule, celle de l'URL)
+    - `items` : Produits retournés `{produit, quantite, unite (optionnel)}`
+      (écriture) ; absent, toute la vente est retournée
+    - `mode` : Mode du remboursement (especes par défaut)
+    - `motif` : Motif du retour (optionnel)
+    - `montant` : Montant crédité (lecture seule)
+    - `montant_rembourse` : Part remboursée au client (lecture seule)
+    - `lignes` : Détail par ligne de vente (lecture seule)
+
+    Le contexte doit fournir la `vente` : les produits sont résolus en une
+    requête, dans son entreprise. Sortie : `quantites` {produit_id: quantite}
+    ou None (retour total).
+    """
+
+    items = RetourArticleSerializer(
+        many=True, required=False, allow_empty=False, write_only=True
+    )
+    lignes = RetourLigneSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Retour
+        fields = (
+            "id",
+            "vente",
+            "items",
+            "mode",
+            "motif",
+            "montant",
+            "montant_rembourse",
+            "lignes",
+            "created_at",
+        )
+        read_only_fields = ("id", "vente", "montant", "montant_rembourse", "created_at")
+
+    def validate(self, data):
+        if "items" not in data:
+            data["quantites"] = None
+            return data
+        lignes = resoudre_lignes(data.pop("items"), self.context["vente"].entreprise_id)
+        data["quantites"] = quantites_par_produit(lignes)
+        return data
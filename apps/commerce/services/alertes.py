@@ -0,0 +1,185 @@
+"""
+Alertes de stock bas et de couverture.
+
+Deux critères, évalués en une requête groupée par entreprise :
+
+- seuil : `quantite <= seuil_reappro` (point de commande du produit,
+  index partiel `produit_stock_bas_idx`) ;
+- couverture : stock restant inférieur à `COUVERTURE_MIN_JOURS` jours de
+  ventes, la vitesse étant la moyenne des ventes nettes (annulations et
+  retours déduits) des `FENETRE_JOURS` derniers jours, lue dans `MouvementStock`
+  (index `(produit, created_at)`).
+
+La tâche quotidienne envoie un seul récapitulatif par entreprise.
+"""
+
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db.models import (
+    BigIntegerField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.commerce.models import MouvementStock, Produit
+from apps.core.constants import UserRole
+from apps.core.fields import QuantiteField
+
+logger = logging.getLogger(__name__)
+
+FENETRE_JOURS = 30
+COUVERTURE_MIN_JOURS = 7
+
+# Rôles destinataires du récapitulatif (voir `IsSales`).
+ROLES_ALERTE = (UserRole.ADMIN, UserRole.VENTES)
+
+
+def filtre_stock_bas():
+    """Condition "stock bas" (seuil atteint), couverte par l'index partiel."""
+    return Q(quantite__lte=F("seuil_reappro"))
+
+
+def produits_a_reapprovisionner(entreprise_id, maintenant=None):
+    """
+    Produits d'une entreprise sous leur seuil ou à faible couverture.
+
+    Une seule requête : ventes nettes de la fenêtre par sous-requête
+    corrélée, comparaison stock/ventes faite en SQL sur les quantités
+    entières (millièmes), si bien que seuls les produits en alerte sont lus.
+
+    Args:
+        entreprise_id: Entreprise concernée
+        maintenant (datetime): Fin de la fenêtre de ventes (défaut: maintenant)
+
+    Returns:
+        list[dict]: {id, nom, quantite, seuil_reappro, ventes_jour,
+        jours_couverture} triés par couverture croissante ;
+        `jours_couverture` vaut None sans ventes récentes
+    """
+    maintenant = maintenant or timezone.now()
+    ventes = (
+        MouvementStock.objects.filter(
+            produit=OuterRef("pk"),
+            type__in=("vente", "annulation", "retour"),
+            created_at__gt=maintenant - timedelta(days=FENETRE_JOURS),
+            created_at__lte=maintenant,
+        )
+        .values("produit")
+        .annotate(total=Sum("quantite"))
+        .values("total")
+    )
+    zero = Value(0, output_field=QuantiteField())
+    # Ventes nettes négatives : couverture faible si
+    # quantite * FENETRE < -ventes * COUVERTURE_MIN (entiers SQL).
+    manque = ExpressionWrapper(
+        -F("vendu") * COUVERTURE_MIN_JOURS - F("quantite") * FENETRE_JOURS,
+        output_field=BigIntegerField(),
+    )
+    produits = (
+        Produit.objects.filter(entreprise_id=entreprise_id)
+        .annotate(vendu=Coalesce(Subquery(ventes), zero))
+        .alias(manque=manque)
+        .filter(filtre_stock_bas() | Q(manque__gt=0))
+        .values_list("pk", "nom", "quantite", "seuil_reappro", "vendu")
+    )
+
+    alertes = []
+    for pk, nom, quantite, seuil, vendu in produits:
+        par_jour = max(-vendu, Decimal(0)) / FENETRE_JOURS
+        alertes.append(
+            {
+                "id": pk,
+                "nom": nom,
+                "quantite": quantite,
+                "seuil_reappro": seuil,
+                "ventes_jour": par_jour.quantize(Decimal("0.001")),
+                "jours_couverture": (quantite / par_jour).quantize(Decimal("0.1"))
+                if par_jour
+                else None,
+            }
+        )
+    alertes.sort(
+        key=lambda a: (
+            a["jours_couverture"] is None,
+            a["jours_couverture"] or 0,
+            a["nom"],
+        )
+    )
+    return alertes
+
+
+def notifier_stocks_bas(maintenant=None):
+    """
+    Envoie à chaque entreprise concernée un récapitulatif de ses produits en alerte.
+
+    Une requête groupée par entreprise, une requête pour tous les
+    destinataires et un seul envoi (`send_mass_mail`, une connexion SMTP).
+
+    Args:
+        maintenant (datetime): Fin de la fenêtre de ventes (défaut: maintenant)
+
+    Returns:
+        dict: {"entreprises": int, "produits": int} notifiés
+    """
+    destinataires = {}
+    for entreprise_id, email in User.objects.filter(
+        entreprise__isnull=False,
+        is_active=True,
+        status="actif",
+        role__nom__in=ROLES_ALERTE,
+    ).values_list("entreprise_id", "email"):
+        destinataires.setdefault(entreprise_id, []).append(email)
+
+    messages, produits = [], 0
+    for entreprise_id, emails in destinataires.items():
+        alertes = produits_a_reapprovisionner(entreprise_id, maintenant)
+        if not alertes:
+            continue
+        produits += len(alertes)
+        messages.append(
+            (
+                f"Stock bas : {len(alertes)} produit(s) à réapprovisionner",
+                _recapitulatif(alertes),
+                settings.DEFAULT_FROM_EMAIL,
+                emails,
+            )
+        )
+
+    if messages:
+        send_mass_mail(messages, fail_silently=False)
+    logger.info(f"Alertes stock: {len(messages)} entreprises, {produits} produits.")
+    return {"entreprises": len(messages), "produits": produits}
+
+
+def _recapitulatif(alertes):
+    lignes = [
+        f"Produits sous leur seuil ou couverts moins de {COUVERTURE_MIN_JOURS} jours "
+        f"(ventes des {FENETRE_JOURS} derniers jours) :",
+        "",
+    ]
+    for alerte in alertes:
+        couverture = (
+            f"{alerte['jours_couverture']} j"
+            if alerte["jours_couverture"] is not None
+            else "pas de vente récente"
+        )
+        seuil = (
+            f", seuil {alerte['seuil_reappro'].normalize():f}"
+            if alerte["seuil_reappro"] is not None
+            else ""
+        )
+        quantite = f"{alerte['quantite'].normalize():f}"
+        lignes.append(f"- {alerte['nom']} : stock {quantite}{seuil}, {couverture}")
+    return "\n".join(lignes)
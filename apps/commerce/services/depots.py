@@ -0,0 +1,77 @@
+"""
+Dépôts (emplacements de stock) et transferts entre dépôts.
+
+Le stock d'un produit est tenu par dépôt (`StockDepot`) ; `Produit.quantite`
+reste le stock total. Les opérations qui ne précisent pas de dépôt
+visent le dépôt principal de l'entreprise (`depot_principal`).
+"""
+
+import uuid
+
+from django.db import transaction
+
+from apps.commerce.models import Depot
+from apps.commerce.services.mouvements import construire_mouvements, journaliser
+from apps.commerce.services.stock import transferer_stock_bulk
+
+NOM_DEPOT_PRINCIPAL = "Principal"
+
+
+def depot_principal(entreprise_id):
+    """
+    Dépôt principal d'une entreprise, créé au besoin.
+
+    Args:
+        entreprise_id: Entreprise concernée
+
+    Returns:
+        UUID: Identifiant du dépôt principal
+    """
+    depot, _ = Depot.objects.get_or_create(
+        entreprise_id=entreprise_id,
+        principal=True,
+        defaults={"nom": NOM_DEPOT_PRINCIPAL},
+    )
+    return depot.pk
+
+
+def transferer(entreprise_id, source_id, destination_id, quantites):
+    """
+    Transfère des produits d'un dépôt à un autre et journalise le transfert.
+
+    Deux mouvements "transfert" par produit, de même référence (sortie de
+    la source, entrée dans la destination). Le stock total et la
+    valorisation sont inchangés.
+
+    Args:
+        entreprise_id: Entreprise propriétaire
+        source_id: UUID du dépôt d'origine
+        destination_id: UUID du dépôt de destination
+        quantites (dict): {produit_id: quantite > 0}
+
+    Returns:
+        UUID: Référence du transfert (`MouvementStock.reference`)
+
+    Raises:
+        StockInsuffisantError: Si la source n'a pas la quantité (rien n'est écrit)
+    """
+    reference = uuid.uuid4()
+    with transaction.atomic():
+        transferer_stock_bulk(quantites, source_id, destination_id)
+        journaliser(
+            construire_mouvements(
+                entreprise_id,
+                "transfert",
+                {pk: -q for pk, q in quantites.items()},
+                reference,
+                depot_id=source_id,
+            )
+            + construire_mouvements(
+                entreprise_id,
+                "transfert",
+                quantites,
+                reference,
+                depot_id=destination_id,
+            )
+        )
+    return reference
@@ -0,0 +1,222 @@
+"""
+Inventaires physiques : comptages en lot, écarts et ajustements.
+
+Une session (`Inventaire`) vise un dépôt. Les quantités comptées y sont
+chargées en lot (JSON ou CSV), chaque chargement remplaçant le comptage
+des produits qu'il contient. La validation :
+
+- verrouille le stock du dépôt des produits comptés ;
+- fige stock système et écart de toutes les lignes en un seul UPDATE
+  (sous-requête corrélée sur `StockDepot`) ;
+- applique les écarts par le moteur de stock (deux UPDATE groupés) et
+  les journalise en mouvements "ajustement" de référence la session.
+
+Le rapport d'écarts se lit ensuite dans les lignes de la session.
+"""
+
+import csv
+import io
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.commerce.models import Inventaire, InventaireLigne, StockDepot
+from apps.commerce.services.mouvements import enregistrer_mouvements
+from apps.commerce.services.stock import decrement_stock_bulk, increment_stock_bulk
+from apps.core.fields import QuantiteField
+
+# Colonnes reconnues d'un fichier de comptage (`unite` optionnelle).
+COLONNES_CSV = ("produit", "quantite", "unite")
+
+
+def lire_comptages_csv(fichier):
+    """
+    Lit un fichier de comptage CSV (colonnes `produit`, `quantite`, `unite`).
+
+    Le séparateur (`,`, `;` ou tabulation) est détecté ; avec `;` ou une
+    tabulation, la virgule décimale est acceptée ("2,5").
+
+    Args:
+        fichier: Fichier téléversé ou texte (UTF-8, BOM toléré)
+
+    Returns:
+        list[dict]: Lignes {produit, quantite, unite (si renseignée)}
+
+    Raises:
+        ValueError: En-tête sans colonnes `produit` et `quantite`
+    """
+    texte = fichier if isinstance(fichier, str) else fichier.read()
+    if isinstance(texte, bytes):
+        texte = texte.decode("utf-8-sig")
+    texte = texte.lstrip("\ufeff")
+    try:
+        dialecte = csv.Sniffer().sniff(texte.split("\n", 1)[0], delimiters=",;\t")
+    except csv.Error:
+        dialecte = csv.excel
+    lecteur = csv.DictReader(io.StringIO(texte), dialect=dialecte)
+    colonnes = {(nom or "").strip().lower() for nom in lecteur.fieldnames or ()}
+    if not {"produit", "quantite"} <= colonnes:
+        raise ValueError("Colonnes attendues : produit, quantite (unite optionnelle).")
+
+    lignes = []
+    for ligne in lecteur:
+        ligne = {
+            (cle or "").strip().lower(): (valeur or "").strip()
+            for cle, valeur in ligne.items()
+        }
+        if not any(ligne.get(colonne) for colonne in COLONNES_CSV):
+            continue
+        quantite = ligne.get("quantite", "")
+        if dialecte.delimiter != ",":
+            quantite = quantite.replace(",", ".")
+        lue = {"produit": ligne.get("produit", ""), "quantite": quantite}
+        if ligne.get("unite"):
+            lue["unite"] = ligne["unite"]
+        lignes.append(lue)
+    return lignes
+
+
+def enregistrer_comptages(inventaire_id, quantites):
+    """
+    Enregistre des quantités comptées dans une session ouverte.
+
+    Une seule requête (`INSERT ... ON CONFLICT UPDATE`) : un produit déjà
+    compté prend la nouvelle quantité.
+
+    Args:
+        inventaire_id: UUID de la session
+        quantites (dict): {produit_id: quantite comptée (Decimal >= 0)}
+
+    Returns:
+        bool: False si la session n'est plus ouverte (rien n'est écrit)
+    """
+    with transaction.atomic():
+        inventaire = Inventaire.objects.select_for_update().get(pk=inventaire_id)
+        if inventaire.statut != "ouvert":
+            return False
+        InventaireLigne.objects.bulk_create(
+            [
+                InventaireLigne(
+                    entreprise_id=inventaire.entreprise_id,
+                    inventaire_id=inventaire.pk,
+                    produit_id=produit_id,
+                    quantite_comptee=quantite,
+                )
+                for produit_id, quantite in quantites.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["inventaire", "produit"],
+            update_fields=["quantite_comptee", "updated_at"],
+            batch_size=1000,
+        )
+    return True
+
+
+def _stock_systeme(depot_id):
+    """Stock du produit de la ligne dans le dépôt (0 sans ligne `StockDepot`)."""
+    stock = StockDepot.objects.filter(
+        depot_id=depot_id, produit_id=OuterRef("produit_id")
+    ).values("quantite")[:1]
+    return Coalesce(Subquery(stock), Value(0, output_field=QuantiteField()))
+
+
+def valider_inventaire(inventaire_id):
+    """
+    Valide une session : fige les écarts et passe les ajustements.
+
+    Tout se fait dans une transaction ; le stock des produits comptés est
+    verrouillé avant la lecture du stock système, si bien qu'une vente
+    concurrente attend la fin de la validation.
+
+    Args:
+        inventaire_id: UUID de la session
+
+    Returns:
+        dict ou None: {"produits": lignes comptées, "ajustes": produits en
+        écart} ; None si la session n'est plus ouverte
+    """
+    with transaction.atomic():
+        inventaire = Inventaire.objects.select_for_update().get(pk=inventaire_id)
+        if inventaire.statut != "ouvert":
+            return None
+        depot_id = inventaire.depot_id
+        lignes = InventaireLigne.objects.filter(inventaire_id=inventaire.pk)
+
+        list(
+            StockDepot.objects.select_for_update()
+            .filter(depot_id=depot_id, produit_id__in=lignes.values("produit_id"))
+            .values_list("pk", flat=True)
+        )
+        maintenant = timezone.now()
+        produits = lignes.update(
+            quantite_systeme=_stock_systeme(depot_id),
+            ecart=F("quantite_comptee") - _stock_systeme(depot_id),
+            updated_at=maintenant,
+        )
+        ecarts = dict(lignes.exclude(ecart=0).values_list("produit_id", "ecart"))
+
+        increment_stock_bulk({pk: e for pk, e in ecarts.items() if e > 0}, depot_id)
+        decrement_stock_bulk({pk: -e for pk, e in ecarts.items() if e < 0}, depot_id)
+        enregistrer_mouvements(
+            inventaire.entreprise_id,
+            "ajustement",
+            ecarts,
+            reference=inventaire.pk,
+            depot_id=depot_id,
+        )
+
+        inventaire.statut = "valide"
+        inventaire.valide_le = maintenant
+        inventaire.save(update_fields=["statut", "valide_le", "updated_at"])
+    return {"produits": produits, "ajustes": len(ecarts)}
+
+
+def rapport_ecarts(inventaire, tous=False):
+    """
+    Rapport d'écarts d'une session, en une requête.
+
+    Une session ouverte est comparée au stock courant du dépôt (aperçu) ;
+    une session validée renvoie les écarts figés à la validation.
+
+    Args:
+        inventaire (Inventaire): Session
+        tous (bool): Inclure les produits sans écart
+
+    Returns:
+        dict: {"totaux": {produits, ecarts, surplus, manquants},
+        "lignes": [{produit, produit_nom, quantite_comptee,
+        quantite_systeme, ecart}]} ; lignes par écart croissant
+        (plus gros manquants en tête)
+    """
+    lignes = InventaireLigne.objects.filter(inventaire=inventaire)
+    if inventaire.statut == "ouvert":
+        lignes = lignes.annotate(systeme=_stock_systeme(inventaire.depot_id))
+    else:
+        lignes = lignes.annotate(systeme=F("quantite_systeme"))
+    lignes = lignes.values_list(
+        "produit_id", "produit__nom", "quantite_comptee", "systeme"
+    )
+
+    rapport, totaux = [], {"produits": 0, "ecarts": 0, "surplus": 0, "manquants": 0}
+    for produit_id, nom, comptee, systeme in lignes:
+        systeme = systeme if systeme is not None else Decimal(0)
+        ecart = comptee - systeme
+        totaux["produits"] += 1
+        if ecart:
+            totaux["ecarts"] += 1
+            totaux["surplus" if ecart > 0 else "manquants"] += 1
+        if ecart or tous:
+            rapport.append(
+                {
+                    "produit": produit_id,
+                    "produit_nom": nom,
+                    "quantite_comptee": comptee,
+                    "quantite_systeme": systeme,
+                    "ecart": ecart,
+                }
+            )
+    rapport.sort(key=lambda ligne: (ligne["ecart"], ligne["produit_nom"]))
+    return {"totaux": totaux, "lignes": rapport}
@@ -0,0 +1,211 @@
+"""
+Journal des mouvements de stock et stock à date.
+
+Le moteur de stock (`services.stock`) tient `Produit.quantite` à jour ;
+chaque variation est en plus journalisée dans `MouvementStock`, écrit
+par `bulk_create` dans la même transaction, puis valorisée (couches
+FIFO et coût moyen, voir `apps.finance.services.valorisation`).
+
+Le stock d'un produit à une date X se lit depuis le dernier `PointStock`
+antérieur à X, plus les mouvements entre ce point et X : le coût ne
+dépend pas de l'ancienneté de l'historique. Les points sont créés
+périodiquement par `creer_points_stock` (tâche Celery quotidienne).
+"""
+
+import datetime
+from datetime import timedelta
+
+from django.db.models import Exists, ExpressionWrapper, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.analytics.services.cache import invalider_analytics
+from apps.commerce.models import MouvementStock, PointStock, Produit
+from apps.core.fields import QuantiteField, entier_vers_quantite
+from apps.finance.services.valorisation import valoriser
+
+# Les mouvements des dernières minutes ne sont pas encore figés dans un
+# point : une transaction en cours pourrait encore valider un mouvement
+# daté d'avant le point (`created_at` est fixé avant l'INSERT).
+MARGE_POINT = timedelta(minutes=5)
+
+_ORIGINE = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def construire_mouvements(
+    entreprise_id, type, quantites, reference=None, depot_id=None
+):
+    """
+    Construit (sans les enregistrer) les mouvements d'une opération.
+
+    Args:
+        entreprise_id: Entreprise propriétaire
+        type (str): Type de mouvement (`MouvementStock.TYPE_CHOICES`)
+        quantites (dict): {produit_id: variation signée} ; les variations
+            nulles sont ignorées
+        reference (UUID): Objet à l'origine du mouvement (Stock, Vente)
+        depot_id: Dépôt concerné
+
+    Returns:
+        list[MouvementStock]: Mouvements non sauvegardés
+    """
+    return [
+        MouvementStock(
+            entreprise_id=entreprise_id,
+            produit_id=produit_id,
+            depot_id=depot_id,
+            type=type,
+            quantite=quantite,
+            reference=reference,
+        )
+        for produit_id, quantite in quantites.items()
+        if quantite
+    ]
+
+
+def journaliser(mouvements, couts=None):
+    """
+    Enregistre et valorise des mouvements construits par `construire_mouvements`.
+
+    A appeler dans la transaction qui modifie `Produit.quantite`. Le cache
+    analytics des entreprises concernées est invalidé au commit.
+
+    Args:
+        mouvements (list[MouvementStock]): Mouvements dans leur ordre d'application
+        couts (dict): {produit_id: coût unitaire} des entrées (`Stock.prix_achat`)
+
+    Returns:
+        list[CoutVente]: Coûts des ventes valorisées (voir `valoriser`)
+    """
+    if not mouvements:
+        return []
+    MouvementStock.objects.bulk_create(mouvements, batch_size=1000)
+    for entreprise_id in {mouvement.entreprise_id for mouvement in mouvements}:
+        invalider_analytics(entreprise_id)
+    return valoriser(mouvements, couts)
+
+
+def enregistrer_mouvements(
+    entreprise_id, type, quantites, reference=None, couts=None, depot_id=None
+):
+    """
+    Journalise et valorise les mouvements d'une opération.
+
+    A appeler dans la transaction qui modifie `Produit.quantite`.
+
+    Args:
+        entreprise_id: Entreprise propriétaire
+        type (str): Type de mouvement
+        quantites (dict): {produit_id: variation signée}
+        reference (UUID): Objet à l'origine du mouvement, optionnel
+        couts (dict): {produit_id: coût unitaire} des entrées, optionnel
+        depot_id: Dépôt concerné
+
+    Returns:
+        list[CoutVente]: Coûts des ventes valorisées (voir `valoriser`)
+    """
+    return journaliser(
+        construire_mouvements(entreprise_id, type, quantites, reference, depot_id),
+        couts,
+    )
+
+
+def annoter_stock_a_date(produits, date):
+    """
+    Annote chaque produit de son stock à `date` (`quantite_a_date`).
+
+    Une seule requête : pour chaque produit, le dernier point antérieur
+    à `date` (index `(produit, date)`) et la somme des mouvements entre
+    ce point et `date` (index `(produit, created_at)`).
+
+    Args:
+        produits: QuerySet de `Produit`
+        date (datetime): Instant considéré (inclus)
+
+    Returns:
+        QuerySet: Produits annotés de `quantite_a_date` (Decimal)
+    """
+    point = PointStock.objects.filter(produit=OuterRef("pk"), date__lte=date).order_by(
+        "-date"
+    )
+    produits = produits.annotate(
+        point_date=Subquery(point.values("date")[:1]),
+        point_quantite=Subquery(point.values("quantite")[:1]),
+    )
+    delta = (
+        MouvementStock.objects.filter(
+            produit=OuterRef("pk"),
+            created_at__lte=date,
+            created_at__gt=Coalesce(OuterRef("point_date"), Value(_ORIGINE)),
+        )
+        .values("produit")
+        .annotate(total=Sum("quantite"))
+        .values("total")
+    )
+    zero = Value(0, output_field=QuantiteField())
+    return produits.annotate(
+        quantite_a_date=ExpressionWrapper(
+            Coalesce("point_quantite", zero) + Coalesce(Subquery(delta), zero),
+            output_field=QuantiteField(),
+        )
+    )
+
+
+def stock_a_date(produit_id, date):
+    """
+    Stock d'un produit à une date.
+
+    Args:
+        produit_id: UUID du produit
+        date (datetime): Instant considéré (inclus)
+
+    Returns:
+        Decimal: Stock à `date` (0 si le produit n'existe pas encore)
+    """
+    produit = (
+        annoter_stock_a_date(Produit.objects.filter(pk=produit_id), date)
+        .values_list("quantite_a_date", flat=True)
+        .first()
+    )
+    return produit if produit is not None else entier_vers_quantite(0)
+
+
+def creer_points_stock(date=None):
+    """
+    Crée un point de stock pour chaque produit ayant bougé depuis son dernier point.
+
+    Args:
+        date (datetime): Date des points (défaut: maintenant - `MARGE_POINT`)
+
+    Returns:
+        int: Nombre de points créés
+    """
+    date = date or timezone.now() - MARGE_POINT
+    dernier_point = (
+        PointStock.objects.filter(produit=OuterRef("pk"))
+        .order_by("-date")
+        .values("date")[:1]
+    )
+    produits = Produit.objects.annotate(dernier_point=Subquery(dernier_point)).filter(
+        Exists(
+            MouvementStock.objects.filter(
+                produit=OuterRef("pk"),
+                created_at__lte=date,
+                created_at__gt=Coalesce(OuterRef("dernier_point"), Value(_ORIGINE)),
+            )
+        )
+    )
+    niveaux = annoter_stock_a_date(produits, date).values_list(
+        "pk", "entreprise_id", "quantite_a_date"
+    )
+    points = PointStock.objects.bulk_create(
+        (
+            PointStock(
+                entreprise_id=entreprise_id, produit_id=pk, date=date, quantite=quantite
+            )
+            for pk, entreprise_id, quantite in niveaux.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+        ignore_conflicts=True,
+    )
+    return len(points)
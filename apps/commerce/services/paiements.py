@@ -0,0 +1,239 @@
+"""
+Paiements des ventes et soldes dénormalisés (créances clients).
+
+Chaque encaissement est un `Paiement`. Les soldes qui en découlent sont
+tenus à jour dans la même transaction, sans jamais resommer les
+paiements :
+
+- par vente : `Vente.montant_paye` et `Vente.reste_a_payer` ;
+- par client : `Partner.montant_paye` et `Partner.reste_a_payer` (encours).
+
+Une vente créée "payee" (ou marquée payée) reçoit un paiement de son
+montant restant ; une vente annulée n'est plus due (`reste_a_payer` à 0),
+ses paiements déjà reçus restant acquis.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from apps.analytics.services.faits import reporter_ventes
+from apps.commerce.models import Paiement, Vente
+from apps.partners.models import Partner
+
+# Statuts d'une vente qui n'est plus due
+STATUTS_NON_DUS = ("annulee", "rembourse")
+
+
+class PaiementRefuseError(Exception):
+    """Levée lorsqu'un paiement ne peut pas être imputé à la vente."""
+
+
+def soldes_initiaux(vente):
+    """
+    Fixe les soldes d'une vente non encore enregistrée selon son statut.
+
+    Une vente "payee" est réglée en totalité ; une vente annulée ou
+    remboursée n'est pas due ; les autres doivent leur total.
+    """
+    total = vente.prix_vente or Decimal(0)
+    if vente.statut == "payee":
+        vente.montant_paye, vente.reste_a_payer = total, Decimal(0)
+    elif vente.statut in STATUTS_NON_DUS:
+        vente.montant_paye, vente.reste_a_payer = Decimal(0), Decimal(0)
+    else:
+        vente.montant_paye, vente.reste_a_payer = Decimal(0), total
+
+
+def cumuler_soldes_clients(deltas):
+    """
+    Reporte des variations de soldes sur les clients, en un UPDATE.
+
+    Args:
+        deltas (dict): {client_id: (variation de montant_paye,
+            variation de reste_a_payer)}
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    def par_client(index):
+        return Case(
+            *[When(pk=pk, then=Value(delta[index])) for pk, delta in deltas.items()],
+            default=Value(Decimal(0)),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+
+    Partner.objects.filter(pk__in=list(deltas)).update(
+        montant_paye=F("montant_paye") + par_client(0),
+        reste_a_payer=F("reste_a_payer") + par_client(1),
+        updated_at=timezone.now(),
+    )
+
+
+def ouvrir_soldes(ventes, mode="especes"):
+    """
+    Enregistre les paiements et soldes clients de ventes venant d'être créées.
+
+    A appeler dans la transaction qui crée les ventes, dont les soldes ont
+    été fixés par `soldes_initiaux`. Un `bulk_create` pour les paiements
+    des ventes réglées, un UPDATE pour les clients.
+
+    Args:
+        ventes (list[Vente]): Ventes enregistrées
+        mode (str): Mode des paiements des ventes réglées à la création
+    """
+    maintenant = timezone.now()
+    deltas = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    paiements = []
+    for vente in ventes:
+        if vente.montant_paye:
+            paiements.append(
+                Paiement(
+                    entreprise_id=vente.entreprise_id,
+                    vente_id=vente.pk,
+                    montant=vente.montant_paye,
+                    mode=mode,
+                    date=vente.created_at or maintenant,
+                )
+            )
+        delta = deltas[vente.client_id]
+        delta[0] += vente.montant_paye
+        delta[1] += vente.reste_a_payer
+    Paiement.objects.bulk_create(paiements, batch_size=1000)
+    cumuler_soldes_clients(deltas)
+
+
+def enregistrer_paiement(vente_id, montant, mode="especes", reference="", date=None):
+    """
+    Impute un paiement à une vente et met à jour les soldes.
+
+    La vente passe "payee" si elle est soldée, "paiement_partiel" sinon.
+
+    Args:
+        vente_id: UUID de la vente
+        montant (Decimal): Montant encaissé (> 0)
+        mode (str): Mode de paiement (`Paiement.MODE_CHOICES`)
+        reference (str): Référence de la transaction
+        date (datetime): Date d'encaissement (défaut: maintenant)
+
+    Returns:
+        Paiement: Le paiement créé
+
+    Raises:
+        PaiementRefuseError: Vente non due ou montant supérieur au reste à payer
+    """
+    with transaction.atomic():
+        vente = Vente.objects.select_for_update().get(pk=vente_id)
+        if vente.statut in STATUTS_NON_DUS:
+            raise PaiementRefuseError(
+                f"Vente {vente.get_statut_display().lower()} : aucun paiement attendu."
+            )
+        if montant > vente.reste_a_payer:
+            raise PaiementRefuseError(
+                f"Le montant dépasse le reste à payer ({vente.reste_a_payer})."
+            )
+
+        paiement = Paiement.objects.create(
+            entreprise_id=vente.entreprise_id,
+            vente=vente,
+            montant=montant,
+            mode=mode,
+            reference=reference,
+            date=date or timezone.now(),
+        )
+        vente.montant_paye += montant
+        vente.reste_a_payer -= montant
+        vente.statut = "payee" if not vente.reste_a_payer else "paiement_partiel"
+        Vente.objects.filter(pk=vente.pk).update(
+            montant_paye=vente.montant_paye,
+            reste_a_payer=vente.reste_a_payer,
+            statut=vente.statut,
+            updated_at=timezone.now(),
+        )
+        cumuler_soldes_clients({vente.client_id: (montant, -montant)})
+        reporter_ventes([vente])
+    return paiement
+
+
+def solder_ventes(ventes, mode="especes"):
+    """
+    Règle le reste à payer de ventes marquées payées.
+
+    A appeler dans la transaction qui change leur statut, avec les ventes
+    verrouillées : un `bulk_create` de paiements, un UPDATE des ventes et
+    un des clients.
+
+    Args:
+        ventes (list[Vente]): Ventes lues avant le changement de statut
+        mode (str): Mode des paiements créés
+    """
+    dues = [vente for vente in ventes if vente.reste_a_payer]
+    if not dues:
+        return
+    maintenant = timezone.now()
+    deltas = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    for vente in dues:
+        delta = deltas[vente.client_id]
+        delta[0] += vente.reste_a_payer
+        delta[1] -= vente.reste_a_payer
+    Paiement.objects.bulk_create(
+        [
+            Paiement(
+                entreprise_id=vente.entreprise_id,
+                vente_id=vente.pk,
+                montant=vente.reste_a_payer,
+                mode=mode,
+                date=maintenant,
+            )
+            for vente in dues
+        ],
+        batch_size=1000,
+    )
+    Vente.objects.filter(pk__in=[vente.pk for vente in dues]).update(
+        montant_paye=F("montant_paye") + F("reste_a_payer"),
+        reste_a_payer=0,
+        updated_at=maintenant,
+    )
+    cumuler_soldes_clients(deltas)
+
+
+def annuler_soldes(ventes):
+    """
+    Annule la créance de ventes annulées (reste à payer à 0).
+
+    A appeler dans la transaction qui change leur statut, avec les ventes
+    verrouillées. Les paiements déjà reçus ne sont pas touchés.
+
+    Args:
+        ventes (list[Vente]): Ventes lues avant le changement de statut
+    """
+    dues = [vente for vente in ventes if vente.reste_a_payer]
+    if not dues:
+        return
+    deltas = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    for vente in dues:
+        deltas[vente.client_id][1] -= vente.reste_a_payer
+    Vente.objects.filter(pk__in=[vente.pk for vente in dues]).update(
+        reste_a_payer=0, updated_at=timezone.now()
+    )
+    cumuler_soldes_clients(deltas)
+
+
+def retirer_soldes(vente):
+    """
+    Retire des soldes du client une vente sur le point d'être supprimée.
+
+    A appeler dans la transaction qui supprime la vente, avec la vente
+    verrouillée : ses paiements disparaissent avec elle (CASCADE), le
+    client perd donc ce qu'elle a encaissé et ce qu'elle restait devoir.
+
+    Args:
+        vente (Vente): Vente lue avant sa suppression
+    """
+    cumuler_soldes_clients(
+        {vente.client_id: (-vente.montant_paye, -vente.reste_a_payer)}
+    )
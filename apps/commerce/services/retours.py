@@ -0,0 +1,208 @@
+"""
+Retours de marchandise et remboursements.
+
+Un retour (`Retour`) porte sur tout ou partie des quantités d'une vente.
+Tout se fait dans une transaction, en un nombre constant de requêtes :
+
+- les lignes de la vente sont diminuées des quantités retournées
+  (`bulk_update`) : CA et quantités vendues lus sur les lignes sont
+  nets des retours ;
+- le stock est réintégré dans le dépôt de la vente par le moteur de
+  stock (un UPDATE groupé) et journalisé en mouvements "retour",
+  valorisés au coût de la vente d'origine ;
+- l'agrégat de marge (`FaitMargeJour`) est diminué des seules lignes
+  retournées, sur le jour de la vente (`FaitVentesJour` est reconstruit
+  pour ce jour après commit) ;
+- le montant crédité diminue le reste à payer, l'excédent déjà encaissé
+  étant remboursé par un `Paiement` négatif (soldes du client compris).
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.analytics.services.faits import reporter_ventes
+from apps.analytics.services.marges import cumuler_marges
+from apps.commerce.models import (
+    Paiement,
+    Retour,
+    RetourLigne,
+    Vente,
+    VenteLigne,
+    calculer_montant,
+)
+from apps.commerce.services.depots import depot_principal
+from apps.commerce.services.mouvements import enregistrer_mouvements
+from apps.commerce.services.paiements import cumuler_soldes_clients
+from apps.commerce.services.stock import increment_stock_bulk
+from apps.commerce.services.ventes import TRANSITIONS_STATUT
+
+
+class RetourRefuseError(Exception):
+    """Levée lorsqu'un retour ne peut pas être enregistré sur la vente."""
+
+
+def _repartir(lignes, quantites):
+    """
+    Répartit les quantités retournées sur les lignes de la vente.
+
+    Un produit présent sur plusieurs lignes est retourné ligne après ligne,
+    dans l'ordre de la vente.
+
+    Args:
+        lignes (list[VenteLigne]): Lignes de la vente
+        quantites (dict): {produit_id: quantite retournée}
+
+    Returns:
+        list: (VenteLigne, quantite retournée) par ligne concernée
+
+    Raises:
+        RetourRefuseError: Produit absent de la vente ou quantité supérieure
+            à la quantité restante
+    """
+    reparties = []
+    for produit_id, demande in quantites.items():
+        concernees = [ligne for ligne in lignes if ligne.produit_id == produit_id]
+        restant = sum((ligne.quantite for ligne in concernees), Decimal(0))
+        if demande > restant:
+            raise RetourRefuseError(
+                f"Produit {produit_id} : quantité retournée supérieure à la "
+                f"quantité restante sur la vente ({restant})."
+            )
+        for ligne in concernees:
+            if not demande:
+                break
+            prise = min(demande, ligne.quantite)
+            if prise:
+                reparties.append((ligne, prise))
+                demande -= prise
+    return reparties
+
+
+def retourner_vente(vente_id, quantites=None, mode="especes", motif=""):
+    """
+    Enregistre le retour de tout ou partie d'une vente.
+
+    La vente entièrement retournée passe "rembourse" ; une vente en
+    "paiement_partiel" dont le retour solde le reste passe "payee".
+
+    Args:
+        vente_id: UUID de la vente
+        quantites (dict): {produit_id: quantite retournée (Decimal > 0)},
+            dans l'unité du produit ; None retourne toute la vente
+        mode (str): Mode du remboursement (`Paiement.MODE_CHOICES`)
+        motif (str): Motif du retour
+
+    Returns:
+        Retour: Le retour créé
+
+    Raises:
+        RetourRefuseError: Vente annulée ou déjà remboursée, sans lignes, ou
+            quantités retournées invalides (rien n'est écrit)
+    """
+    with transaction.atomic():
+        vente = Vente.objects.select_for_update().get(pk=vente_id)
+        if vente.statut not in TRANSITIONS_STATUT["rembourse"]:
+            raise RetourRefuseError(
+                f"Vente {vente.get_statut_display().lower()} : aucun retour possible."
+            )
+        lignes = list(
+            VenteLigne.objects.filter(vente_id=vente.pk).order_by("created_at", "id")
+        )
+        if quantites is None:
+            quantites = {}
+            for ligne in lignes:
+                quantites[ligne.produit_id] = (
+                    quantites.get(ligne.produit_id, 0) + ligne.quantite
+                )
+        quantites = {pk: q for pk, q in quantites.items() if q}
+        if not quantites:
+            raise RetourRefuseError("Aucune quantité à retourner sur cette vente.")
+        reparties = _repartir(lignes, quantites)
+
+        maintenant = timezone.now()
+        retour = Retour(
+            entreprise_id=vente.entreprise_id, vente=vente, mode=mode, motif=motif
+        )
+        retour_lignes, retournees = [], []
+        for ligne, quantite in reparties:
+            # Crédit = total de la ligne avant retour - total de ce qui reste :
+            # les retours successifs d'une ligne soldent exactement son montant.
+            reste = ligne.quantite - quantite
+            montant = ligne.prix_vente - calculer_montant(reste, ligne.prix_unitaire)
+            montant = min(max(montant, Decimal(0)), ligne.prix_vente)
+            retour_lignes.append(
+                RetourLigne(
+                    entreprise_id=vente.entreprise_id,
+                    retour=retour,
+                    vente_ligne=ligne,
+                    produit_id=ligne.produit_id,
+                    quantite=quantite,
+                    montant=montant,
+                )
+            )
+            # Part retournée de la ligne, retranchée de l'agrégat de marge.
+            retournees.append(
+                VenteLigne(
+                    vente=vente,
+                    produit_id=ligne.produit_id,
+                    quantite=quantite,
+                    prix_vente=montant,
+                    cout_unitaire=ligne.cout_unitaire,
+                )
+            )
+            ligne.quantite = reste
+            ligne.prix_vente -= montant
+            ligne.updated_at = maintenant
+            retour.montant += montant
+
+        # Le crédit solde d'abord la créance ; l'excédent est remboursé.
+        deduit = min(retour.montant, vente.reste_a_payer)
+        retour.montant_rembourse = retour.montant - deduit
+        retour.save()
+        RetourLigne.objects.bulk_create(retour_lignes, batch_size=1000)
+        VenteLigne.objects.bulk_update(
+            [ligne for ligne, _ in reparties],
+            ["quantite", "prix_vente", "updated_at"],
+            batch_size=1000,
+        )
+
+        depot_id = vente.depot_id or depot_principal(vente.entreprise_id)
+        increment_stock_bulk(quantites, depot_id)
+        enregistrer_mouvements(
+            vente.entreprise_id, "retour", quantites, vente.pk, depot_id=depot_id
+        )
+        cumuler_marges(retournees, signe=-1)
+
+        if retour.montant_rembourse:
+            Paiement.objects.create(
+                entreprise_id=vente.entreprise_id,
+                vente=vente,
+                montant=-retour.montant_rembourse,
+                mode=mode,
+                reference=f"Retour {retour.pk}",
+                date=maintenant,
+            )
+        vente.prix_vente = (vente.prix_vente or Decimal(0)) - retour.montant
+        vente.reste_a_payer -= deduit
+        vente.montant_paye -= retour.montant_rembourse
+        if not any(ligne.quantite for ligne in lignes):
+            vente.statut = "rembourse"
+        elif vente.statut == "paiement_partiel" and not vente.reste_a_payer:
+            vente.statut = "payee"
+        champs = {}
+        if len(lignes) == 1 and vente.quantite is not None:
+            # Vente mono-produit : le champ historique suit la ligne.
+            champs["quantite"] = lignes[0].quantite
+        Vente.objects.filter(pk=vente.pk).update(
+            prix_vente=vente.prix_vente,
+            reste_a_payer=vente.reste_a_payer,
+            montant_paye=vente.montant_paye,
+            statut=vente.statut,
+            updated_at=maintenant,
+            **champs,
+        )
+        cumuler_soldes_clients({vente.client_id: (-retour.montant_rembourse, -deduit)})
+        reporter_ventes([vente])
+    return retour
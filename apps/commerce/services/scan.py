@@ -0,0 +1,109 @@
+"""
+Lecture d'un produit par son code-barres ou son SKU (caisse).
+
+Le produit scanné est lu par l'index unique `(entreprise, code_barre)` ou
+`(entreprise, sku)`, puis gardé dans le cache (Redis) sous une clé
+propre à l'entreprise : un code déjà scanné est servi sans requête SQL.
+
+Seuls les champs de catalogue (nom, prix, unité, codes) sont mis en
+cache, pas le stock, qui change à chaque vente sans `save()`.
+L'enregistrement ou la suppression d'un produit incrémente, après commit,
+la version du cache de scan de son entreprise (`invalider_scan`) : toutes
+ses entrées sont alors ignorées, y compris celles d'un code qui vient de
+changer. Les variations de stock (UPDATE du moteur de stock) ne passent
+pas par `save()` et ne touchent pas ce cache.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.commerce.models import Produit
+
+# Champs renvoyés (et mis en cache) pour un produit scanné
+CHAMPS_SCAN = ("id", "nom", "categorie", "prix", "mesure", "code_barre", "sku")
+
+
+def _cle_version(entreprise_id):
+    return f"scan_version:{entreprise_id}"
+
+
+def _nouvelle_version():
+    # Horodatage (ms) : une version recréée après expulsion du cache ne
+    # retombe jamais sur celle d'entrées plus anciennes.
+    return int(time.time() * 1000)
+
+
+def _version(entreprise_id):
+    """Version courante du cache de scan de l'entreprise (créée au besoin)."""
+    cle = _cle_version(entreprise_id)
+    version = cache.get(cle)
+    if version is None:
+        version = _nouvelle_version()
+        if not cache.add(cle, version, None):
+            version = cache.get(cle, version)
+    return version
+
+
+def invalider_scan(entreprise_id):
+    """
+    Invalide le cache de scan d'une entreprise (nouvelle version).
+
+    Les anciennes entrées ne sont plus lues et expirent d'elles-mêmes.
+    """
+    cle = _cle_version(entreprise_id)
+    try:
+        cache.incr(cle)
+    except ValueError:
+        # Version absente (jamais scanné ou expulsée du cache).
+        cache.add(cle, _nouvelle_version(), None)
+
+
+@receiver(post_save, sender=Produit, dispatch_uid="commerce.scan.save")
+@receiver(post_delete, sender=Produit, dispatch_uid="commerce.scan.delete")
+def _produit_modifie(sender, instance, **kwargs):
+    """Invalide le cache de scan de l'entreprise du produit, après commit."""
+    entreprise_id = instance.entreprise_id
+    if entreprise_id:
+        transaction.on_commit(lambda: invalider_scan(entreprise_id))
+
+
+def scanner(entreprise_id, code):
+    """
+    Produit d'une entreprise portant un code-barres ou un SKU.
+
+    Le code-barres est prioritaire si le code correspond aux deux.
+
+    Args:
+        entreprise_id: Entreprise concernée
+        code (str): Code lu
+
+    Returns:
+        dict ou None: Champs `CHAMPS_SCAN` du produit (prix en chaîne),
+        None si aucun produit ne porte ce code
+    """
+    code = code.strip()
+    if not code:
+        return None
+    cle = f"scan:{entreprise_id}:{_version(entreprise_id)}:{code}"
+    produit = cache.get(cle)
+    if produit is not None:
+        return produit
+
+    trouves = list(
+        Produit.objects.filter(
+            Q(code_barre=code) | Q(sku=code), entreprise_id=entreprise_id
+        ).values(*CHAMPS_SCAN)[:2]
+    )
+    if not trouves:
+        return None
+    produit = next((p for p in trouves if p["code_barre"] == code), trouves[0])
+    produit["id"] = str(produit["id"])
+    produit["prix"] = str(produit["prix"])
+    cache.set(cle, produit, settings.SCAN_CACHE_TTL)
+    return produit
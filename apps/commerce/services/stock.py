@@ -0,0 +1,210 @@
+"""
+Moteur de stock : seul point de mutation de `Produit.quantite` et de `StockDepot`.
+
+Toutes les variations de stock passent par des `UPDATE` conditionnels
+exécutés directement en base (expressions F), sans lecture préalable du
+produit en Python. Deux ventes concurrentes sur le même produit ne peuvent
+donc ni perdre une mise à jour, ni vendre plus que le stock disponible :
+
+    UPDATE stock_depot SET quantite = quantite - n
+    WHERE produit_id = ... AND depot_id = ... AND quantite >= n
+
+Chaque variation vise un dépôt : la ligne `StockDepot` du dépôt et le
+stock total `Produit.quantite` sont modifiés dans la même transaction,
+si bien que le total reste une simple colonne, égale à la somme des
+dépôts, jamais recalculée.
+
+Les quantités sont des `Decimal` dans l'unité du produit ; les deltas
+injectés dans les expressions sont convertis en entiers stockés
+(millièmes, voir `QuantiteField`).
+"""
+
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, Value, When
+from django.utils import timezone
+
+from apps.commerce.models import Produit, StockDepot
+from apps.core.fields import quantite_vers_entier
+
+
+class StockInsuffisantError(Exception):
+    """Levée lorsqu'un décrément dépasserait le stock disponible."""
+
+    def __init__(self, produit_id, quantite, disponible=None):
+        self.produit_id = produit_id
+        self.quantite = quantite
+        self.disponible = disponible
+        super().__init__(
+            f"Stock insuffisant pour le produit {produit_id} (demandé: {quantite})."
+        )
+
+
+def decrement_stock(produit_id, quantite, depot_id):
+    """
+    Décrémente atomiquement le stock d'un produit dans un dépôt.
+
+    Le décrément n'est appliqué que si le stock du dépôt est suffisant ;
+    la vérification et l'écriture se font dans la même instruction SQL.
+
+    Args:
+        produit_id: UUID du produit
+        quantite (Decimal): Quantité à retirer (> 0)
+        depot_id: UUID du dépôt
+
+    Raises:
+        StockInsuffisantError: Si le stock est insuffisant ou le produit absent
+    """
+    decrement_stock_bulk({produit_id: quantite}, depot_id)
+
+
+def increment_stock(produit_id, quantite, depot_id):
+    """
+    Incrémente atomiquement le stock d'un produit dans un dépôt (entrée, annulation).
+
+    Args:
+        produit_id: UUID du produit
+        quantite (Decimal): Quantité à ajouter (> 0)
+        depot_id: UUID du dépôt
+    """
+    increment_stock_bulk({produit_id: quantite}, depot_id)
+
+
+def _delta_par_produit(quantites, champ="pk"):
+    """`CASE <champ> WHEN ... THEN n END` (n en entiers stockés) d'un UPDATE groupé."""
+    return Case(
+        *[
+            When(**{champ: produit_id}, then=Value(quantite_vers_entier(q)))
+            for produit_id, q in quantites.items()
+        ],
+        output_field=BigIntegerField(),
+    )
+
+
+def _retirer_du_depot(quantites, depot_id):
+    """
+    Retire des quantités d'un dépôt en un UPDATE conditionnel (tout ou rien).
+
+    Raises:
+        StockInsuffisantError: Pour le premier produit en rupture dans le dépôt
+    """
+    delta = _delta_par_produit(quantites, "produit_id")
+    try:
+        with transaction.atomic():
+            updated = StockDepot.objects.filter(
+                depot_id=depot_id, produit_id__in=list(quantites), quantite__gte=delta
+            ).update(quantite=F("quantite") - delta, updated_at=timezone.now())
+            if updated != len(quantites):
+                raise StockInsuffisantError(None, None)
+    except StockInsuffisantError:
+        disponibles = dict(
+            StockDepot.objects.filter(
+                depot_id=depot_id, produit_id__in=list(quantites)
+            ).values_list("produit_id", "quantite")
+        )
+        for produit_id, quantite in quantites.items():
+            disponible = disponibles.get(produit_id, 0)
+            if disponible < quantite:
+                raise StockInsuffisantError(produit_id, quantite, disponible)
+        # Le stock a été réapprovisionné entre-temps : signaler le premier produit.
+        produit_id, quantite = next(iter(quantites.items()))
+        raise StockInsuffisantError(produit_id, quantite, disponibles.get(produit_id))
+
+
+def _ajouter_au_depot(quantites, depot_id):
+    """Ajoute des quantités à un dépôt ; crée les lignes `StockDepot` manquantes."""
+    delta = _delta_par_produit(quantites, "produit_id")
+    lignes = StockDepot.objects.filter(
+        depot_id=depot_id, produit_id__in=list(quantites)
+    )
+    maintenant = timezone.now()
+    if lignes.update(quantite=F("quantite") + delta, updated_at=maintenant) == len(
+        quantites
+    ):
+        return
+
+    # Premier passage du produit dans ce dépôt : créer la ligne à zéro
+    # (sans écraser une ligne créée en concurrence), puis l'incrémenter.
+    existants = set(lignes.values_list("produit_id", flat=True))
+    manquants = {pk: q for pk, q in quantites.items() if pk not in existants}
+    entreprises = Produit.objects.filter(pk__in=list(manquants)).values_list(
+        "pk", "entreprise_id"
+    )
+    StockDepot.objects.bulk_create(
+        [
+            StockDepot(entreprise_id=entreprise_id, produit_id=pk, depot_id=depot_id)
+            for pk, entreprise_id in entreprises
+        ],
+        ignore_conflicts=True,
+    )
+    StockDepot.objects.filter(depot_id=depot_id, produit_id__in=list(manquants)).update(
+        quantite=F("quantite") + _delta_par_produit(manquants, "produit_id"),
+        updated_at=maintenant,
+    )
+
+
+def decrement_stock_bulk(quantites, depot_id):
+    """
+    Décrémente le stock de plusieurs produits d'un dépôt.
+
+    Soit tous les produits ont un stock suffisant dans le dépôt et sont
+    décrémentés (dépôt et total), soit aucun ne l'est (savepoint). Deux
+    instructions SQL.
+
+    Args:
+        quantites (dict): {produit_id: quantite} (une entrée par produit)
+        depot_id: UUID du dépôt
+
+    Raises:
+        StockInsuffisantError: Pour le premier produit en rupture
+    """
+    if not quantites:
+        return
+
+    with transaction.atomic():
+        _retirer_du_depot(quantites, depot_id)
+        delta = _delta_par_produit(quantites)
+        Produit.objects.filter(pk__in=list(quantites)).update(
+            quantite=F("quantite") - delta, updated_at=timezone.now()
+        )
+
+
+def increment_stock_bulk(quantites, depot_id):
+    """
+    Incrémente le stock de plusieurs produits dans un dépôt.
+
+    Deux instructions SQL (dépôt et total), plus deux à la première entrée
+    d'un produit dans le dépôt.
+
+    Args:
+        quantites (dict): {produit_id: quantite} (une entrée par produit)
+        depot_id: UUID du dépôt
+    """
+    if not quantites:
+        return
+
+    with transaction.atomic():
+        _ajouter_au_depot(quantites, depot_id)
+        delta = _delta_par_produit(quantites)
+        Produit.objects.filter(pk__in=list(quantites)).update(
+            quantite=F("quantite") + delta, updated_at=timezone.now()
+        )
+
+
+def transferer_stock_bulk(quantites, source_id, destination_id):
+    """
+    Déplace des quantités d'un dépôt à un autre (stock total inchangé).
+
+    Args:
+        quantites (dict): {produit_id: quantite} (une entrée par produit)
+        source_id: UUID du dépôt d'origine
+        destination_id: UUID du dépôt de destination
+
+    Raises:
+        StockInsuffisantError: Si le dépôt d'origine n'a pas la quantité
+    """
+    if not quantites:
+        return
+
+    with transaction.atomic():
+        _retirer_du_depot(quantites, source_id)
+        _ajouter_au_depot(quantites, destination_id)
@@ -0,0 +1,598 @@
+"""
+Création et annulation des ventes multi-lignes.
+
+Une commande de N lignes coûte un nombre constant de requêtes :
+un UPDATE groupé pour le stock, un INSERT pour la vente, un
+`bulk_create` pour les lignes et un pour les mouvements de stock, le
+tout dans une seule transaction. Les soldes de la vente et du client
+(`services.paiements`) sont ouverts dans la même transaction. Chaque
+ligne fige son coût unitaire (valorisation FIFO) et alimente l'agrégat
+de marge (`FaitMargeJour`).
+"""
+
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.analytics.services.cache import invalider_analytics
+from apps.analytics.services.faits import reporter_ventes
+from apps.analytics.services.marges import cumuler_marges
+from apps.commerce.models import (
+    CatalogueUnites,
+    Depot,
+    Produit,
+    StockDepot,
+    Vente,
+    VenteLigne,
+    calculer_montant,
+)
+from apps.commerce.services.depots import depot_principal
+from apps.commerce.services.mouvements import (
+    construire_mouvements,
+    enregistrer_mouvements,
+    journaliser,
+)
+from apps.commerce.services.paiements import (
+    annuler_soldes,
+    ouvrir_soldes,
+    retirer_soldes,
+    solder_ventes,
+    soldes_initiaux,
+)
+from apps.commerce.services.stock import decrement_stock_bulk, increment_stock_bulk
+from apps.core.fields import quantite_vers_entier
+from apps.finance.services.valorisation import PRECISION
+from apps.partners.models import Partner
+
+
+def quantites_par_produit(lignes):
+    """
+    Agrège les quantités des lignes par produit.
+
+    Args:
+        lignes (list): Dictionnaires {produit, quantite, ...}
+
+    Returns:
+        dict: {produit_id: quantite totale (Decimal)}
+    """
+    quantites = defaultdict(Decimal)
+    for ligne in lignes:
+        quantites[ligne["produit"].pk] += ligne["quantite"]
+    return dict(quantites)
+
+
+def convertir_quantites(lignes):
+    """
+    Exprime la quantité de chaque ligne dans l'unité de son produit.
+
+    Les lignes portant une `unite` (ex: 250 "g" d'un produit au kg) sont
+    converties en un seul appel à `CatalogueUnites.convertir_lignes` ; la
+    clé `unite` est ensuite retirée. Les lignes sont modifiées en place.
+
+    Args:
+        lignes (list): Dictionnaires {produit (Produit), quantite, unite (optionnel)}
+
+    Raises:
+        ValueError: Unité incompatible, quantité nulle ou plus précise que
+            le millième de l'unité du produit
+    """
+    a_convertir = [ligne for ligne in lignes if ligne.get("unite")]
+    if a_convertir:
+        try:
+            quantites = CatalogueUnites.convertir_lignes(
+                (ligne["quantite"], ligne["unite"], ligne["produit"].get_code_mesure())
+                for ligne in a_convertir
+            )
+        except ValueError:
+            for ligne in a_convertir:
+                try:
+                    CatalogueUnites.ratio(
+                        ligne["unite"], ligne["produit"].get_code_mesure()
+                    )
+                except ValueError as exc:
+                    raise ValueError(f"{ligne['produit'].nom} : {exc}") from exc
+            raise
+        for ligne, quantite in zip(a_convertir, quantites):
+            ligne["quantite"] = quantite
+
+    for ligne in lignes:
+        ligne.pop("unite", None)
+        if ligne["quantite"] <= 0:
+            raise ValueError(
+                f"{ligne['produit'].nom} : la quantité doit être positive."
+            )
+        try:
+            quantite_vers_entier(ligne["quantite"])
+        except ValueError as exc:
+            raise ValueError(f"{ligne['produit'].nom} : {exc}") from exc
+
+
+def construire_vente(entreprise, statut, lignes, **champs):
+    """
+    Construit (sans les enregistrer) une vente et ses lignes.
+
+    Args:
+        entreprise: Entreprise propriétaire
+        statut (str): Statut initial de la vente
+        lignes (list): Dictionnaires {produit (Produit), quantite, prix_unitaire},
+            quantités déjà exprimées dans l'unité du produit
+        **champs: Champs additionnels de `Vente` (client, client_id, id...)
+
+    Returns:
+        tuple: (Vente, list[VenteLigne]) non sauvegardés
+    """
+    vente = Vente(entreprise=entreprise, statut=statut, **champs)
+    objets = []
+    for ligne in lignes:
+        prix_vente = calculer_montant(ligne["quantite"], ligne["prix_unitaire"])
+        objets.append(
+            VenteLigne(
+                entreprise=entreprise,
+                vente=vente,
+                produit=ligne["produit"],
+                quantite=ligne["quantite"],
+                prix_unitaire=ligne["prix_unitaire"],
+                prix_vente=prix_vente,
+            )
+        )
+
+    if len(lignes) == 1:
+        # Vente mono-produit : renseigner aussi les champs historiques.
+        vente.produit = lignes[0]["produit"]
+        vente.quantite = lignes[0]["quantite"]
+        vente.prix_unitaire = lignes[0]["prix_unitaire"]
+    vente.prix_vente = sum(objet.prix_vente for objet in objets)
+    soldes_initiaux(vente)
+    return vente, objets
+
+
+def creer_vente(entreprise, client, statut, lignes, depot=None, **extra):
+    """
+    Crée une vente et ses lignes, et décrémente le stock en une passe.
+
+    Args:
+        entreprise: Entreprise propriétaire
+        client: Partner de type "client"
+        statut (str): Statut initial de la vente
+        lignes (list): Dictionnaires {produit (Produit), quantite, prix_unitaire}
+        depot: Dépôt d'où sort la marchandise (défaut: dépôt principal)
+        **extra: Champs additionnels de `Vente`
+
+    Returns:
+        Vente: La vente créée
+
+    Raises:
+        StockInsuffisantError: Si un produit est en rupture (rien n'est écrit)
+    """
+    depot_id = depot.pk if depot else depot_principal(entreprise.pk)
+    vente, objets = construire_vente(
+        entreprise, statut, lignes, client=client, depot_id=depot_id, **extra
+    )
+
+    quantites = quantites_par_produit(lignes)
+    with transaction.atomic():
+        decrement_stock_bulk(quantites, depot_id)
+        vente.save()
+        couts = enregistrer_mouvements(
+            entreprise.pk,
+            "vente",
+            {pk: -q for pk, q in quantites.items()},
+            vente.pk,
+            depot_id=depot_id,
+        )
+        figer_couts(objets, couts)
+        VenteLigne.objects.bulk_create(objets)
+        cumuler_marges(objets)
+        ouvrir_soldes([vente])
+
+    return vente
+
+
+def importer_ventes(entreprise, ventes):
+    """
+    Importe en une passe un lot de ventes (synchronisation POS hors ligne).
+
+    Coût constant quel que soit le nombre de ventes : une requête `IN` pour
+    les clients, une pour les produits (verrouillés le temps de l'import),
+    une pour leur stock dans les dépôts visés, une pour détecter les ventes
+    déjà importées, un UPDATE groupé par dépôt pour le stock et trois
+    `bulk_create` (ventes, lignes, mouvements de stock).
+
+    Chaque vente est acceptée ou rejetée individuellement. Une vente dont
+    l'`id` (généré par le client) existe déjà est signalée "existante" et
+    ignorée : rejouer un lot est donc sans effet.
+
+    Args:
+        entreprise: Entreprise propriétaire
+        ventes (list): Ventes validées {id, client, statut, depot (optionnel,
+            défaut: dépôt principal), lignes}, où chaque ligne est {produit_id,
+            quantite, prix_unitaire (optionnel, défaut: prix du produit),
+            unite (optionnel)}
+
+    Returns:
+        list: Un résultat par vente, dans l'ordre reçu
+            {"id": str, "resultat": "creee" | "existante" | "rejetee", "erreurs": ...}
+    """
+    for vente in ventes:
+        vente.setdefault("id", uuid.uuid4())
+    lot = _referentiels_lot(entreprise, ventes)
+
+    resultats = []
+    a_creer, lignes_a_creer, mouvements = [], [], []
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+
+    with transaction.atomic():
+        existantes = _verrouiller_lot(entreprise, ventes, lot)
+        vus = set()
+
+        for vente in ventes:
+            vente_id = vente["id"]
+            resultat = {"id": str(vente_id)}
+            resultats.append(resultat)
+
+            if (
+                vente_id in vus
+                or existantes.get(vente_id, entreprise.pk) != entreprise.pk
+            ):
+                resultat.update(
+                    resultat="rejetee", erreurs="Identifiant de vente déjà utilisé."
+                )
+                continue
+            vus.add(vente_id)
+            if vente_id in existantes:
+                resultat["resultat"] = "existante"
+                continue
+
+            try:
+                depot_id, lignes, demande = _valider_vente_du_lot(vente, lot)
+            except _VenteRejetee as exc:
+                resultat.update(resultat="rejetee", erreurs=exc.erreurs)
+                continue
+
+            for pk, q in demande.items():
+                lot["disponibles"][(depot_id, pk)] -= q
+                deltas[depot_id][pk] += q
+
+            objet, objets_lignes = construire_vente(
+                entreprise,
+                vente["statut"],
+                lignes,
+                id=vente_id,
+                client_id=vente["client"],
+                depot_id=depot_id,
+            )
+            a_creer.append(objet)
+            lignes_a_creer.extend(objets_lignes)
+            mouvements.extend(
+                construire_mouvements(
+                    entreprise.pk,
+                    "vente",
+                    {pk: -q for pk, q in demande.items()},
+                    vente_id,
+                    depot_id=depot_id,
+                )
+            )
+            resultat["resultat"] = "creee"
+
+        _ecrire_lot(deltas, a_creer, lignes_a_creer, mouvements)
+
+    return resultats
+
+
+class _VenteRejetee(Exception):
+    """Vente d'un lot refusée ; `erreurs` est renvoyé tel quel dans son résultat."""
+
+    def __init__(self, erreurs):
+        self.erreurs = erreurs
+        super().__init__(erreurs)
+
+
+def _referentiels_lot(entreprise, ventes):
+    """
+    Clients et dépôts de l'entreprise cités par le lot (hors transaction).
+
+    Returns:
+        dict: {"clients": set, "principal": UUID, "depots": set,
+        "produit_ids": set}, complété par `_verrouiller_lot`
+    """
+    client_ids = {vente["client"] for vente in ventes}
+    principal = depot_principal(entreprise.pk)
+    depot_ids = {vente.get("depot") or principal for vente in ventes}
+    return {
+        "clients": set(
+            Partner.objects.filter(
+                entreprise=entreprise, type="client", pk__in=client_ids
+            ).values_list("pk", flat=True)
+        ),
+        "principal": principal,
+        "depots": {principal}
+        | set(
+            Depot.objects.filter(
+                entreprise=entreprise, pk__in=depot_ids - {principal}
+            ).values_list("pk", flat=True)
+        ),
+        "produit_ids": {
+            ligne["produit_id"] for vente in ventes for ligne in vente["lignes"]
+        },
+    }
+
+
+def _verrouiller_lot(entreprise, ventes, lot):
+    """
+    Verrouille les produits du lot et lit leur stock dans les dépôts visés.
+
+    Les produits sont verrouillés avant de chercher les doublons : deux
+    rejeux concurrents du même lot sont ainsi sérialisés. Ajoute
+    `produits` et `disponibles` ({(depot_id, produit_id): quantite}) à `lot`.
+
+    Returns:
+        dict: {vente_id: entreprise_id} des ventes du lot déjà enregistrées
+    """
+    lot["produits"] = (
+        Produit.objects.select_for_update()
+        .filter(entreprise=entreprise, pk__in=lot["produit_ids"])
+        .in_bulk()
+    )
+    existantes = dict(
+        Vente.objects.filter(pk__in=[vente["id"] for vente in ventes]).values_list(
+            "pk", "entreprise_id"
+        )
+    )
+    stocks = (
+        StockDepot.objects.select_for_update()
+        .filter(depot_id__in=lot["depots"], produit_id__in=list(lot["produits"]))
+        .values_list("depot_id", "produit_id", "quantite")
+    )
+    lot["disponibles"] = defaultdict(
+        Decimal,
+        {(depot_id, produit_id): quantite for depot_id, produit_id, quantite in stocks},
+    )
+    return existantes
+
+
+def _valider_vente_du_lot(vente, lot):
+    """
+    Vérifie une vente du lot : client, dépôt, produits, unités et stock.
+
+    Une ligne sans prix prend le prix du produit, comme `VenteSerializer`.
+
+    Returns:
+        tuple: (depot_id, lignes prêtes pour `construire_vente`,
+        {produit_id: quantite demandée})
+
+    Raises:
+        _VenteRejetee: Au premier contrôle qui échoue
+    """
+    if vente["client"] not in lot["clients"]:
+        raise _VenteRejetee({"client": "Client invalide pour cette entreprise."})
+
+    depot_id = vente.get("depot") or lot["principal"]
+    if depot_id not in lot["depots"]:
+        raise _VenteRejetee({"depot": "Dépôt invalide pour cette entreprise."})
+
+    produits = lot["produits"]
+    inconnus = [
+        str(ligne["produit_id"])
+        for ligne in vente["lignes"]
+        if ligne["produit_id"] not in produits
+    ]
+    if inconnus:
+        raise _VenteRejetee(
+            {"items": f"Produit(s) invalide(s) : {', '.join(inconnus)}."}
+        )
+
+    lignes = []
+    for ligne in vente["lignes"]:
+        produit = produits[ligne["produit_id"]]
+        prix = ligne.get("prix_unitaire")
+        lignes.append(
+            {
+                "produit": produit,
+                "quantite": ligne["quantite"],
+                "prix_unitaire": produit.prix if prix is None else prix,
+                "unite": ligne.get("unite"),
+            }
+        )
+    try:
+        convertir_quantites(lignes)
+    except ValueError as exc:
+        raise _VenteRejetee({"items": str(exc)})
+
+    demande = quantites_par_produit(lignes)
+    ruptures = [
+        produits[pk].nom
+        for pk, q in demande.items()
+        if lot["disponibles"][(depot_id, pk)] < q
+    ]
+    if ruptures:
+        raise _VenteRejetee(f"Stock insuffisant : {', '.join(ruptures)}.")
+    return depot_id, lignes, demande
+
+
+def _ecrire_lot(deltas, ventes, lignes, mouvements):
+    """Écrit les ventes acceptées d'un lot : stock, ventes, lignes, coûts, soldes."""
+    for depot_id, quantites in deltas.items():
+        decrement_stock_bulk(dict(quantites), depot_id)
+    Vente.objects.bulk_create(ventes, batch_size=1000)
+    figer_couts(lignes, journaliser(mouvements))
+    VenteLigne.objects.bulk_create(lignes, batch_size=1000)
+    cumuler_marges(lignes)
+    ouvrir_soldes(ventes)
+    reporter_ventes(ventes)
+
+
+def restaurer_stock_ventes(ventes):
+    """
+    Réintègre en une passe les quantités de plusieurs ventes annulées.
+
+    Une requête pour les lignes, un UPDATE groupé par dépôt (quantités
+    cumulées par produit), un `bulk_create` pour les mouvements
+    "annulation" (un par vente et produit, pour la valorisation) et une
+    mise à jour groupée des marges.
+
+    A appeler dans la transaction qui change le statut des ventes.
+
+    Args:
+        ventes (list[Vente]): Ventes annulées ou remboursées (même entreprise)
+    """
+    if not ventes:
+        return
+    par_id = {vente.pk: vente for vente in ventes}
+    lignes = list(VenteLigne.objects.filter(vente_id__in=list(par_id)))
+    quantites = defaultdict(lambda: defaultdict(Decimal))
+    for ligne in lignes:
+        ligne.vente = par_id[ligne.vente_id]
+        quantites[ligne.vente_id][ligne.produit_id] += ligne.quantite
+    for vente in ventes:
+        if vente.pk not in quantites and vente.produit_id and vente.quantite:
+            # Vente antérieure aux lignes, créée hors API.
+            quantites[vente.pk][vente.produit_id] = vente.quantite
+
+    principal = None
+    par_depot = defaultdict(lambda: defaultdict(Decimal))
+    mouvements = []
+    for vente_id, produits in quantites.items():
+        vente = par_id[vente_id]
+        depot_id = vente.depot_id
+        if depot_id is None:
+            principal = principal or depot_principal(vente.entreprise_id)
+            depot_id = principal
+        for produit_id, quantite in produits.items():
+            par_depot[depot_id][produit_id] += quantite
+        mouvements.extend(
+            construire_mouvements(
+                vente.entreprise_id, "annulation", produits, vente_id, depot_id=depot_id
+            )
+        )
+
+    for depot_id, produits in par_depot.items():
+        increment_stock_bulk(dict(produits), depot_id)
+    journaliser(mouvements)
+    cumuler_marges(lignes, signe=-1)
+
+
+# Changements de statut autorisés : {cible: statuts d'origine}. Une vente
+# annulée ou remboursée ne change plus de statut ; "paiement_partiel" n'est
+# atteint que par un paiement (`enregistrer_paiement`), "rembourse" que par
+# un retour total (`retourner_vente`).
+TRANSITIONS_STATUT = {
+    "payee": {"en_attente", "paiement_partiel"},
+    "annulee": {"en_attente", "payee", "paiement_partiel"},
+    "rembourse": {"en_attente", "payee", "paiement_partiel"},
+}
+
+# Statuts cibles traités par `changer_statut_ventes`
+STATUTS_GROUPES = ("payee", "annulee")
+
+
+def changer_statut_ventes(entreprise, vente_ids, statut):
+    """
+    Fait passer un lot de ventes au même statut (payée ou annulée).
+
+    Les ventes sont lues et verrouillées en une requête, les transitions
+    vérifiées en Python (`TRANSITIONS_STATUT`), puis les ventes valides
+    changent de statut par un seul UPDATE. Dans la même transaction, une
+    vente payée reçoit le paiement de son reste (`solder_ventes`) ; une
+    annulation restaure le stock (`restaurer_stock_ventes`) et annule la
+    créance (`annuler_soldes`). Les agrégats des jours des ventes sont
+    reconstruits et le cache analytics de l'entreprise invalidé au commit.
+
+    Args:
+        entreprise: Entreprise propriétaire
+        vente_ids (list): UUID des ventes
+        statut (str): Statut cible (`STATUTS_GROUPES`)
+
+    Returns:
+        list: Un résultat par identifiant, dans l'ordre reçu
+            {"id": str, "resultat": "modifiee" | "inchangee" | "rejetee" |
+            "introuvable", "erreurs": ...}
+
+    Raises:
+        ValueError: Statut cible hors de `STATUTS_GROUPES`
+    """
+    if statut not in STATUTS_GROUPES:
+        raise ValueError(f"Statut cible non pris en charge : {statut}.")
+    origines = TRANSITIONS_STATUT[statut]
+    resultats, a_modifier = [], {}
+
+    with transaction.atomic():
+        ventes = (
+            Vente.objects.select_for_update()
+            .filter(entreprise=entreprise, pk__in=vente_ids)
+            .in_bulk()
+        )
+        for vente_id in vente_ids:
+            resultat = {"id": str(vente_id)}
+            resultats.append(resultat)
+            vente = ventes.get(vente_id)
+            if vente is None:
+                resultat["resultat"] = "introuvable"
+            elif vente.statut == statut or vente_id in a_modifier:
+                resultat["resultat"] = "inchangee"
+            elif vente.statut not in origines:
+                resultat.update(
+                    resultat="rejetee",
+                    erreurs=f"Transition {vente.statut} -> {statut} non autorisée.",
+                )
+            else:
+                a_modifier[vente_id] = vente
+                resultat["resultat"] = "modifiee"
+
+        if a_modifier:
+            Vente.objects.filter(pk__in=list(a_modifier)).update(
+                statut=statut, updated_at=timezone.now()
+            )
+            if statut == "payee":
+                solder_ventes(list(a_modifier.values()))
+            else:
+                restaurer_stock_ventes(list(a_modifier.values()))
+                annuler_soldes(list(a_modifier.values()))
+            reporter_ventes(a_modifier.values())
+            invalider_analytics(entreprise.pk)
+
+    return resultats
+
+
+def supprimer_vente(vente_id):
+    """
+    Supprime une vente, ses lignes et ses paiements.
+
+    Dans la même transaction, les soldes du client sont diminués de ce que
+    la vente a encaissé et de ce qu'elle restait devoir (`retirer_soldes`),
+    et ses lignes sont retranchées de `FaitMargeJour` (sauf vente annulée :
+    l'annulation les a déjà retranchées).
+
+    Args:
+        vente_id: UUID de la vente
+    """
+    with transaction.atomic():
+        vente = Vente.objects.select_for_update().get(pk=vente_id)
+        retirer_soldes(vente)
+        if vente.statut != "annulee":
+            lignes = list(VenteLigne.objects.filter(vente_id=vente.pk))
+            for ligne in lignes:
+                ligne.vente = vente
+            cumuler_marges(lignes, signe=-1)
+        vente.delete()
+
+
+def figer_couts(lignes, couts_vente):
+    """
+    Fige sur chaque ligne le coût unitaire FIFO de sa vente.
+
+    Args:
+        lignes (list[VenteLigne]): Lignes non sauvegardées
+        couts_vente (list[CoutVente]): Coûts retournés par la valorisation
+    """
+    unitaires = {
+        (cout.vente_id, cout.produit_id): cout.cout_fifo / cout.quantite
+        for cout in couts_vente
+        if cout.quantite
+    }
+    for ligne in lignes:
+        unitaire = unitaires.get((ligne.vente_id, ligne.produit_id))
+        if unitaire is not None:
+            ligne.cout_unitaire = unitaire.quantize(PRECISION)
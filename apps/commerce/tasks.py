@@ -0,0 +1,46 @@
+"""
+Tasks Celery de l'app commerce.
+"""
+
+import logging
+
+from celery import shared_task
+
+from .services import alertes, mouvements
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3)
+def creer_points_stock(self):
+    """
+    Crée les points de stock quotidiens (produits ayant bougé depuis leur
+    dernier point).
+
+    Returns:
+        dict: {"status": "success", "created_count": int}
+    """
+    try:
+        created = mouvements.creer_points_stock()
+        logger.info(f"Points de stock: {created} créés.")
+        return {"status": "success", "created_count": created}
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=5**self.request.retries)
+
+
+@shared_task(bind=True, max_retries=3)
+def notifier_stocks_bas(self):
+    """
+    Envoie le récapitulatif quotidien des produits à réapprovisionner.
+
+    Une requête groupée par entreprise (seuil et jours de couverture) et
+    un seul envoi d'e-mails pour toutes les entreprises.
+
+    Returns:
+        dict: {"status": "success", "entreprises": int, "produits": int}
+    """
+    try:
+        resultat = alertes.notifier_stocks_bas()
+        return {"status": "success", **resultat}
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=5**self.request.retries)
@@ -1 +1,459 @@
-# Create your tests here.
+import uuid
+from decimal import Decimal
+
+from rest_framework.test import APIClient
+
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import Role, User
+from apps.analytics.models import FaitMargeJour
+from apps.commerce.models import (
+    Depot,
+    MouvementStock,
+    Paiement,
+    Produit,
+    RetourLigne,
+    StockDepot,
+    Vente,
+    VenteLigne,
+)
+from apps.commerce.services.depots import depot_principal
+from apps.commerce.services.paiements import (
+    PaiementRefuseError,
+    enregistrer_paiement,
+)
+from apps.commerce.services.retours import retourner_vente
+from apps.commerce.services.stock import (
+    StockInsuffisantError,
+    decrement_stock_bulk,
+    increment_stock,
+    increment_stock_bulk,
+    transferer_stock_bulk,
+)
+from apps.partners.models import Partner
+from apps.tenants.models import Entreprise
+
+CACHE_LOCAL = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class CommerceTestCase(TestCase):
+    """
+    Entreprise avec un administrateur, un client et deux produits en stock.
+
+    P1 (prix 10) et P2 (prix 4) ont chacun 10 unités au dépôt principal.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.entreprise = Entreprise.objects.create(
+            nom="E", secteur="commerce", type="boutique", adresse="Bujumbura"
+        )
+        cls.user = User.objects.create_user(
+            email="admin@e.bi",
+            password="x",
+            nom="Admin",
+            prenom="E",
+            role=Role.objects.create(nom="ADMIN"),
+            entreprise=cls.entreprise,
+        )
+        cls.client_ = Partner.objects.create(
+            entreprise=cls.entreprise, type="client", nom="C", email="c@e.bi"
+        )
+        cls.depot_id = depot_principal(cls.entreprise.pk)
+        cls.p1, cls.p2 = [
+            Produit.objects.create(
+                entreprise=cls.entreprise, nom=nom, categorie="c", prix=prix
+            )
+            for nom, prix in (("P1", 10), ("P2", 4))
+        ]
+        for produit in (cls.p1, cls.p2):
+            increment_stock(produit.pk, 10, cls.depot_id)
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def stock(self, produit, depot_id=None):
+        """(stock du dépôt, stock total) du produit."""
+        depot = StockDepot.objects.filter(
+            produit=produit, depot_id=depot_id or self.depot_id
+        ).first()
+        total = Produit.objects.values_list("quantite", flat=True).get(pk=produit.pk)
+        return (depot.quantite if depot else Decimal(0), total)
+
+    def vendre(self, items, statut="en_attente"):
+        """Crée une vente par l'API et renvoie sa représentation."""
+        reponse = self.api.post(
+            "/api/ventes/",
+            {
+                "client": str(self.client_.pk),
+                "statut": statut,
+                "items": [
+                    {"produit": str(produit.pk), "quantite": quantite}
+                    for produit, quantite in items
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(reponse.status_code, 201, reponse.content)
+        return reponse.data
+
+
+class MoteurStockTests(CommerceTestCase):
+    """Décréments, incréments et transferts groupés : tout ou rien."""
+
+    def test_decrement_groupe(self):
+        decrement_stock_bulk(
+            {self.p1.pk: Decimal(3), self.p2.pk: Decimal(1)}, self.depot_id
+        )
+        self.assertEqual(self.stock(self.p1), (7, 7))
+        self.assertEqual(self.stock(self.p2), (9, 9))
+
+    def test_decrement_insuffisant_ne_touche_aucun_produit(self):
+        with self.assertRaises(StockInsuffisantError) as erreur:
+            decrement_stock_bulk(
+                {self.p1.pk: Decimal(3), self.p2.pk: Decimal(11)}, self.depot_id
+            )
+        self.assertEqual(erreur.exception.produit_id, self.p2.pk)
+        self.assertEqual(erreur.exception.disponible, 10)
+        self.assertEqual(self.stock(self.p1), (10, 10))
+        self.assertEqual(self.stock(self.p2), (10, 10))
+
+    def test_increment_cree_la_ligne_du_depot(self):
+        reserve = Depot.objects.create(entreprise=self.entreprise, nom="Réserve")
+        increment_stock_bulk({self.p1.pk: Decimal("2.5")}, reserve.pk)
+        self.assertEqual(
+            self.stock(self.p1, reserve.pk), (Decimal("2.5"), Decimal("12.5"))
+        )
+
+    def test_transfert_insuffisant_ne_touche_aucun_depot(self):
+        reserve = Depot.objects.create(entreprise=self.entreprise, nom="Réserve")
+        with self.assertRaises(StockInsuffisantError):
+            transferer_stock_bulk(
+                {self.p1.pk: Decimal(4), self.p2.pk: Decimal(12)},
+                self.depot_id,
+                reserve.pk,
+            )
+        self.assertEqual(self.stock(self.p1), (10, 10))
+        self.assertEqual(self.stock(self.p1, reserve.pk), (0, 10))
+
+    def test_transfert_garde_le_total(self):
+        reserve = Depot.objects.create(entreprise=self.entreprise, nom="Réserve")
+        transferer_stock_bulk({self.p1.pk: Decimal(4)}, self.depot_id, reserve.pk)
+        self.assertEqual(self.stock(self.p1), (6, 10))
+        self.assertEqual(self.stock(self.p1, reserve.pk), (4, 10))
+
+
+class VenteStockTests(CommerceTestCase):
+    """Stock décrémenté à la vente et restauré à l'annulation."""
+
+    def test_produit_repete_dans_une_vente(self):
+        self.vendre([(self.p1, 2), (self.p1, 3), (self.p2, 1)])
+        self.assertEqual(self.stock(self.p1), (5, 5))
+        self.assertEqual(self.stock(self.p2), (9, 9))
+
+    def test_vente_insuffisante_ne_decremente_rien(self):
+        reponse = self.api.post(
+            "/api/ventes/",
+            {
+                "client": str(self.client_.pk),
+                "statut": "en_attente",
+                "items": [
+                    {"produit": str(self.p1.pk), "quantite": 6},
+                    {"produit": str(self.p1.pk), "quantite": 6},
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(reponse.status_code, 400, reponse.content)
+        self.assertEqual(self.stock(self.p1), (10, 10))
+        self.assertFalse(Vente.objects.exists())
+
+    def test_annulation_restaure_le_stock(self):
+        vente = self.vendre([(self.p1, 2), (self.p1, 3), (self.p2, 1)])
+        reponse = self.api.patch(f"/api/ventes/{vente['id']}/mark_cancelled/")
+        self.assertEqual(reponse.status_code, 200, reponse.content)
+        self.assertEqual(self.stock(self.p1), (10, 10))
+        self.assertEqual(self.stock(self.p2), (10, 10))
+        self.assertEqual(
+            sorted(
+                MouvementStock.objects.filter(
+                    reference=vente["id"], type="annulation"
+                ).values_list("quantite", flat=True)
+            ),
+            [1, 5],
+        )
+
+    def test_prix_du_produit_par_defaut(self):
+        for donnees in (
+            {"produit": str(self.p1.pk), "quantite": 2},
+            {"items": [{"produit": str(self.p1.pk), "quantite": 2}]},
+        ):
+            reponse = self.api.post(
+                "/api/ventes/",
+                {"client": str(self.client_.pk), "statut": "payee", **donnees},
+                format="json",
+            )
+            self.assertEqual(reponse.status_code, 201, reponse.content)
+            self.assertEqual(Decimal(reponse.data["prix_vente"]), 20)
+
+    def test_double_annulation_refusee(self):
+        vente = self.vendre([(self.p1, 2)])
+        self.api.patch(f"/api/ventes/{vente['id']}/mark_cancelled/")
+        reponse = self.api.patch(f"/api/ventes/{vente['id']}/mark_cancelled/")
+        self.assertEqual(reponse.status_code, 400, reponse.content)
+        self.assertEqual(self.stock(self.p1), (10, 10))
+
+
+class ImportVentesTests(CommerceTestCase):
+    """Import d'un lot de ventes : un résultat par vente, rejeu sans effet."""
+
+    def importer(self, ventes):
+        reponse = self.api.post("/api/ventes/bulk/", ventes, format="json")
+        self.assertEqual(reponse.status_code, 200, reponse.content)
+        return reponse.data
+
+    def lot(self):
+        """Lot de quatre ventes : deux valides, un client inconnu, une rupture."""
+        client = str(self.client_.pk)
+        return [
+            {
+                "id": str(uuid.uuid4()),
+                "client": client,
+                "statut": "payee",
+                "items": [
+                    {"produit": str(self.p1.pk), "quantite": 2},
+                    {"produit": str(self.p1.pk), "quantite": 1},
+                ],
+            },
+            {
+                "id": str(uuid.uuid4()),
+                "client": str(uuid.uuid4()),
+                "statut": "payee",
+                "produit": str(self.p2.pk),
+                "quantite": 1,
+            },
+            {
+                "id": str(uuid.uuid4()),
+                "client": client,
+                "statut": "en_attente",
+                "produit": str(self.p2.pk),
+                "quantite": 3,
+            },
+            {
+                "id": str(uuid.uuid4()),
+                "client": client,
+                "statut": "payee",
+                "produit": str(self.p1.pk),
+                "quantite": 8,
+            },
+        ]
+
+    def test_resultat_par_vente(self):
+        lot = self.lot()
+        reponse = self.importer(lot)
+
+        self.assertEqual(
+            (reponse["creees"], reponse["existantes"], reponse["rejetees"]), (2, 0, 2)
+        )
+        self.assertEqual(
+            [(r["index"], r["id"], r["resultat"]) for r in reponse["resultats"]],
+            [
+                (0, lot[0]["id"], "creee"),
+                (1, lot[1]["id"], "rejetee"),
+                (2, lot[2]["id"], "creee"),
+                (3, lot[3]["id"], "rejetee"),
+            ],
+        )
+        self.assertIn("client", reponse["resultats"][1]["erreurs"])
+        self.assertIn("Stock insuffisant", reponse["resultats"][3]["erreurs"])
+        self.assertEqual(self.stock(self.p1), (7, 7))
+        self.assertEqual(self.stock(self.p2), (7, 7))
+
+    def test_prix_du_produit_par_defaut(self):
+        lot = self.lot()
+        self.importer(lot)
+        self.assertEqual(
+            VenteLigne.objects.get(vente_id=lot[2]["id"]).prix_unitaire, self.p2.prix
+        )
+
+    def test_rejeu_du_lot_sans_effet(self):
+        lot = self.lot()
+        self.importer(lot)
+        reponse = self.importer(lot)
+
+        self.assertEqual(
+            [r["resultat"] for r in reponse["resultats"]],
+            ["existante", "rejetee", "existante", "rejetee"],
+        )
+        self.assertEqual(Vente.objects.count(), 2)
+        self.assertEqual(self.stock(self.p1), (7, 7))
+        self.assertEqual(self.stock(self.p2), (7, 7))
+        self.assertEqual(MouvementStock.objects.filter(type="vente").count(), 2)
+
+
+class PaiementTests(CommerceTestCase):
+    """Paiements d'une vente et soldes dénormalisés (vente et client)."""
+
+    def soldes(self, vente_id):
+        """((payé, reste) de la vente, (payé, reste) du client)."""
+        return (
+            Vente.objects.values_list("montant_paye", "reste_a_payer").get(pk=vente_id),
+            Partner.objects.values_list("montant_paye", "reste_a_payer").get(
+                pk=self.client_.pk
+            ),
+        )
+
+    def test_vente_payee_a_la_creation(self):
+        vente = self.vendre([(self.p1, 2)], statut="payee")
+        self.assertEqual(self.soldes(vente["id"]), ((20, 0), (20, 0)))
+        self.assertEqual(
+            list(Paiement.objects.values_list("vente_id", "montant")),
+            [(uuid.UUID(vente["id"]), 20)],
+        )
+
+    def test_paiement_partiel_puis_solde(self):
+        vente = self.vendre([(self.p1, 2)])
+        self.assertEqual(self.soldes(vente["id"]), ((0, 20), (0, 20)))
+
+        enregistrer_paiement(vente["id"], Decimal("5"))
+        self.assertEqual(Vente.objects.get(pk=vente["id"]).statut, "paiement_partiel")
+        self.assertEqual(self.soldes(vente["id"]), ((5, 15), (5, 15)))
+
+        enregistrer_paiement(vente["id"], Decimal("15"))
+        self.assertEqual(Vente.objects.get(pk=vente["id"]).statut, "payee")
+        self.assertEqual(self.soldes(vente["id"]), ((20, 0), (20, 0)))
+
+    def test_soldes_du_client_sur_plusieurs_ventes(self):
+        premiere = self.vendre([(self.p1, 2)])
+        seconde = self.vendre([(self.p2, 1)])
+        enregistrer_paiement(premiere["id"], Decimal("8"))
+        enregistrer_paiement(seconde["id"], Decimal("4"))
+        self.assertEqual(self.soldes(premiere["id"]), ((8, 12), (12, 12)))
+        self.assertEqual(self.soldes(seconde["id"]), ((4, 0), (12, 12)))
+
+    def test_paiement_superieur_au_reste_refuse(self):
+        vente = self.vendre([(self.p1, 2)])
+        with self.assertRaises(PaiementRefuseError):
+            enregistrer_paiement(vente["id"], Decimal("20.01"))
+        self.assertFalse(Paiement.objects.exists())
+        self.assertEqual(self.soldes(vente["id"]), ((0, 20), (0, 20)))
+
+    def test_paiement_refuse_sur_vente_annulee(self):
+        vente = self.vendre([(self.p1, 2)])
+        self.api.patch(f"/api/ventes/{vente['id']}/mark_cancelled/")
+        reponse = self.api.post(
+            f"/api/ventes/{vente['id']}/paiements/", {"montant": "5"}, format="json"
+        )
+        self.assertEqual(reponse.status_code, 400, reponse.content)
+        self.assertEqual(self.soldes(vente["id"]), ((0, 0), (0, 0)))
+
+    def test_paiement_par_l_api(self):
+        vente = self.vendre([(self.p1, 2)])
+        reponse = self.api.post(
+            f"/api/ventes/{vente['id']}/paiements/",
+            {"montant": "7.50", "mode": "mobile_money"},
+            format="json",
+        )
+        self.assertEqual(reponse.status_code, 201, reponse.content)
+        self.assertEqual(
+            self.soldes(vente["id"]),
+            ((Decimal("7.50"), Decimal("12.50")), (Decimal("7.50"), Decimal("12.50"))),
+        )
+
+
+class RetourTests(CommerceTestCase):
+    """Retours partiels : lignes, stock, soldes et agrégat de marge."""
+
+    def vente(self, pk):
+        return Vente.objects.get(pk=pk)
+
+    def test_retour_partiel(self):
+        vente = self.vendre([(self.p1, 5)])
+        retour = retourner_vente(vente["id"], {self.p1.pk: Decimal(2)})
+
+        self.assertEqual((retour.montant, retour.montant_rembourse), (20, 0))
+        apres = self.vente(vente["id"])
+        self.assertEqual(apres.statut, "en_attente")
+        self.assertEqual((apres.prix_vente, apres.reste_a_payer), (30, 30))
+        self.assertEqual(
+            VenteLigne.objects.get(vente_id=vente["id"]).quantite, Decimal(3)
+        )
+        self.assertEqual(self.stock(self.p1), (7, 7))
+
+    def test_retour_reparti_sur_plusieurs_lignes(self):
+        vente = self.vendre([(self.p1, 2), (self.p1, 3), (self.p2, 1)])
+        retour = retourner_vente(vente["id"], {self.p1.pk: Decimal(4)})
+
+        self.assertEqual(
+            list(
+                RetourLigne.objects.filter(retour=retour)
+                .order_by("vente_ligne__created_at", "vente_ligne_id")
+                .values_list("quantite", "montant")
+            ),
+            [(2, 20), (2, 20)],
+        )
+        self.assertEqual(
+            sorted(
+                VenteLigne.objects.filter(
+                    vente_id=vente["id"], produit=self.p1
+                ).values_list("quantite", flat=True)
+            ),
+            [0, 1],
+        )
+        self.assertEqual(self.stock(self.p1), (9, 9))
+        self.assertEqual(self.vente(vente["id"]).prix_vente, 14)
+
+    def test_remboursement_d_une_vente_payee(self):
+        vente = self.vendre([(self.p1, 2)], statut="payee")
+        retour = retourner_vente(vente["id"], {self.p1.pk: Decimal(1)})
+
+        self.assertEqual((retour.montant, retour.montant_rembourse), (10, 10))
+        self.assertEqual(
+            list(
+                Paiement.objects.filter(vente_id=vente["id"])
+                .order_by("montant")
+                .values_list("montant", flat=True)
+            ),
+            [-10, 20],
+        )
+        apres = self.vente(vente["id"])
+        self.assertEqual(apres.statut, "payee")
+        self.assertEqual((apres.montant_paye, apres.reste_a_payer), (10, 0))
+        self.assertEqual(
+            Partner.objects.values_list("montant_paye", "reste_a_payer").get(
+                pk=self.client_.pk
+            ),
+            (10, 0),
+        )
+
+    def test_credit_solde_d_abord_le_reste_a_payer(self):
+        vente = self.vendre([(self.p1, 5)])
+        enregistrer_paiement(vente["id"], Decimal(40))
+        retour = retourner_vente(vente["id"], {self.p1.pk: Decimal(2)})
+
+        self.assertEqual((retour.montant, retour.montant_rembourse), (20, 10))
+        apres = self.vente(vente["id"])
+        self.assertEqual(apres.statut, "payee")
+        self.assertEqual((apres.montant_paye, apres.reste_a_payer), (30, 0))
+
+    def test_marge_du_jour_diminuee(self):
+        vente = self.vendre([(self.p1, 5)])
+        retourner_vente(vente["id"], {self.p1.pk: Decimal(2)})
+        self.assertEqual(
+            FaitMargeJour.objects.values_list("quantite", "chiffre_affaires").get(
+                produit=self.p1, client=self.client_
+            ),
+            (3, 30),
+        )
+
+    def test_retour_total(self):
+        vente = self.vendre([(self.p1, 2), (self.p2, 1)])
+        retourner_vente(vente["id"])
+        self.assertEqual(self.vente(vente["id"]).statut, "rembourse")
+        self.assertEqual(self.stock(self.p1), (10, 10))
+        self.assertEqual(self.stock(self.p2), (10, 10))
+        self.assertFalse(
+            FaitMargeJour.objects.exclude(quantite=0, chiffre_affaires=0).exists()
+        )
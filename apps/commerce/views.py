@@ -1,24 +1,72 @@
+import datetime
+from collections import Counter
+
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from apps.core.mixins import TenantQuerySetMixin
+from django.db import transaction
+from django.db.models import RestrictedError
+from django.utils import timezone
+
+from apps.core.filters import RechercheFilter
+from apps.core.mixins import (
+    ChangeFeedMixin,
+    ExpandQuerySetMixin,
+    IdempotencyMixin,
+    TenantQuerySetMixin,
+)
 from apps.core.permissions import (
     HasRolePermission,
     IsAuthenticatedAndTenant,
     IsReadOnly,
     IsSales,
 )
+from apps.core.serializers import QuantiteField, lire_date
 
-from .models import Categorie, Produit, Vente
+from .models import Categorie, Depot, Inventaire, Produit, StockDepot, Vente
 from .serializers import (
     CategorieSerializer,
+    ComptageSerializer,
+    DepotSerializer,
+    InventaireSerializer,
+    MouvementStockSerializer,
+    PaiementSerializer,
     ProduitSerializer,
+    RetourSerializer,
+    StockADateSerializer,
+    StockDepotSerializer,
+    TransfertSerializer,
+    VenteBulkSerializer,
+    VenteLigneSerializer,
     VenteSerializer,
+    VenteStatutBulkSerializer,
+)
+from .services.alertes import filtre_stock_bas
+from .services.depots import transferer
+from .services.inventaires import (
+    enregistrer_comptages,
+    lire_comptages_csv,
+    rapport_ecarts,
+    valider_inventaire,
 )
+from .services.mouvements import annoter_stock_a_date, stock_a_date
+from .services.paiements import PaiementRefuseError, enregistrer_paiement
+from .services.retours import RetourRefuseError, retourner_vente
+from .services.scan import scanner
+from .services.stock import StockInsuffisantError
+from .services.ventes import (
+    changer_statut_ventes,
+    importer_ventes,
+    supprimer_vente,
+)
+
+# Nombre maximal de ventes acceptées par `POST /api/ventes/bulk/`
+VENTES_BULK_MAX = 5000
 
 
 class CategorieViewSet(TenantQuerySetMixin, ModelViewSet):
@@ -95,7 +143,279 @@ class CategorieViewSet(TenantQuerySetMixin, ModelViewSet):
         return Categorie.objects.filter(entreprise=self.request.user.entreprise)
 
 
-class ProduitViewSet(TenantQuerySetMixin, ModelViewSet):
+class DepotViewSet(TenantQuerySetMixin, ModelViewSet):
+    """
+    API Endpoint pour gérer les dépôts (emplacements de stock).
+
+    Le stock de chaque produit est tenu par dépôt ; `Produit.quantite` reste
+    le stock total. Le dépôt principal est créé automatiquement et visé
+    par les ventes, entrées et ajustements qui ne précisent pas de dépôt.
+
+    Endpoints:
+    - GET/POST /api/depots/ : lister / créer
+    - PATCH/DELETE /api/depots/{id}/ : renommer / supprimer (refusé pour le
+      dépôt principal et pour un dépôt déjà utilisé)
+    - GET /api/depots/{id}/stock/ : stock de chaque produit dans le dépôt
+    - POST /api/depots/transferts/ : transférer du stock entre deux dépôts
+
+    Permissions: JWT requise. Role "sales" pour créer/modifier/transférer.
+    """
+
+    serializer_class = DepotSerializer
+    queryset = Depot.objects.all()
+    permission_classes = [
+        IsAuthenticatedAndTenant,
+        HasRolePermission,
+        IsAuthenticated,
+        IsSales | IsReadOnly,
+    ]
+    permission_module = "commerce"
+
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ["nom", "created_at"]
+    ordering = ["-principal", "nom"]
+
+    def perform_destroy(self, instance):
+        if instance.principal:
+            raise ValidationError("Le dépôt principal ne peut pas être supprimé.")
+        try:
+            with transaction.atomic():
+                instance.delete()
+        except RestrictedError:
+            raise ValidationError(
+                "Dépôt utilisé (stock, ventes ou mouvements) : suppression impossible."
+            )
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="stock",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated],
+    )
+    def stock(self, request, pk=None):
+        """
+        Stock de chaque produit dans le dépôt (lignes non nulles, par nom de produit).
+
+        Lecture par l'index `(depot, produit)`.
+        """
+        depot = self.get_object()
+        queryset = (
+            StockDepot.objects.filter(depot=depot)
+            .exclude(quantite=0)
+            .select_related("produit")
+            .order_by("produit__nom")
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = StockDepotSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(StockDepotSerializer(queryset, many=True).data)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="transferts",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated, IsSales],
+    )
+    def transferts(self, request):
+        """
+        Transférer du stock d'un dépôt à un autre.
+
+        ## Requête
+        ```json
+        {
+          "source": "<uuid dépôt>",
+          "destination": "<uuid dépôt>",
+          "items": [{"produit": "<uuid produit>", "quantite": 5}]
+        }
+        ```
+
+        Tout ou rien : un UPDATE conditionnel retire les quantités de la
+        source (400 si l'une manque), un autre les ajoute à la destination.
+        Le stock total des produits est inchangé ; le transfert est
+        journalisé (mouvements "transfert", de même `reference`).
+
+        ## Réponse (201)
+        `{"reference": "<uuid>", "source": ..., "destination": ...}`
+        """
+        serializer = TransfertSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        source = serializer.validated_data["source"]
+        destination = serializer.validated_data["destination"]
+        try:
+            reference = transferer(
+                source.entreprise_id,
+                source.pk,
+                destination.pk,
+                serializer.validated_data["quantites"],
+            )
+        except StockInsuffisantError as exc:
+            raise ValidationError(
+                {
+                    "items": f"Stock insuffisant dans {source.nom} "
+                    f"(disponible: {exc.disponible})."
+                }
+            )
+        return Response(
+            {
+                "reference": reference,
+                "source": source.pk,
+                "destination": destination.pk,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class InventaireViewSet(TenantQuerySetMixin, ModelViewSet):
+    """
+    API Endpoint pour les inventaires physiques (comptages de stock).
+
+    Une session vise un dépôt (défaut : dépôt principal). Les quantités
+    comptées sont chargées en lot, puis la validation passe tous les
+    écarts en ajustements dans une seule transaction.
+
+    Endpoints:
+    - GET/POST /api/inventaires/ : lister / ouvrir une session
+    - DELETE /api/inventaires/{id}/ : abandonner une session ouverte
+    - POST /api/inventaires/{id}/comptages/ : charger des comptages (JSON ou CSV)
+    - POST /api/inventaires/{id}/valider/ : figer les écarts et ajuster le stock
+    - GET /api/inventaires/{id}/ecarts/ : rapport d'écarts (aperçu tant
+      que la session est ouverte)
+
+    Permissions: JWT requise. Role "sales" pour ouvrir, compter et valider.
+    """
+
+    serializer_class = InventaireSerializer
+    queryset = Inventaire.objects.select_related("depot")
+    permission_classes = [
+        IsAuthenticatedAndTenant,
+        HasRolePermission,
+        IsAuthenticated,
+        IsSales | IsReadOnly,
+    ]
+    permission_module = "commerce"
+    http_method_names = ["get", "post", "delete", "head", "options"]
+
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ["depot", "statut"]
+    ordering_fields = ["created_at", "valide_le"]
+    ordering = ["-created_at"]
+
+    def perform_destroy(self, instance):
+        if instance.statut != "ouvert":
+            raise ValidationError("Un inventaire validé ne peut pas être supprimé.")
+        instance.delete()
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="comptages",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated, IsSales],
+    )
+    def comptages(self, request, pk=None):
+        """
+        Charger des quantités comptées dans une session ouverte.
+
+        ## Requête
+        JSON : `{"items": [{"produit": "<uuid>", "quantite": 12, "unite": "g"}]}`
+        (ou directement la liste), ou fichier CSV en multipart (champ
+        `fichier`, colonnes `produit;quantite;unite`).
+
+        Un produit déjà compté prend la nouvelle quantité ; un produit
+        présent sur plusieurs lignes du lot est additionné. Les lignes sont
+        écrites en une requête, sans journal d'audit par produit.
+
+        ## Réponse
+        `{"produits": <nombre de produits du lot>}`
+        """
+        inventaire = self.get_object()
+        if inventaire.statut != "ouvert":
+            raise ValidationError("Inventaire déjà validé.")
+
+        data = request.data
+        fichier = request.FILES.get("fichier")
+        if fichier is not None:
+            try:
+                data = {"items": lire_comptages_csv(fichier)}
+            except (ValueError, UnicodeDecodeError) as exc:
+                raise ValidationError({"fichier": str(exc)})
+        elif isinstance(data, list):
+            data = {"items": data}
+
+        serializer = ComptageSerializer(
+            data=data, context={"request": request, "inventaire": inventaire}
+        )
+        serializer.is_valid(raise_exception=True)
+        quantites = serializer.validated_data["quantites"]
+        if not enregistrer_comptages(inventaire.pk, quantites):
+            raise ValidationError("Inventaire déjà validé.")
+        return Response({"produits": len(quantites)}, status=status.HTTP_200_OK)
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="valider",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated, IsSales],
+    )
+    def valider(self, request, pk=None):
+        """
+        Valider la session : écarts figés et stock ajusté, tout ou rien.
+
+        Le stock système de toutes les lignes est lu en une requête, les
+        écarts sont appliqués au dépôt par deux UPDATE groupés et journalisés
+        (mouvements "ajustement" de `reference` l'inventaire).
+
+        ## Réponse
+        L'inventaire, avec `produits` (comptés) et `ajustes` (en écart).
+        """
+        inventaire = self.get_object()
+        resultat = valider_inventaire(inventaire.pk)
+        if resultat is None:
+            raise ValidationError("Inventaire déjà validé.")
+        inventaire.refresh_from_db()
+        return Response(
+            {**self.get_serializer(inventaire).data, **resultat},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="ecarts",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated],
+    )
+    def ecarts(self, request, pk=None):
+        """
+        Rapport d'écarts de la session.
+
+        `?tous=true` inclut les produits sans écart. Tant que la session est
+        ouverte, les écarts sont calculés sur le stock courant du dépôt.
+
+        ## Réponse
+        ```json
+        {
+          "inventaire": "<uuid>",
+          "statut": "valide",
+          "totaux": {"produits": 120, "ecarts": 7, "surplus": 2, "manquants": 5},
+          "lignes": [
+            {"produit": "<uuid>", "produit_nom": "Riz", "quantite_comptee": 8,
+             "quantite_systeme": 10, "ecart": -2}
+          ]
+        }
+        ```
+        """
+        inventaire = self.get_object()
+        tous = request.query_params.get("tous", "").lower() in ("1", "true", "oui")
+        rapport = rapport_ecarts(inventaire, tous=tous)
+        return Response(
+            {"inventaire": inventaire.pk, "statut": inventaire.statut, **rapport},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ProduitViewSet(ChangeFeedMixin, TenantQuerySetMixin, ModelViewSet):
     """
     API Endpoint pour gérer les produits en stock.
     Gère le catalogue avec stock, prix et unités de mesure.
@@ -107,6 +427,8 @@ class ProduitViewSet(TenantQuerySetMixin, ModelViewSet):
     Unités supportées: poids (t=1000, kg, g, mg),
     volume (hL=100, L, mL), longueur (m, cm, mm),
     unité (unite, paire, piece, carton).
+
+    Caisse: `GET /api/produits/scan/{code}/` (code-barres ou SKU).
     """
     serializer_class = ProduitSerializer
     permission_classes = [
@@ -119,11 +441,11 @@ class ProduitViewSet(TenantQuerySetMixin, ModelViewSet):
 
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        RechercheFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["categorie", "prix"]
-    search_fields = ["nom"]
+    search_fields = ["recherche"]
     ordering_fields = ["prix", "nom", "created_at"]
     ordering = ["nom"]
 
@@ -135,48 +457,232 @@ class ProduitViewSet(TenantQuerySetMixin, ModelViewSet):
 
         return Produit.objects.filter(entreprise=self.request.user.entreprise)
 
-    @action(detail=False, methods=['get'], url_path='en-stock')
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"scan/(?P<code>[^/]+)",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated],
+    )
+    def scan(self, request, code=None):
+        """
+        Produit portant un code-barres ou un SKU (lecture en caisse).
+
+        ## Endpoint
+        `GET /api/produits/scan/{code}/`
+
+        Lecture par index unique `(entreprise, code)`, puis servie depuis le
+        cache de l'entreprise (invalidé à chaque enregistrement d'un produit).
+        Le stock n'est pas renvoyé : `GET /api/produits/{id}/`.
+
+        ## Réponse
+        ```json
+        {"id": "...", "nom": "Savon", "categorie": "Hygiène", "prix": "1500.00",
+         "mesure": "piece", "code_barre": "6001234567890", "sku": "SAV-01"}
+        ```
+        404 si aucun produit de l'entreprise ne porte ce code.
+        """
+        produit = scanner(request.user.entreprise_id, code)
+        if produit is None:
+            raise NotFound("Aucun produit pour ce code.")
+        return Response(produit)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="low-stock",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated],
+    )
+    def low_stock(self, request):
+        """
+        Récupère les produits en stock bas (`quantite <= seuil_reappro`).
+
+        Lecture par l'index partiel `produit_stock_bas_idx` : seuls les
+        produits sous leur seuil sont parcourus. Les produits sans seuil
+        n'apparaissent jamais.
+        """
+        queryset = self.filter_queryset(self.get_queryset().filter(filtre_stock_bas()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="en-stock",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated],
+    )
     def in_stock(self, request):
         """
         Récupère les produits dont la quantité en stock n'est pas nulle.
+
+        Lecture par l'index partiel `produit_en_stock_idx`.
         """
-        queryset = self.get_queryset().filter(quantite__gt=0)
+        queryset = self.filter_queryset(self.get_queryset().filter(quantite__gt=0))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="stock-a-date",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated],
+    )
+    def stock_a_date(self, request):
+        """
+        Stock de chaque produit à une date passée.
+
+        ## Endpoint
+        `GET /api/produits/stock-a-date/?date=2026-01-31`
+
+        Une date seule désigne la fin de la journée. Calculé depuis le
+        dernier point de stock antérieur plus les mouvements suivants, sans
+        relire tout l'historique. Filtres, recherche et tri de la liste des
+        produits s'appliquent.
+
+        ## Réponse
+        ```json
+        {"next": null, "previous": null, "results": [
+          {"id": "...", "nom": "Farine de blé", "mesure": "kg", "quantite": 42.5}
+        ]}
+        ```
+        """
+        date = lire_date(request, "date", fin_de_journee=True)
+        if date is None:
+            raise ValidationError({"date": "Ce paramètre est obligatoire."})
+        queryset = annoter_stock_a_date(self.filter_queryset(self.get_queryset()), date)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = StockADateSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(StockADateSerializer(queryset, many=True).data)
+
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated],
+    )
+    def mouvements(self, request, pk=None):
+        """
+        Mouvements de stock d'un produit sur une période.
+
+        ## Endpoint
+        `GET /api/produits/{id}/mouvements/?depuis=2026-01-01&jusqu_a=2026-01-31`
+
+        Les deux bornes sont optionnelles et incluses. `solde_initial` est
+        le stock juste avant `depuis`, `solde_final` le stock à `jusqu_a`.
+        Les mouvements sont paginés du plus ancien au plus récent.
+
+        ## Réponse
+        ```json
+        {
+          "solde_initial": 10,
+          "solde_final": 7.5,
+          "next": null,
+          "previous": null,
+          "results": [
+            {"id": "...", "produit": "...", "type": "vente", "quantite": -2.5,
+             "reference": "<uuid vente>", "created_at": "2026-01-09T10:30:00Z"}
+          ]
+        }
+        ```
+        """
+        produit = self.get_object()
+        depuis = lire_date(request, "depuis")
+        jusqu_a = lire_date(request, "jusqu_a", fin_de_journee=True)
+
+        mouvements = produit.mouvements.order_by("created_at")
+        if depuis is not None:
+            mouvements = mouvements.filter(created_at__gte=depuis)
+        if jusqu_a is not None:
+            mouvements = mouvements.filter(created_at__lte=jusqu_a)
 
-class VenteViewSet(TenantQuerySetMixin, ModelViewSet):
+        initial = (
+            stock_a_date(produit.pk, depuis - datetime.timedelta(microseconds=1))
+            if depuis is not None
+            else 0
+        )
+        final = stock_a_date(produit.pk, jusqu_a or timezone.now())
+        champ = QuantiteField()
+        soldes = {
+            "solde_initial": champ.to_representation(initial),
+            "solde_final": champ.to_representation(final),
+        }
+        page = self.paginate_queryset(mouvements)
+        if page is not None:
+            response = self.get_paginated_response(
+                MouvementStockSerializer(page, many=True).data
+            )
+            response.data = {**soldes, **response.data}
+            return response
+        return Response(
+            {**soldes, "results": MouvementStockSerializer(mouvements, many=True).data}
+        )
+
+
+class VenteViewSet(
+    ExpandQuerySetMixin, IdempotencyMixin, TenantQuerySetMixin, ModelViewSet
+):
     """
     API Endpoint pour gérer les ventes.
 
     ## Description
     Ce viewset gère le cycle de vie complet des ventes :
-    - Création : une vente par combinaison (client, produit, entreprise)
-    - Gestion du stock : décrément lors de la vente
+    - Création : une vente mono-produit ou une commande multi-lignes (`items`)
+    - Gestion du stock : décrément lors de la vente (un UPDATE groupé par commande)
     - Changement de statut : en attente, payée, annulée, etc.
     - Restauration du stock en cas d'annulation
 
     ## Workflow
     1. **Créer une vente** : `POST /api/ventes/`
-       - Fournir `client`, `produit`, `quantite`, `prix_unitaire`, `statut`
-       - Le stock du produit est décrémenté automatiquement
+       - Fournir `client`, `statut` et soit `produit`/`quantite`/`prix_unitaire`,
+         soit `items` (liste de `produit`, `quantite`, `prix_unitaire`)
+       - Le stock des produits est décrémenté automatiquement
        - `prix_vente` (total) est calculé automatiquement
 
     2. **Consulter les ventes** : `GET /api/ventes/`
        - Filtres : `statut`, `client`, `produit`
        - Recherche : `client__nom`, `client__prenom`, `produit__nom`
        - Tri : `created_at`, `statut`, `prix_vente`
+       - `?fields=id,statut,prix_vente` : ne renvoyer que ces champs
+       - `?expand=client,produit` : inclure `client_detail` / `produit_detail`
+         (sinon seuls les UUID sont renvoyés)
 
     3. **Modifier une vente** : `PATCH /api/ventes/{id}/`
-       - Champs modifiables : `statut` (attention au stock lors du changement)
-       - `prix_vente` est auto-calculé
+       - Seul `statut` est modifiable, selon `TRANSITIONS_STATUT` : payée,
+         annulée (stock restauré) ou remboursée (retour total) ; une vente
+         annulée ou remboursée ne change plus de statut
 
     4. **Marquer comme payée** : `PATCH /api/ventes/{id}/mark_paid/`
        - Change le statut à "payee"
 
     5. **Annuler une vente** : `PATCH /api/ventes/{id}/mark_cancelled/`
        - Change le statut à "annulee"
-       - Restaure automatiquement le stock du produit
+       - Restaure automatiquement le stock de toutes les lignes
+
+    6. **Lignes d'une vente** : `GET /api/ventes/{id}/items/`
+
+    7. **Import d'un lot (POS hors ligne)** : `POST /api/ventes/bulk/`
+       - Jusqu'à 5000 ventes, `id` client optionnel pour un rejeu idempotent
+
+    8. **Changement de statut en lot** : `PATCH /api/ventes/bulk-status/`
+       - `{"ids": [...], "statut": "payee" | "annulee"}`, résultat par vente
+
+    9. **Paiements** : `GET/POST /api/ventes/{id}/paiements/`
+       - Paiements partiels ; `montant_paye` / `reste_a_payer` tenus sur la vente
+
+    10. **Retours** : `GET/POST /api/ventes/{id}/retours/`
+       - Retour total ou partiel : stock réintégré, lignes et marges diminuées,
+         créance réduite puis excédent remboursé (paiement négatif)
+
+    11. **Supprimer une vente** : `DELETE /api/ventes/{id}/`
+       - Lignes et paiements supprimés, soldes du client corrigés
 
     ## Permissions
     - Authentification requise (JWT)
@@ -221,20 +727,335 @@ class VenteViewSet(TenantQuerySetMixin, ModelViewSet):
 
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        RechercheFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["statut", "client", "produit"]
-    search_fields = ["client__nom", "client__prenom", "produit__nom"]
+    search_fields = ["client__recherche", "lignes__produit__recherche"]
     ordering_fields = ["created_at", "statut", "prix_vente"]
     ordering = ["-created_at"]
 
+    def perform_destroy(self, instance):
+        # Les paiements partent avec la vente : soldes du client corrigés.
+        supprimer_vente(instance.pk)
+
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser:
             return Vente.objects.all()
         return Vente.objects.filter(entreprise=user.entreprise)
 
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated],
+    )
+    def items(self, request, pk=None):
+        """
+        Récupère les lignes d'une vente.
+
+        ## Endpoint
+        `GET /api/ventes/{id}/items/`
+
+        ## Réponse
+        ```json
+        [
+          {
+            "id": "850e8400-e29b-41d4-a716-446655440003",
+            "produit": "750e8400-e29b-41d4-a716-446655440002",
+            "produit_nom": "Farine de blé",
+            "quantite": 5,
+            "prix_unitaire": "10.50",
+            "prix_vente": "52.50"
+          }
+        ]
+        ```
+        """
+        vente = self.get_object()
+        serializer = VenteLigneSerializer(vente.lignes.all(), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        detail=True,
+        methods=["get", "post"],
+        url_path="paiements",
+        permission_classes=[
+            IsAuthenticatedAndTenant,
+            IsAuthenticated,
+            IsSales | IsReadOnly,
+        ],
+    )
+    def paiements(self, request, pk=None):
+        """
+        Paiements d'une vente (lecture) et enregistrement d'un paiement.
+
+        ## Endpoints
+        - `GET /api/ventes/{id}/paiements/` : paiements reçus, du plus ancien au
+          plus récent
+        - `POST /api/ventes/{id}/paiements/` : imputer un paiement
+
+        ## Requête
+        ```json
+        {"montant": "20.00", "mode": "mobile_money",
+         "reference": "MP240109.1530.A12345"}
+        ```
+
+        Le montant ne peut pas dépasser le reste à payer. La vente passe
+        "payee" une fois soldée, "paiement_partiel" sinon ; ses soldes et
+        ceux du client sont mis à jour dans la même transaction.
+
+        ## Réponse (201)
+        Le paiement, avec `montant_paye`, `reste_a_payer` et `statut` de la vente.
+        """
+        vente = self.get_object()
+        if request.method == "GET":
+            paiements = vente.paiements.order_by("date", "created_at")
+            return Response(PaiementSerializer(paiements, many=True).data)
+
+        serializer = PaiementSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            paiement = enregistrer_paiement(vente.pk, **serializer.validated_data)
+        except PaiementRefuseError as exc:
+            raise ValidationError({"montant": str(exc)})
+        vente.refresh_from_db(fields=["montant_paye", "reste_a_payer", "statut"])
+        return Response(
+            {
+                **PaiementSerializer(paiement).data,
+                "montant_paye": vente.montant_paye,
+                "reste_a_payer": vente.reste_a_payer,
+                "statut": vente.statut,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(
+        detail=True,
+        methods=["get", "post"],
+        url_path="retours",
+        permission_classes=[
+            IsAuthenticatedAndTenant,
+            IsAuthenticated,
+            IsSales | IsReadOnly,
+        ],
+    )
+    def retours(self, request, pk=None):
+        """
+        Retours d'une vente (lecture) et enregistrement d'un retour.
+
+        ## Endpoints
+        - `GET /api/ventes/{id}/retours/` : retours enregistrés, du plus ancien au
+          plus récent
+        - `POST /api/ventes/{id}/retours/` : retourner tout ou partie de la vente
+
+        ## Requête
+        ```json
+        {"items": [{"produit": "<uuid>", "quantite": 2}], "mode": "especes",
+         "motif": "Abîmé"}
+        ```
+        Sans `items`, toute la vente est retournée. Les quantités sont
+        réintégrées dans le dépôt de la vente et déduites de ses lignes ; le
+        montant crédité réduit d'abord le reste à payer, l'excédent déjà
+        encaissé est remboursé (paiement négatif). Une vente entièrement
+        retournée passe "rembourse".
+
+        ## Réponse (201)
+        Le retour, avec `prix_vente`, `montant_paye`, `reste_a_payer` et `statut`
+        de la vente.
+        """
+        vente = self.get_object()
+        if request.method == "GET":
+            retours = vente.retours.prefetch_related("lignes").order_by("created_at")
+            return Response(RetourSerializer(retours, many=True).data)
+
+        serializer = RetourSerializer(data=request.data, context={"vente": vente})
+        serializer.is_valid(raise_exception=True)
+        donnees = serializer.validated_data
+        try:
+            retour = retourner_vente(
+                vente.pk,
+                donnees["quantites"],
+                mode=donnees.get("mode", "especes"),
+                motif=donnees.get("motif", ""),
+            )
+        except RetourRefuseError as exc:
+            raise ValidationError({"items": str(exc)})
+        vente.refresh_from_db(
+            fields=["prix_vente", "montant_paye", "reste_a_payer", "statut"]
+        )
+        return Response(
+            {
+                **RetourSerializer(retour).data,
+                "prix_vente": vente.prix_vente,
+                "montant_paye": vente.montant_paye,
+                "reste_a_payer": vente.reste_a_payer,
+                "statut": vente.statut,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated, IsSales],
+    )
+    def bulk(self, request):
+        """
+        Importer un lot de ventes (synchronisation d'un POS hors ligne).
+
+        ## Endpoint
+        `POST /api/ventes/bulk/`
+
+        Accepte jusqu'à `VENTES_BULK_MAX` ventes. Les clients et produits du
+        lot sont résolus en deux requêtes, le stock est décrémenté par un
+        UPDATE groupé et les ventes/lignes sont insérées par `bulk_create`.
+        Chaque vente est acceptée ou rejetée individuellement.
+
+        Une vente portant un `id` déjà importé est ignorée ("existante") :
+        un lot peut être rejoué sans créer de doublons.
+
+        ## Requête
+        ```json
+        [
+          {
+            "id": "950e8400-e29b-41d4-a716-446655440000",
+            "client": "550e8400-e29b-41d4-a716-446655440000",
+            "statut": "payee",
+            "items": [
+              {"produit": "650e8400-e29b-41d4-a716-446655440001", "quantite": 2}
+            ]
+          }
+        ]
+        ```
+
+        ## Réponse
+        ```json
+        {
+          "creees": 1,
+          "existantes": 0,
+          "rejetees": 0,
+          "resultats": [
+            {"index": 0, "id": "950e8400-e29b-41d4-a716-446655440000",
+             "resultat": "creee"}
+          ]
+        }
+        ```
+        """
+        data = request.data
+        if not isinstance(data, list):
+            data = data.get("ventes") if hasattr(data, "get") else None
+        if not isinstance(data, list) or not data:
+            return Response(
+                {"detail": "Une liste de ventes est attendue."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(data) > VENTES_BULK_MAX:
+            return Response(
+                {"detail": f"Un lot est limité à {VENTES_BULK_MAX} ventes."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Un seul serializer pour tout le lot : les champs ne sont liés qu'une fois.
+        validateur = VenteBulkSerializer(context=self.get_serializer_context())
+        resultats = [None] * len(data)
+        valides = []
+        indices = []
+        for index, vente in enumerate(data):
+            try:
+                valides.append(validateur.run_validation(vente))
+                indices.append(index)
+            except ValidationError as exc:
+                resultats[index] = {
+                    "index": index,
+                    "id": vente.get("id") if isinstance(vente, dict) else None,
+                    "resultat": "rejetee",
+                    "erreurs": exc.detail,
+                }
+
+        if valides:
+            for index, resultat in zip(
+                indices, importer_ventes(request.user.entreprise, valides)
+            ):
+                resultats[index] = {"index": index, **resultat}
+
+        compteurs = Counter(resultat["resultat"] for resultat in resultats)
+        return Response(
+            {
+                "creees": compteurs["creee"],
+                "existantes": compteurs["existante"],
+                "rejetees": compteurs["rejetee"],
+                "resultats": resultats,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=False,
+        methods=["patch"],
+        url_path="bulk-status",
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated, IsSales],
+    )
+    def bulk_status(self, request):
+        """
+        Changer le statut d'un lot de ventes (payées ou annulées).
+
+        ## Endpoint
+        `PATCH /api/ventes/bulk-status/`
+
+        Jusqu'à `VENTES_BULK_MAX` ventes, dans une seule transaction : les
+        ventes sont verrouillées en une requête, les transitions vérifiées
+        pour tout le lot, puis un seul UPDATE change leur statut. Une
+        annulation restaure le stock par un UPDATE groupé par dépôt.
+
+        Transitions autorisées :
+        - `payee` depuis `en_attente`, `paiement_partiel`
+        - `annulee` depuis `en_attente`, `payee`, `paiement_partiel`
+
+        ## Requête
+        ```json
+        {"ids": ["<uuid>", "<uuid>"], "statut": "annulee"}
+        ```
+
+        ## Réponse
+        ```json
+        {
+          "modifiees": 1,
+          "inchangees": 0,
+          "rejetees": 1,
+          "introuvables": 0,
+          "resultats": [
+            {"id": "<uuid>", "resultat": "modifiee"},
+            {"id": "<uuid>", "resultat": "rejetee",
+             "erreurs": "Transition rembourse -> annulee non autorisée."}
+          ]
+        }
+        ```
+        """
+        serializer = VenteStatutBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+        if len(ids) > VENTES_BULK_MAX:
+            return Response(
+                {"detail": f"Un lot est limité à {VENTES_BULK_MAX} ventes."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        resultats = changer_statut_ventes(
+            request.user.entreprise, ids, serializer.validated_data["statut"]
+        )
+        compteurs = Counter(resultat["resultat"] for resultat in resultats)
+        return Response(
+            {
+                "modifiees": compteurs["modifiee"],
+                "inchangees": compteurs["inchangee"],
+                "rejetees": compteurs["rejetee"],
+                "introuvables": compteurs["introuvable"],
+                "resultats": resultats,
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=True, methods=["patch"], permission_classes=[IsAuthenticated, IsSales])
     def mark_paid(self, request, pk=None):
         """
@@ -243,7 +1064,8 @@ class VenteViewSet(TenantQuerySetMixin, ModelViewSet):
         ## Endpoint
         `PATCH /api/ventes/{id}/mark_paid/`
         
-        Change le statut de la vente à "payee" si elle n'est pas déjà payée.
+        Change le statut de la vente à "payee" si elle n'est pas déjà payée ;
+        le reste à payer est réglé par un paiement (espèces).
         
         ## Réponse
         ```json
@@ -260,7 +1082,7 @@ class VenteViewSet(TenantQuerySetMixin, ModelViewSet):
         ```
         
         ## Erreurs possibles
-        - 400: Vente déjà payée
+        - 400: Vente déjà payée, ou annulée/remboursée
         - 404: Vente non trouvée
         
         Args:
@@ -270,10 +1092,16 @@ class VenteViewSet(TenantQuerySetMixin, ModelViewSet):
             Response: Vente mise à jour avec statut "payee"
         """
         vente = self.get_object()
-        if vente.statut == "payee":
-            return Response({"detail": "Vente déjà payée."}, status=status.HTTP_400_BAD_REQUEST)
-        vente.statut = "payee"
-        vente.save()
+        resultat = changer_statut_ventes(vente.entreprise, [vente.pk], "payee")[0]
+        if resultat["resultat"] == "inchangee":
+            return Response(
+                {"detail": "Vente déjà payée."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if resultat["resultat"] == "rejetee":
+            return Response(
+                {"detail": resultat["erreurs"]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        vente.refresh_from_db()
         serializer = self.get_serializer(vente)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -286,12 +1114,13 @@ class VenteViewSet(TenantQuerySetMixin, ModelViewSet):
         `PATCH /api/ventes/{id}/mark_cancelled/`
         
         Change le statut à "annulee" et restaure automatiquement la quantité
-        en stock pour le produit vendu.
+        en stock pour chaque produit vendu.
         
         ## Processus
         1. Vérifier que la vente n'est pas déjà annulée
         2. Ajouter la quantité vendue en stock du produit
         3. Mettre à jour le statut de la vente
+        4. Annuler le reste à payer (les paiements reçus restent acquis)
         
         ## Réponse
         ```json
@@ -308,7 +1137,7 @@ class VenteViewSet(TenantQuerySetMixin, ModelViewSet):
         ```
         
         ## Erreurs possibles
-        - 400: Vente déjà annulée
+        - 400: Vente déjà annulée, ou remboursée
         - 404: Vente non trouvée
         
         Args:
@@ -317,22 +1146,18 @@ class VenteViewSet(TenantQuerySetMixin, ModelViewSet):
         Returns:
             Response: Vente avec statut "annulee" et stock restauré
         """
-        from django.db import transaction
         vente = self.get_object()
-        
-        if vente.statut == "annulee":
-            return Response({"detail": "Vente déjà annulée."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        with transaction.atomic():
-            # Restaurer le stock
-            produit = vente.produit
-            produit.quantite += vente.quantite
-            produit.save()
-            
-            # Marquer la vente comme annulée
-            vente.statut = "annulee"
-            vente.save()
-        
+        resultat = changer_statut_ventes(vente.entreprise, [vente.pk], "annulee")[0]
+        if resultat["resultat"] == "inchangee":
+            return Response(
+                {"detail": "Vente déjà annulée."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if resultat["resultat"] == "rejetee":
+            return Response(
+                {"detail": resultat["erreurs"]}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        vente.refresh_from_db()
         serializer = self.get_serializer(vente)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
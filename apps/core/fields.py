@@ -0,0 +1,145 @@
+"""
+Champs de modèle partagés.
+"""
+
+import re
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import models
+
+# Les quantités sont stockées en millièmes de l'unité du produit
+# (1 g pour un produit au kg, 1 mL au litre, 1 mm au mètre).
+QUANTITE_DECIMALES = 3
+QUANTITE_ECHELLE = 10**QUANTITE_DECIMALES
+QUANTITE_PAS = Decimal(1).scaleb(-QUANTITE_DECIMALES)
+
+
+def quantite_vers_entier(quantite):
+    """
+    Convertit une quantité décimale en entier stocké (millièmes).
+
+    Args:
+        quantite (int/str/Decimal): Quantité dans l'unité du produit
+
+    Returns:
+        int: Quantité multipliée par `QUANTITE_ECHELLE`
+
+    Raises:
+        ValueError: Si la quantité a plus de `QUANTITE_DECIMALES` décimales
+    """
+    if isinstance(quantite, int):
+        return quantite * QUANTITE_ECHELLE
+    if isinstance(quantite, float):
+        quantite = str(quantite)
+    try:
+        valeur = Decimal(quantite).scaleb(QUANTITE_DECIMALES)
+    except InvalidOperation as exc:
+        raise ValueError(f"Quantité invalide: {quantite!r}") from exc
+    if valeur != valeur.to_integral_value():
+        raise ValueError(
+            f"Quantité trop précise: {QUANTITE_DECIMALES} décimales maximum "
+            "dans l'unité du produit."
+        )
+    return int(valeur)
+
+
+def entier_vers_quantite(valeur):
+    """Convertit un entier stocké (millièmes) en quantité décimale."""
+    return Decimal(valeur).scaleb(-QUANTITE_DECIMALES)
+
+
+class QuantiteField(models.BigIntegerField):
+    """
+    Quantité décimale stockée en entier (virgule fixe).
+
+    En Python la valeur est un `Decimal` exprimé dans l'unité du produit ;
+    en base c'est un entier en millièmes, si bien que les sommes et
+    comparaisons SQL restent des opérations entières. Les filtres
+    (`quantite__gte=...`) et `Sum("quantite")` convertissent
+    automatiquement ; seules les expressions construites à la main
+    (`F("quantite") - Value(...)`) doivent passer par `quantite_vers_entier`.
+    """
+
+    description = "Quantité décimale stockée en millièmes"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return entier_vers_quantite(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Decimal):
+            return value
+        try:
+            return Decimal(str(value) if isinstance(value, float) else value)
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages["invalid"], code="invalid", params={"value": value}
+            )
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        return quantite_vers_entier(value)
+
+
+_ESPACES = re.compile(r"\s+")
+
+
+def normaliser_recherche(texte):
+    """
+    Normalise un texte pour la recherche : minuscules, sans accents, espaces réduits.
+
+    Args:
+        texte (str): Texte libre ("  Crème  BRÛLÉE ")
+
+    Returns:
+        str: Texte normalisé ("creme brulee")
+    """
+    decompose = unicodedata.normalize("NFKD", texte or "")
+    sans_accents = "".join(c for c in decompose if not unicodedata.combining(c))
+    return _ESPACES.sub(" ", sans_accents.casefold()).strip()
+
+
+class RechercheField(models.CharField):
+    """
+    Colonne de recherche dénormalisée, recalculée à chaque enregistrement.
+
+    Concatène les champs `sources` normalisés (`normaliser_recherche`) :
+    une recherche `recherche__contains=<terme normalisé>` est alors
+    insensible à la casse et aux accents sans `UPPER()`/`ILIKE`, et peut
+    utiliser un index trigramme (PostgreSQL, `pg_trgm`) ou B-tree.
+
+    La valeur est calculée dans `pre_save`, donc aussi par `bulk_create`,
+    mais pas par `QuerySet.update()` ni `save(update_fields=...)` sans
+    ce champ.
+    """
+
+    def __init__(self, *args, sources=(), **kwargs):
+        self.sources = tuple(sources)
+        kwargs.setdefault("max_length", 500)
+        kwargs.setdefault("default", "")
+        kwargs.setdefault("blank", True)
+        kwargs["editable"] = False
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["sources"] = self.sources
+        kwargs.pop("editable", None)
+        return name, path, args, kwargs
+
+    def calculer(self, instance):
+        """Calcule la valeur de recherche d'une instance."""
+        texte = " ".join(
+            str(getattr(instance, source) or "") for source in self.sources
+        )
+        return normaliser_recherche(texte)[: self.max_length]
+
+    def pre_save(self, model_instance, add):
+        valeur = self.calculer(model_instance)
+        setattr(model_instance, self.attname, valeur)
+        return valeur
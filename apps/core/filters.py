@@ -0,0 +1,83 @@
+"""
+Filtres DRF partagés.
+"""
+
+import operator
+from functools import reduce
+
+from rest_framework import filters
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Exists, OuterRef, Q
+
+from apps.core.fields import RechercheField, normaliser_recherche
+
+
+class RechercheFilter(filters.SearchFilter):
+    """
+    Remplace `SearchFilter` pour les colonnes `RechercheField`.
+
+    Pour un champ de `search_fields` aboutissant à un `RechercheField`
+    (ex: "recherche", "client__recherche"), le terme est normalisé puis
+    cherché avec `__contains` sur la colonne normalisée, ce qui permet à
+    la base d'utiliser l'index trigramme (ou B-tree) au lieu d'un
+    `UPPER(col) LIKE` sur chaque ligne. Les autres champs gardent le
+    comportement de `SearchFilter` (`icontains` par défaut).
+
+    Comme `SearchFilter`, chaque terme doit correspondre à au moins un
+    champ et tous les termes doivent correspondre.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+
+        if not search_fields or not search_terms:
+            return queryset
+
+        lookups = [
+            (
+                self._est_recherche(queryset.model, str(search_field)),
+                self.construct_search(str(search_field), queryset),
+            )
+            for search_field in search_fields
+        ]
+
+        conditions = []
+        for term in search_terms:
+            normalise = normaliser_recherche(term)
+            par_champ = [
+                Q(**{lookup: normalise if est_recherche else term})
+                for est_recherche, lookup in lookups
+            ]
+            conditions.append(reduce(operator.or_, par_champ))
+
+        base = queryset
+        queryset = queryset.filter(reduce(operator.and_, conditions))
+
+        # Dédoublonner (relations multiples) comme SearchFilter : EXISTS plutôt
+        # que DISTINCT.
+        if self.must_call_distinct(queryset, search_fields):
+            queryset = queryset.filter(pk=OuterRef("pk"))
+            queryset = base.filter(Exists(queryset))
+        return queryset
+
+    def construct_search(self, field_name, queryset):
+        if self._est_recherche(queryset.model, field_name):
+            return f"{field_name}__contains"
+        return super().construct_search(field_name, queryset)
+
+    @staticmethod
+    def _est_recherche(model, field_name):
+        """Indique si `field_name` (chemin "a__b") aboutit à un `RechercheField`."""
+        champ = None
+        for partie in field_name.lstrip("^=@$").split("__"):
+            if champ is not None:
+                model = champ.related_model
+            if model is None:
+                return False
+            try:
+                champ = model._meta.get_field(partie)
+            except FieldDoesNotExist:
+                return False
+        return isinstance(champ, RechercheField)
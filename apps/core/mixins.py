@@ -1,3 +1,25 @@
+import hashlib
+import json
+import uuid
+from datetime import timedelta
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.pagination import decoder_curseur, encoder_curseur
+from apps.core.permissions import IsAuthenticatedAndTenant
+from apps.core.serializers import relations_a_charger
+from apps.core.services.changements import lire_changements
+
+
 class TenantQuerySetMixin:
     """
     Force le filtrage par entreprise (tenant)
@@ -9,3 +31,193 @@ class TenantQuerySetMixin:
 
     def perform_create(self, serializer):
         serializer.save(entreprise=self.request.user.entreprise)
+
+
+class ExpandQuerySetMixin:
+    """
+    Charge en une fois les relations lues par le serializer de la vue.
+
+    Les relations des champs effectivement renvoyés (selon `?fields=` et
+    `?expand=`, voir `DynamicFieldsModelSerializer`) sont ajoutées au
+    queryset (`select_related`/`prefetch_related`) : une page coûte un
+    nombre constant de requêtes, quelle que soit sa taille.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        select, prefetch = relations_a_charger(self.get_serializer(), queryset.model)
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
+
+
+class IdempotencyMixin:
+    """
+    Rend `create` idempotent grâce à l'en-tête `Idempotency-Key`.
+
+    La première réponse réussie est stockée dans le cache (Redis), par
+    entreprise et par ressource, pendant `IDEMPOTENCY_TTL` secondes. Une
+    requête rejouée avec la même clé reçoit cette réponse sans être
+    réexécutée. Un verrou (`cache.add`) empêche deux requêtes concurrentes
+    portant la même clé de s'exécuter toutes les deux (409).
+
+    Réutiliser une clé avec un corps de requête différent renvoie 422.
+    Sans en-tête, le comportement est inchangé.
+    """
+
+    idempotency_header = "Idempotency-Key"
+    idempotency_lock_timeout = 60
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(self.idempotency_header)
+        if not key:
+            return super().create(request, *args, **kwargs)
+
+        if len(key) > 255:
+            return Response(
+                {"detail": f"En-tête {self.idempotency_header} trop long (255 max)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = f"idempotency:{request.user.entreprise_id}:{self.basename}:{key}"
+        empreinte = self._empreinte_requete(request)
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return self._rejouer(stored, empreinte)
+
+        lock_key = f"{cache_key}:lock"
+        if not cache.add(lock_key, 1, self.idempotency_lock_timeout):
+            return Response(
+                {"detail": "Une requête avec cette clé est déjà en cours."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            # Une requête concurrente a pu terminer entre get() et add().
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return self._rejouer(stored, empreinte)
+
+            response = super().create(request, *args, **kwargs)
+            if status.is_success(response.status_code):
+                cache.set(
+                    cache_key,
+                    {
+                        "empreinte": empreinte,
+                        "status": response.status_code,
+                        "data": response.data,
+                    },
+                    settings.IDEMPOTENCY_TTL,
+                )
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    def _empreinte_requete(self, request):
+        corps = json.dumps(request.data, sort_keys=True, default=str)
+        return hashlib.sha256(corps.encode()).hexdigest()
+
+    def _rejouer(self, stored, empreinte):
+        if stored["empreinte"] != empreinte:
+            return Response(
+                {
+                    "detail": f"{self.idempotency_header} déjà utilisée "
+                    "avec un corps de requête différent."
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        response = Response(stored["data"], status=stored["status"])
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+
+class ChangeFeedMixin:
+    """
+    Ajoute `GET <ressource>/changes/?cursor=` : flux de changements incrémental.
+
+    Renvoie uniquement les objets créés, modifiés ou supprimés depuis le
+    curseur, pour qu'un terminal POS garde sa copie locale à jour sans
+    retélécharger la liste complète :
+
+        {"cursor": "...", "has_more": false, "updated": [...], "deleted": [uuid, ...]}
+
+    Sans curseur, le flux part du début (synchronisation initiale). Le
+    client rappelle avec le `cursor` reçu tant que `has_more` est vrai,
+    puis le conserve pour la prochaine synchronisation. Les suppressions
+    sont conservées `SYNC_TOMBSTONE_RETENTION_DAYS` jours : un curseur
+    plus ancien renvoie 410 et impose une synchronisation complète.
+
+    Le modèle doit être listé dans `apps.core.signals.MODELES_SUIVIS`.
+    """
+
+    changes_page_size = 500
+    changes_max_page_size = 5000
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticatedAndTenant, IsAuthenticated],
+    )
+    def changes(self, request):
+        """Flux des changements depuis `?cursor=` (`?page_size=` optionnel)."""
+        entreprise_id = request.user.entreprise_id
+        depuis = self._decoder_curseur_changements(request, entreprise_id)
+
+        retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        if depuis is not None and depuis[0] < timezone.now() - retention:
+            return Response(
+                {"detail": "Curseur expiré, synchronisation complète requise."},
+                status=status.HTTP_410_GONE,
+            )
+
+        try:
+            limite = int(request.query_params.get("page_size", self.changes_page_size))
+        except ValueError:
+            limite = self.changes_page_size
+        limite = min(max(limite, 1), self.changes_max_page_size)
+
+        queryset = self.get_queryset()
+        modifies, supprimes, dernier, reste = lire_changements(
+            queryset,
+            entreprise_id,
+            queryset.model._meta.label_lower,
+            depuis=depuis,
+            limite=limite,
+        )
+
+        curseur = None
+        if dernier is not None:
+            curseur = encoder_curseur(
+                {
+                    "t": str(entreprise_id),
+                    "d": dernier[0].isoformat(),
+                    "i": str(dernier[1]),
+                }
+            )
+        return Response(
+            {
+                "cursor": curseur,
+                "has_more": reste,
+                "updated": self.get_serializer(modifies, many=True).data,
+                "deleted": [str(objet_id) for objet_id in supprimes],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def _decoder_curseur_changements(self, request, entreprise_id):
+        jeton = request.query_params.get("cursor")
+        if not jeton:
+            return None
+        try:
+            curseur = decoder_curseur(jeton)
+            if curseur["t"] != str(entreprise_id):
+                raise ValueError
+            date = parse_datetime(curseur["d"])
+            if date is None:
+                raise ValueError
+            return date, uuid.UUID(curseur["i"])
+        except (KeyError, TypeError, ValueError):
+            raise NotFound("Curseur invalide.")
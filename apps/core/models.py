@@ -25,3 +25,27 @@ class TenantModel(BaseModel):
     class Meta:
         abstract = True
         indexes = [models.Index(fields=["entreprise", "created_at"])]
+
+
+class Suppression(TenantModel):
+    """
+    Trace (tombstone) de la suppression d'un objet exposé par un flux de changements.
+
+    Permet aux terminaux synchronisés de retirer de leur copie locale les
+    objets supprimés côté serveur.
+
+    Attributs:
+        ressource (str): Modèle de l'objet supprimé ("app.modele",
+            ex: "commerce.produit")
+        objet_id (UUID): Identifiant de l'objet supprimé
+        created_at (datetime): Horodatage de la suppression
+    """
+
+    ressource = models.CharField(max_length=100)
+    objet_id = models.UUIDField()
+
+    class Meta:
+        indexes = [models.Index(fields=["entreprise", "ressource", "created_at"])]
+
+    def __str__(self):
+        return f"{self.ressource} {self.objet_id} supprimé"
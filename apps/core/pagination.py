@@ -0,0 +1,247 @@
+"""
+Pagination par curseur (keyset) des listes multi-tenant.
+
+Au lieu de `OFFSET n` (coût linéaire en n) et de `COUNT(*)`, chaque page
+reprend après la dernière ligne lue :
+
+    WHERE entreprise_id = ...
+      AND (created_at < c OR (created_at = c AND id < i))
+    ORDER BY created_at DESC, id DESC
+    LIMIT page_size + 1
+
+La requête parcourt directement l'index `(entreprise, created_at)` : le
+coût d'une page est constant, quelle que soit sa position.
+
+Une clé nullable est triée NULLS LAST (dans les deux sens) ; le prédicat
+de reprise en tient compte :
+
+    (prix_vente < p OR prix_vente IS NULL OR (prix_vente = p AND id < i))
+"""
+
+import base64
+import binascii
+import datetime
+import json
+from decimal import Decimal
+from uuid import UUID
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Pagination keyset sur l'ordre de la vue, départagé par `id`.
+
+    L'ordre utilisé est celui du queryset (`ordering` de la vue ou
+    `?ordering=`), sinon `-created_at`. Il n'est retenu que s'il porte sur
+    des champs concrets du modèle ; les valeurs nulles d'une clé nullable
+    viennent en dernier. L'identifiant est toujours ajouté en dernière clé
+    pour rendre l'ordre total.
+
+    Le curseur est opaque et lié à l'entreprise et à l'ordre qui l'ont
+    produit : un curseur rejoué par un autre tenant ou avec un autre tri
+    est refusé (404).
+
+    Réponse : {"next": url|null, "previous": url|null, "results": [...]}
+    """
+
+    ordering = "-created_at"
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    invalid_cursor_message = "Curseur invalide."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.cles = self.get_ordering(request, queryset, view)
+        self.tenant = str(getattr(request.user, "entreprise_id", None) or "")
+
+        curseur = self.decode_cursor(request)
+        self.reverse = bool(curseur and curseur["r"])
+        if curseur is not None:
+            queryset = queryset.filter(self._seek(curseur["v"]))
+
+        results = list(queryset.order_by(*self._tri())[: self.page_size + 1])
+        plus = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if self.reverse:
+            self.page.reverse()
+
+        if self.reverse:
+            self.has_next, self.has_previous = True, plus
+        else:
+            self.has_next, self.has_previous = plus, curseur is not None
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Détermine les clés de tri : [(nom, descendant, champ), ...].
+
+        Args:
+            request: Requête courante
+            queryset: Queryset filtré (tri éventuel appliqué par `OrderingFilter`)
+            view: Vue appelante
+
+        Returns:
+            list: Clés de tri, l'identifiant en dernier
+        """
+        meta = queryset.model._meta
+        demandes = list(queryset.query.order_by) or list(meta.ordering)
+        cles = self._resoudre(meta, demandes) or self._resoudre(meta, [self.ordering])
+
+        pk = meta.pk
+        cles = [cle for cle in cles if cle[2] is not pk]
+        cles.append((pk.attname, cles[-1][1] if cles else True, pk))
+        return cles
+
+    @staticmethod
+    def _resoudre(meta, demandes):
+        """Traduit des noms de tri en champs ; [] si l'un n'est pas utilisable."""
+        cles = []
+        for demande in demandes:
+            if not isinstance(demande, str):
+                return []
+            nom = demande.lstrip("-")
+            try:
+                champ = meta.pk if nom == "pk" else meta.get_field(nom)
+            except FieldDoesNotExist:
+                return []
+            if not champ.concrete:
+                return []
+            cles.append((champ.attname, demande.startswith("-"), champ))
+        return cles
+
+    def _tri(self):
+        """
+        Expressions `order_by` de l'ordre courant.
+
+        Les valeurs nulles sont en dernier dans l'ordre demandé, donc en
+        premier quand la page précédente est lue à rebours.
+        """
+        tri = []
+        for nom, desc, champ in self.cles:
+            descendant = desc != self.reverse
+            if champ.null:
+                nulles = {"nulls_first" if self.reverse else "nulls_last": True}
+                expression = F(nom).desc if descendant else F(nom).asc
+                tri.append(expression(**nulles))
+            else:
+                tri.append(("-" if descendant else "") + nom)
+        return tri
+
+    def _seek(self, valeurs):
+        """
+        Construit le prédicat "strictement après le curseur" dans l'ordre courant.
+
+        (a, b, id) > (va, vb, vid) s'écrit :
+        a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND id > vid)
+
+        Pour une clé nullable (NULLS LAST), "a > va" inclut `a IS NULL`, et
+        une valeur nulle au curseur n'est suivie que par d'autres nulles ;
+        à rebours, c'est l'inverse.
+        """
+        condition = Q()
+        egalites = Q()
+        for (nom, desc, champ), valeur in zip(self.cles, valeurs):
+            operateur = "lt" if desc != self.reverse else "gt"
+            if valeur is None:
+                # Après les nulles : rien ; à rebours, toutes les non nulles.
+                apres = Q(**{f"{nom}__isnull": False}) if self.reverse else None
+                egal = Q(**{f"{nom}__isnull": True})
+            else:
+                apres = Q(**{f"{nom}__{operateur}": valeur})
+                if champ.null and not self.reverse:
+                    apres |= Q(**{f"{nom}__isnull": True})
+                egal = Q(**{nom: valeur})
+            if apres is not None:
+                condition |= egalites & apres
+            egalites &= egal
+        return condition
+
+    def _signature(self):
+        """Ordre courant sous forme de liste (`-champ` si descendant)."""
+        return [("-" if desc else "") + nom for nom, desc, _ in self.cles]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            curseur = decoder_curseur(encoded)
+            if (
+                curseur["t"] != self.tenant
+                or curseur["o"] != self._signature()
+                or len(curseur["v"]) != len(self.cles)
+            ):
+                raise ValueError
+            curseur["v"] = [
+                champ.to_python(valeur)
+                for (_, _, champ), valeur in zip(self.cles, curseur["v"])
+            ]
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return curseur
+
+    def encode_cursor(self, objet, reverse):
+        curseur = {
+            "t": self.tenant,
+            "o": self._signature(),
+            "v": [serialiser_valeur(getattr(objet, nom)) for nom, _, _ in self.cles],
+            "r": reverse,
+        }
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoder_curseur(curseur)
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+def encoder_curseur(donnees):
+    """Encode un curseur (dictionnaire JSON) en jeton opaque utilisable dans une URL."""
+    return base64.urlsafe_b64encode(
+        json.dumps(donnees, separators=(",", ":")).encode("utf-8")
+    ).decode("ascii")
+
+
+def decoder_curseur(jeton):
+    """
+    Décode un jeton produit par `encoder_curseur`.
+
+    Raises:
+        ValueError: Si le jeton est malformé
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(jeton.encode("ascii")))
+    except (binascii.Error, UnicodeError) as exc:
+        raise ValueError("Curseur malformé.") from exc
+
+
+def serialiser_valeur(valeur):
+    """Sérialise une valeur de clé sans perte (microsecondes comprises)."""
+    if isinstance(valeur, (datetime.date, datetime.time)):
+        return valeur.isoformat()
+    if isinstance(valeur, (Decimal, UUID)):
+        return str(valeur)
+    return valeur
@@ -1,7 +1,43 @@
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
+from django.core.cache import cache
+
 from apps.core.constants import CRUD_ACTIONS, ROLE_PERMISSIONS, UserRole
 
+# Durée de vie des noms de rôle en cache Redis (secondes)
+ROLE_CACHE_TTL = 300
+
+
+def cle_role(role_id):
+    return f"role_nom:{role_id}"
+
+
+def nom_role(user):
+    """
+    Nom du rôle de l'utilisateur, lu dans Redis.
+
+    Évite la requête sur `Role` à chaque vérification de permission. Un
+    rôle modifié ou supprimé est retiré de Redis après commit
+    (`apps.core.signals`). Le nom ne passe pas par le cache mémoire des
+    workers (L1), dont seul le worker auteur de la modification serait
+    purgé : les autres appliqueraient l'ancien rôle jusqu'à expiration.
+
+    Args:
+        user: Utilisateur de la requête
+
+    Returns:
+        str ou None: `Role.nom`, None si l'utilisateur n'a pas de rôle
+    """
+    role_id = getattr(user, "role_id", None)
+    if not role_id:
+        return None
+    cle = cle_role(role_id)
+    nom = cache.get(cle)
+    if nom is None:
+        nom = user.role.nom
+        cache.set(cle, nom, ROLE_CACHE_TTL)
+    return nom
+
 
 class IsAuthenticatedAndTenant(BasePermission):
     """
@@ -32,9 +68,8 @@ class HasRolePermission(BasePermission):
         if not user.is_authenticated:
             return False
 
-        if not user.entreprise or not user.role:
+        if not user.entreprise_id or not user.role_id:
             return False
-        # print(user.role.nom)
         module = getattr(view, "permission_module", None)
         if not module:
             return False
@@ -47,7 +82,7 @@ class HasRolePermission(BasePermission):
         if not crud_action:
             return False
         # print(crud_action)
-        permissions = ROLE_PERMISSIONS.get(user.role.nom, {})
+        permissions = ROLE_PERMISSIONS.get(nom_role(user), {})
         allowed = permissions.get(module, [])
         # print(permissions)
         return crud_action in allowed
@@ -78,36 +113,45 @@ class IsSystemAdmin(BasePermission):
     def has_permission(self, request, view):
         user = request.user
 
-        return user.is_authenticated and user.role.nom in (
+        return user.is_authenticated and nom_role(user) in (
             UserRole.ADMIN,
             # UserRole.SUPER_ADMIN
         )
 
 
+class IsSuperUser(BasePermission):
+    """Superutilisateur Django : accès aux données qui ne sont pas d'un tenant."""
+
+    def has_permission(self, request, view):
+        user = request.user
+
+        return user.is_authenticated and user.is_superuser
+
+
 class IsCompanyAdmin(BasePermission):
     def has_permission(self, request, view):
         user = request.user
 
         return (
             user.is_authenticated
-            and user.entreprise is not None
-            and user.role.nom in (UserRole.ADMIN, UserRole.SUPER_ADMIN)
+            and user.entreprise_id is not None
+            and nom_role(user) in (UserRole.ADMIN, UserRole.SUPER_ADMIN)
         )
 
 
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
-        return request.user.role.nom in [UserRole.ADMIN, UserRole.SUPER_ADMIN]
+        return nom_role(request.user) in [UserRole.ADMIN, UserRole.SUPER_ADMIN]
 
 
 class IsFinance(BasePermission):
     def has_permission(self, request, view):
-        return request.user.role.nom in [UserRole.ADMIN, UserRole.COMPTABLE]
+        return nom_role(request.user) in [UserRole.ADMIN, UserRole.COMPTABLE]
 
 
 class IsSales(BasePermission):
     def has_permission(self, request, view):
-        return request.user.role.nom in [UserRole.ADMIN, UserRole.VENTES]
+        return nom_role(request.user) in [UserRole.ADMIN, UserRole.VENTES]
 
 
 class IsSameEntreprise(BasePermission):
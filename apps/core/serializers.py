@@ -0,0 +1,167 @@
+import datetime
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apps.core.fields import QUANTITE_DECIMALES
+
+
+class QuantiteField(serializers.DecimalField):
+    """
+    Quantité décimale (3 décimales), rendue en nombre JSON.
+
+    Pendant API de `apps.core.fields.QuantiteField`.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_digits", 15)
+        kwargs.setdefault("decimal_places", QUANTITE_DECIMALES)
+        kwargs.setdefault("coerce_to_string", False)
+        super().__init__(**kwargs)
+
+
+def parametre_liste(request, nom):
+    """
+    Lit un paramètre de requête de la forme "a,b,c".
+
+    Returns:
+        set ou None: Valeurs demandées, None si le paramètre est absent
+    """
+    if request is None or nom not in request.query_params:
+        return None
+    return {
+        valeur.strip()
+        for valeur in request.query_params[nom].split(",")
+        if valeur.strip()
+    }
+
+
+def lire_date(request, nom, fin_de_journee=False):
+    """
+    Lit un paramètre de date (`AAAA-MM-JJ` ou ISO 8601) de la requête.
+
+    Args:
+        request: Requête courante
+        nom (str): Nom du paramètre
+        fin_de_journee (bool): Une date seule désigne la fin (True) ou le
+            début (False) de la journée
+
+    Returns:
+        datetime: Date (avec fuseau) ou None si le paramètre est absent
+
+    Raises:
+        ValidationError: Si la date est invalide
+    """
+    valeur = request.query_params.get(nom)
+    if not valeur:
+        return None
+    try:
+        date = parse_datetime(valeur)
+        if date is None:
+            jour = parse_date(valeur)
+            if jour is None:
+                raise ValueError
+            heure = datetime.time.max if fin_de_journee else datetime.time.min
+            date = datetime.datetime.combine(jour, heure)
+    except ValueError:
+        raise ValidationError({nom: "Date invalide (AAAA-MM-JJ ou ISO 8601)."})
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer avec champs à la demande (`?fields=`) et expansion (`?expand=`).
+
+    - `?fields=id,statut` : ne renvoie que ces champs (lecture uniquement ;
+      en écriture tous les champs restent acceptés).
+    - `?expand=client,produit` : ajoute les objets liés déclarés dans
+      `Meta.expandable_fields` ({nom d'expansion: champ imbriqué}). Sans
+      expansion, seule la clé primaire de la relation est renvoyée.
+
+    Les vues utilisant `ExpandQuerySetMixin` chargent automatiquement
+    (`select_related`/`prefetch_related`) les relations des champs
+    effectivement renvoyés.
+
+    Seul le serializer racine lit la requête : les serializers imbriqués
+    sont rendus en entier.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+
+        expandables = getattr(self.Meta, "expandable_fields", {})
+        demandes = parametre_liste(request, "expand") or set()
+        for nom, champ in expandables.items():
+            if nom not in demandes:
+                self.fields.pop(champ, None)
+
+        champs = parametre_liste(request, "fields")
+        if champs is not None and request.method in SAFE_METHODS:
+            gardes = champs | {
+                expandables[nom] for nom in demandes if nom in expandables
+            }
+            for nom in list(self.fields):
+                if nom not in gardes:
+                    self.fields.pop(nom)
+
+
+def relations_a_charger(serializer, model, prefixe="", multiple=False):
+    """
+    Calcule les relations lues par un serializer (récursivement).
+
+    Les relations à valeur unique sont jointes (`select_related`) ; dès
+    qu'un chemin traverse une relation multiple, il est préchargé
+    (`prefetch_related`). Les `PrimaryKeyRelatedField` n'ont besoin que
+    de la colonne `*_id` et sont ignorés.
+
+    Args:
+        serializer: Serializer (déjà filtré par `?fields=`/`?expand=`)
+        model: Modèle sérialisé
+        prefixe (str): Chemin ORM depuis le modèle racine
+        multiple (bool): Le chemin traverse déjà une relation multiple
+
+    Returns:
+        tuple: (set select_related, set prefetch_related)
+    """
+    select, prefetch = set(), set()
+    for champ in serializer.fields.values():
+        if champ.write_only or champ.source == "*":
+            continue
+        enfant = champ.child if isinstance(champ, serializers.ListSerializer) else champ
+        imbrique = isinstance(enfant, serializers.BaseSerializer)
+        parties = champ.source.split(".")
+        if not imbrique:
+            parties = parties[:-1]
+
+        courant, chemin, plusieurs = model, prefixe, multiple
+        for partie in parties:
+            try:
+                relation = courant._meta.get_field(partie)
+            except FieldDoesNotExist:
+                courant = None
+                break
+            if not relation.is_relation:
+                courant = None
+                break
+            chemin = f"{chemin}__{partie}" if chemin else partie
+            plusieurs = plusieurs or relation.one_to_many or relation.many_to_many
+            (prefetch if plusieurs else select).add(chemin)
+            courant = relation.related_model
+
+        if imbrique and courant is not None:
+            sous_select, sous_prefetch = relations_a_charger(
+                enfant, courant, chemin, plusieurs
+            )
+            select |= sous_select
+            prefetch |= sous_prefetch
+    return select, prefetch
@@ -0,0 +1,149 @@
+"""
+Cache à deux niveaux : mémoire du processus (L1) devant Redis.
+
+Le niveau L1 (`CacheLocal`) est un LRU borné, avec durée de vie, propre à
+chaque worker : une clé chaude y est servie sans aller-retour réseau.
+Il utilise les mêmes clés que Redis, qui reste la référence partagée.
+
+Une entrée L1 ne vit jamais plus de `CACHE_L1_TTL` secondes. Les clés
+versionnées par entreprise (analytics) sont invalidées par leur version,
+relue dans Redis au plus toutes les `CACHE_L1_VERSION_TTL` secondes par
+worker : une invalidation est donc vue partout dans ce délai, et tout de
+suite par le worker qui l'a faite.
+
+Les compteurs de succès / échecs de chaque niveau sont propres au
+processus (`statistiques`).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Valeur absente du cache (une valeur mise en cache peut être None ou vide)
+_ABSENT = object()
+
+
+class CacheLocal:
+    """
+    Cache LRU en mémoire, borné en nombre d'entrées, avec durée de vie.
+
+    Partagé par les threads du processus (accès sous verrou).
+
+    Args:
+        taille (int): Nombre maximal d'entrées (les moins récemment lues sortent)
+        ttl (float): Durée de vie maximale d'une entrée (secondes)
+    """
+
+    def __init__(self, taille, ttl):
+        self.taille = taille
+        self.ttl = ttl
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def get(self, cle, defaut=None):
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                return defaut
+            valeur, expiration = entree
+            if expiration <= time.monotonic():
+                del self._entrees[cle]
+                return defaut
+            self._entrees.move_to_end(cle)
+            return valeur
+
+    def set(self, cle, valeur, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.taille <= 0:
+            return
+        with self._verrou:
+            self._entrees[cle] = (valeur, time.monotonic() + ttl)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille:
+                self._entrees.popitem(last=False)
+
+    def delete(self, cle):
+        with self._verrou:
+            self._entrees.pop(cle, None)
+
+    def clear(self):
+        with self._verrou:
+            self._entrees.clear()
+
+    def __len__(self):
+        return len(self._entrees)
+
+
+l1 = CacheLocal(settings.CACHE_L1_TAILLE, settings.CACHE_L1_TTL)
+
+_compteurs = {"l1": {"hits": 0, "misses": 0}, "redis": {"hits": 0, "misses": 0}}
+_verrou_compteurs = threading.Lock()
+
+
+def _compter(niveau, resultat):
+    with _verrou_compteurs:
+        _compteurs[niveau][resultat] += 1
+
+
+def lire(cle, defaut=None, ttl_local=None):
+    """
+    Lit une clé dans L1, puis dans Redis (la valeur trouvée remplit L1).
+
+    Args:
+        cle (str): Clé de cache
+        defaut: Valeur renvoyée si la clé est absente des deux niveaux
+        ttl_local (float): Durée de vie dans L1 (défaut: `CACHE_L1_TTL`)
+
+    Returns:
+        Valeur en cache ou `defaut`
+    """
+    valeur = l1.get(cle, _ABSENT)
+    if valeur is not _ABSENT:
+        _compter("l1", "hits")
+        return valeur
+    _compter("l1", "misses")
+
+    valeur = cache.get(cle, _ABSENT)
+    if valeur is _ABSENT:
+        _compter("redis", "misses")
+        return defaut
+    _compter("redis", "hits")
+    l1.set(cle, valeur, ttl_local)
+    return valeur
+
+
+def ecrire(cle, valeur, ttl):
+    """
+    Écrit une clé dans Redis et dans L1.
+
+    Args:
+        cle (str): Clé de cache
+        valeur: Valeur à stocker
+        ttl (int): Durée de vie dans Redis (secondes) ; L1 la borne à `CACHE_L1_TTL`
+    """
+    cache.set(cle, valeur, ttl)
+    l1.set(cle, valeur, ttl)
+
+
+def supprimer(cle):
+    """Supprime une clé de Redis et du L1 de ce processus."""
+    cache.delete(cle)
+    l1.delete(cle)
+
+
+def statistiques():
+    """
+    Compteurs du cache à deux niveaux pour ce processus.
+
+    Returns:
+        dict: {"pid", "l1": {"hits", "misses", "entrees", "capacite"},
+        "redis": {"hits", "misses"}}
+    """
+    with _verrou_compteurs:
+        compteurs = {niveau: dict(valeurs) for niveau, valeurs in _compteurs.items()}
+    compteurs["l1"].update(entrees=len(l1), capacite=l1.taille)
+    return {"pid": os.getpid(), **compteurs}
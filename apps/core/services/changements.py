@@ -0,0 +1,80 @@
+"""
+Flux de changements incrémental (synchronisation des terminaux POS).
+
+Un terminal ne relit que ce qui a changé depuis son dernier curseur : les
+objets créés ou modifiés (`updated_at`) et les objets supprimés (traces
+`Suppression`). Les deux flux sont parcourus par clé `(horodatage, id)`
+croissante et fusionnés ; le curseur mémorise la dernière clé renvoyée.
+
+Les changements des dernières `DECALAGE` secondes ne sont pas encore
+servis : une transaction plus longue pourrait encore valider une ligne
+dont `updated_at` est antérieur au curseur, et elle serait alors perdue.
+"""
+
+import heapq
+from datetime import timedelta
+from itertools import islice
+
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.models import Suppression
+
+DECALAGE = timedelta(seconds=5)
+
+
+def _apres(champ_date, champ_id, depuis):
+    """Prédicat `(champ_date, champ_id) > depuis`."""
+    date, objet_id = depuis
+    return Q(**{f"{champ_date}__gt": date}) | Q(
+        **{champ_date: date, f"{champ_id}__gt": objet_id}
+    )
+
+
+def lire_changements(queryset, entreprise_id, ressource, depuis=None, limite=500):
+    """
+    Lit au plus `limite` changements postérieurs à `depuis`.
+
+    Args:
+        queryset: Objets visibles par le tenant (déjà filtrés)
+        entreprise_id: Entreprise dont on lit les suppressions
+        ressource (str): Libellé du modèle ("commerce.produit")
+        depuis (tuple): (horodatage, id) du dernier changement lu, ou None
+        limite (int): Nombre maximal de changements renvoyés
+
+    Returns:
+        tuple: (objets modifiés, ids supprimés, dernière clé lue ou `depuis`, reste)
+            où `reste` indique que d'autres changements sont disponibles.
+    """
+    horizon = timezone.now() - DECALAGE
+
+    objets = queryset.filter(updated_at__lte=horizon)
+    suppressions = Suppression.objects.filter(
+        entreprise_id=entreprise_id, ressource=ressource, created_at__lte=horizon
+    )
+    if depuis is not None:
+        objets = objets.filter(_apres("updated_at", "id", depuis))
+        suppressions = suppressions.filter(_apres("created_at", "objet_id", depuis))
+
+    objets = objets.order_by("updated_at", "id")[: limite + 1]
+    suppressions = suppressions.order_by("created_at", "objet_id").values_list(
+        "created_at", "objet_id"
+    )[: limite + 1]
+
+    fusion = list(
+        islice(
+            heapq.merge(
+                ((objet.updated_at, objet.pk, objet) for objet in objets),
+                ((date, objet_id, None) for date, objet_id in suppressions),
+                key=lambda change: change[:2],
+            ),
+            limite + 1,
+        )
+    )
+    reste = len(fusion) > limite
+    fusion = fusion[:limite]
+
+    modifies = [objet for _, _, objet in fusion if objet is not None]
+    supprimes = [objet_id for _, objet_id, objet in fusion if objet is None]
+    dernier = fusion[-1][:2] if fusion else depuis
+    return modifies, supprimes, dernier, reste
@@ -0,0 +1,62 @@
+"""
+Signaux Django de l'app core.
+
+Enregistre une `Suppression` (tombstone) à chaque suppression d'un objet
+exposé par un flux de changements (`ChangeFeedMixin`), et retire de Redis
+le nom d'un rôle modifié ou supprimé (`nom_role`).
+"""
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import Suppression
+from .permissions import cle_role
+
+# Modèles exposés par un flux de changements.
+MODELES_SUIVIS = ("commerce.Produit", "partners.Partner")
+
+
+def enregistrer_suppression(sender, instance, origin=None, **kwargs):
+    """
+    Crée la trace de suppression d'un objet suivi.
+
+    Les suppressions en cascade d'une entreprise ne sont pas tracées :
+    le tenant disparaît avec ses flux.
+
+    Args:
+        sender: Modèle de l'objet supprimé
+        instance: Objet supprimé
+        origin: Objet ou queryset à l'origine de la suppression
+        **kwargs: Arguments additionnels du signal
+    """
+    if not instance.entreprise_id:
+        return
+    if getattr(origin, "_meta", None) and origin._meta.label == "tenants.Entreprise":
+        return
+
+    Suppression.objects.create(
+        entreprise_id=instance.entreprise_id,
+        ressource=sender._meta.label_lower,
+        objet_id=instance.pk,
+    )
+
+
+def invalider_role(sender, instance, **kwargs):
+    """Retire de Redis le nom d'un rôle modifié ou supprimé, après commit."""
+    role_id = instance.pk
+    transaction.on_commit(lambda: cache.delete(cle_role(role_id)))
+
+
+def connecter():
+    """Branche les signaux de suppression et d'invalidation des rôles."""
+    for label in MODELES_SUIVIS:
+        post_delete.connect(
+            enregistrer_suppression,
+            sender=apps.get_model(label),
+            dispatch_uid=f"suppression:{label}",
+        )
+    role = apps.get_model("accounts.Role")
+    post_save.connect(invalider_role, sender=role, dispatch_uid="role:save")
+    post_delete.connect(invalider_role, sender=role, dispatch_uid="role:delete")
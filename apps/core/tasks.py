@@ -0,0 +1,35 @@
+"""
+Tasks Celery de l'app core.
+"""
+
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Suppression
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3)
+def purge_suppressions(self):
+    """
+    Supprime les traces de suppression plus anciennes que la rétention.
+
+    Les terminaux dont le curseur est plus ancien reçoivent 410 sur
+    `changes/` et refont une synchronisation complète.
+
+    Returns:
+        dict: {"status": "success", "deleted_count": int}
+    """
+    try:
+        limite = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = Suppression.objects.filter(created_at__lt=limite).delete()
+        logger.info(f"Suppressions: {deleted} traces purgées.")
+        return {"status": "success", "deleted_count": deleted}
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=5**self.request.retries)
@@ -1 +1,115 @@
-# Create your tests here.
+from decimal import Decimal
+
+from rest_framework.test import APIClient
+
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import Role, User
+from apps.commerce.models import Vente
+from apps.core.permissions import cle_role, nom_role
+from apps.core.services.cache import l1
+from apps.partners.models import Partner
+from apps.tenants.models import Entreprise
+
+CACHE_LOCAL = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class KeysetPaginationTests(TestCase):
+    """Parcours des listes paginées par curseur, y compris sur une clé nullable."""
+
+    @classmethod
+    def setUpTestData(cls):
+        entreprise = Entreprise.objects.create(
+            nom="E", secteur="commerce", type="boutique", adresse="Bujumbura"
+        )
+        cls.user = User.objects.create_user(
+            email="admin@e.bi",
+            password="x",
+            nom="Admin",
+            prenom="E",
+            role=Role.objects.create(nom="ADMIN"),
+            entreprise=entreprise,
+        )
+        client = Partner.objects.create(
+            entreprise=entreprise, type="client", nom="C", email="c@e.bi"
+        )
+        # Deux ventes sans montant : `prix_vente` est nullable.
+        for prix in (3, None, 1, None, 2):
+            Vente.objects.create(
+                entreprise=entreprise,
+                client=client,
+                statut="en_attente",
+                prix_vente=prix,
+            )
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def parcourir(self, url, lien="next"):
+        """Suit les liens `lien` jusqu'au bout ; renvoie les pages de `prix_vente`."""
+        pages = []
+        while url:
+            reponse = self.api.get(url)
+            self.assertEqual(reponse.status_code, 200, reponse.content)
+            pages.append([vente["prix_vente"] for vente in reponse.data["results"]])
+            url = reponse.data[lien]
+        return pages
+
+    @staticmethod
+    def prix(valeurs):
+        return [None if v is None else Decimal(v) for v in valeurs]
+
+    def test_tri_nullable_croissant_nulles_en_dernier(self):
+        pages = self.parcourir("/api/ventes/?ordering=prix_vente&page_size=2")
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(
+            self.prix([v for page in pages for v in page]),
+            self.prix(["1", "2", "3", None, None]),
+        )
+
+    def test_tri_nullable_decroissant_nulles_en_dernier(self):
+        pages = self.parcourir("/api/ventes/?ordering=-prix_vente&page_size=2")
+        self.assertEqual(
+            self.prix([v for page in pages for v in page]),
+            self.prix(["3", "2", "1", None, None]),
+        )
+
+    def test_retour_en_arriere_depuis_les_nulles(self):
+        url = "/api/ventes/?ordering=prix_vente&page_size=2"
+        dernier = None
+        while url:
+            dernier = self.api.get(url).data
+            url = dernier["next"]
+
+        pages = self.parcourir(dernier["previous"], lien="previous")
+        self.assertEqual(
+            [self.prix(page) for page in pages],
+            [self.prix(["3", None]), self.prix(["1", "2"])],
+        )
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class NomRoleTests(TestCase):
+    """Nom du rôle en cache, invalidé pour tous les workers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="admin@e.bi",
+            password="x",
+            nom="Admin",
+            prenom="E",
+            role=Role.objects.create(nom="VENTES"),
+        )
+
+    def test_renommage_vu_malgre_une_copie_locale(self):
+        self.assertEqual(nom_role(self.user), "VENTES")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role.nom = "ADMIN"
+            self.user.role.save()
+        # Copie restée dans le cache mémoire d'un autre worker.
+        l1.set(cle_role(self.user.role_id), "VENTES")
+
+        self.assertEqual(nom_role(self.user), "ADMIN")
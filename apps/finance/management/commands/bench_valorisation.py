@@ -0,0 +1,190 @@
+"""
+Benchmark de la valorisation du stock (couches FIFO / coût moyen).
+
+Crée un produit avec `--receptions` entrées de stock déjà valorisées,
+puis compare :
+
+- le recalcul complet (relecture de toutes les entrées et rejeu FIFO des
+  sorties), ce que ferait un rapport sans valorisation incrémentale ;
+- la valorisation incrémentale : une sortie (`valoriser`) et la lecture
+  de la valeur du stock (`valeur_stock`).
+
+Les deux doivent donner la même valeur FIFO. Les données sont supprimées
+à la fin.
+
+Usage:
+    python manage.py bench_valorisation
+    python manage.py bench_valorisation --receptions 100000 --sorties 50
+"""
+
+import random
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.commerce.models import MouvementStock, Produit, StockDepot
+from apps.commerce.services.depots import depot_principal
+from apps.commerce.services.stock import decrement_stock
+from apps.finance.models import CoucheStock, Stock, ValeurStock
+from apps.finance.services.valorisation import valeur_stock, valoriser
+from apps.partners.models import Partner
+from apps.tenants.models import Entreprise
+
+LOT = 10000
+
+
+class Command(BaseCommand):
+    help = "Compare la valorisation incrémentale du stock au recalcul complet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--receptions",
+            type=int,
+            default=1_000_000,
+            help="Nombre d'entrées de stock du produit (défaut: 1000000)",
+        )
+        parser.add_argument(
+            "--sorties",
+            type=int,
+            default=20,
+            help="Nombre de sorties valorisées à mesurer (défaut: 20)",
+        )
+
+    def handle(self, *args, **options):
+        receptions = options["receptions"]
+        sorties = options["sorties"]
+
+        entreprise = Entreprise.objects.create(
+            nom="bench_valorisation", secteur="bench", type="bench", adresse="-"
+        )
+        try:
+            produit = self._preparer(entreprise, receptions)
+            depot_id = depot_principal(entreprise.pk)
+
+            debut = time.perf_counter()
+            for _ in range(sorties):
+                quantite = random.randint(1, 20)
+                with transaction.atomic():
+                    decrement_stock(produit.pk, quantite, depot_id)
+                    valoriser(
+                        [
+                            MouvementStock(
+                                entreprise_id=entreprise.pk,
+                                produit_id=produit.pk,
+                                type="ajustement",
+                                quantite=-quantite,
+                            )
+                        ]
+                    )
+            par_sortie = (time.perf_counter() - debut) / sorties
+
+            debut = time.perf_counter()
+            incrementale = valeur_stock(entreprise.pk)["fifo"]
+            lecture = time.perf_counter() - debut
+
+            debut = time.perf_counter()
+            complete = self._recalculer(produit)
+            recalcul = time.perf_counter() - debut
+
+            if abs(incrementale - complete) > Decimal("0.01"):
+                raise CommandError(
+                    f"Valeurs différentes : incrémentale {incrementale}, "
+                    f"recalcul {complete}."
+                )
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{receptions} entrées : "
+                    f"sortie valorisée {par_sortie * 1000:.1f} ms, "
+                    f"lecture de la valeur {lecture * 1000:.1f} ms, "
+                    f"recalcul complet {recalcul * 1000:.0f} ms "
+                    f"(valeur FIFO {incrementale})"
+                )
+            )
+        finally:
+            # Supprimer le produit emporte ses entrées sans ajustement de stock.
+            Produit.objects.filter(entreprise=entreprise).delete()
+            Partner.objects.filter(entreprise=entreprise).delete()
+            entreprise.delete()
+
+    def _preparer(self, entreprise, receptions):
+        """Crée le produit, ses entrées et leurs couches (sans les signaux)."""
+        fournisseur = Partner.objects.create(
+            entreprise=entreprise,
+            type="fournisseur",
+            nom="bench",
+            telephone="-",
+            email=f"bench-{entreprise.pk}@bench.invalid",
+        )
+        produit = Produit.objects.create(
+            entreprise=entreprise, nom="bench", categorie="bench", prix=1, quantite=0
+        )
+        quantite_totale, valeur_totale = 0, Decimal(0)
+        for depart in range(0, receptions, LOT):
+            stocks, couches = [], []
+            for _ in range(min(LOT, receptions - depart)):
+                quantite = random.randint(1, 100)
+                prix = Decimal(random.randint(100, 1000)) / 100
+                stock = Stock(
+                    entreprise=entreprise,
+                    produit=produit,
+                    fournisseur=fournisseur,
+                    quantite=quantite,
+                    prix_achat=prix,
+                    date_entree=date.today(),
+                )
+                stocks.append(stock)
+                couches.append(
+                    CoucheStock(
+                        id=stock.pk,  # même ordre (created_at, id) que les entrées
+                        entreprise=entreprise,
+                        produit=produit,
+                        stock=stock,
+                        quantite=quantite,
+                        quantite_restante=quantite,
+                        cout_unitaire=prix,
+                    )
+                )
+                quantite_totale += quantite
+                valeur_totale += quantite * prix
+            with transaction.atomic():
+                Stock.objects.bulk_create(stocks)
+                CoucheStock.objects.bulk_create(couches)
+
+        Produit.objects.filter(pk=produit.pk).update(quantite=quantite_totale)
+        StockDepot.objects.create(
+            entreprise=entreprise,
+            produit=produit,
+            depot_id=depot_principal(entreprise.pk),
+            quantite=quantite_totale,
+        )
+        ValeurStock.objects.create(
+            entreprise=entreprise,
+            produit=produit,
+            quantite=quantite_totale,
+            valeur_fifo=valeur_totale,
+            valeur_cmp=valeur_totale,
+        )
+        return produit
+
+    @staticmethod
+    def _recalculer(produit):
+        """Valeur FIFO par relecture de toutes les entrées (sorties rejouées)."""
+        sorti = Stock.objects.filter(produit=produit).values_list("quantite", flat=True)
+        sorti = sum(sorti, Decimal(0)) - Produit.objects.values_list(
+            "quantite", flat=True
+        ).get(pk=produit.pk)
+        valeur = Decimal(0)
+        entrees = (
+            Stock.objects.filter(produit=produit)
+            .order_by("created_at", "id")
+            .values_list("quantite", "prix_achat")
+        )
+        for quantite, prix in entrees.iterator(chunk_size=LOT):
+            consomme = min(sorti, quantite)
+            sorti -= consomme
+            valeur += (quantite - consomme) * prix
+        return valeur
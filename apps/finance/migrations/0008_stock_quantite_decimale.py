@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:08
+
+import apps.core.fields
+import django.core.validators
+from django.db import migrations
+from django.db.models import F
+
+ECHELLE = 1000
+
+
+def vers_milliemes(apps, schema_editor):
+    """Les quantités entières existantes deviennent des millièmes."""
+    apps.get_model("finance", "Stock").objects.update(quantite=F("quantite") * ECHELLE)
+
+
+def depuis_milliemes(apps, schema_editor):
+    apps.get_model("finance", "Stock").objects.update(quantite=F("quantite") / ECHELLE)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("finance", "0007_alter_depense_entreprise_alter_stock_entreprise"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="stock",
+            name="quantite",
+            field=apps.core.fields.QuantiteField(
+                default=0, validators=[django.core.validators.MinValueValidator(0)]
+            ),
+        ),
+        migrations.RunPython(vers_milliemes, depuis_milliemes),
+    ]
@@ -0,0 +1,235 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:20
+
+from decimal import Decimal
+
+import apps.core.fields
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def valorisation_initiale(apps, schema_editor):
+    """
+    Valorise le stock existant : une couche par produit au dernier prix d'achat
+    connu (0 à défaut).
+    """
+    Produit = apps.get_model("commerce", "Produit")
+    Stock = apps.get_model("finance", "Stock")
+    CoucheStock = apps.get_model("finance", "CoucheStock")
+    ValeurStock = apps.get_model("finance", "ValeurStock")
+
+    dernier_prix = (
+        Stock.objects.filter(produit=OuterRef("pk"), prix_achat__isnull=False)
+        .order_by("-date_entree", "-created_at")
+        .values("prix_achat")[:1]
+    )
+    produits = (
+        Produit.objects.filter(quantite__gt=0)
+        .annotate(prix_achat=Subquery(dernier_prix))
+        .values_list("pk", "entreprise_id", "quantite", "prix_achat")
+    )
+    couches, valeurs = [], []
+    for pk, entreprise_id, quantite, prix_achat in produits.iterator(chunk_size=2000):
+        cout = prix_achat or 0
+        valeur = (quantite * cout).quantize(Decimal("0.0001"))
+        couches.append(
+            CoucheStock(
+                entreprise_id=entreprise_id,
+                produit_id=pk,
+                quantite=quantite,
+                quantite_restante=quantite,
+                cout_unitaire=cout,
+            )
+        )
+        valeurs.append(
+            ValeurStock(
+                entreprise_id=entreprise_id,
+                produit_id=pk,
+                quantite=quantite,
+                valeur_fifo=valeur,
+                valeur_cmp=valeur,
+            )
+        )
+    CoucheStock.objects.bulk_create(couches, batch_size=2000)
+    ValeurStock.objects.bulk_create(valeurs, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0016_mouvementstock_pointstock"),
+        ("finance", "0008_stock_quantite_decimale"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CoucheStock",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("quantite", apps.core.fields.QuantiteField()),
+                ("quantite_restante", apps.core.fields.QuantiteField()),
+                (
+                    "cout_unitaire",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=14),
+                ),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="couches_stock",
+                        to="commerce.produit",
+                    ),
+                ),
+                (
+                    "stock",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="couches",
+                        to="finance.stock",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("quantite_restante__gt", 0)),
+                        fields=["produit", "created_at"],
+                        name="couche_stock_ouverte_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="CoutVente",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("quantite", apps.core.fields.QuantiteField()),
+                ("cout_fifo", models.DecimalField(decimal_places=4, max_digits=18)),
+                ("cout_cmp", models.DecimalField(decimal_places=4, max_digits=18)),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="couts_vente",
+                        to="commerce.produit",
+                    ),
+                ),
+                (
+                    "vente",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="couts",
+                        to="commerce.vente",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["entreprise", "created_at"],
+                        name="finance_cou_entrepr_534c3f_idx",
+                    ),
+                    models.Index(
+                        fields=["vente", "produit"],
+                        name="finance_cou_vente_i_e655d1_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ValeurStock",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("quantite", apps.core.fields.QuantiteField(default=0)),
+                (
+                    "valeur_fifo",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=18),
+                ),
+                (
+                    "valeur_cmp",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=18),
+                ),
+                (
+                    "entreprise",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.entreprise",
+                    ),
+                ),
+                (
+                    "produit",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="valeur_stock",
+                        to="commerce.produit",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+                "indexes": [
+                    models.Index(
+                        fields=["entreprise", "created_at"],
+                        name="finance_val_entrepr_d724d5_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(valorisation_initiale, migrations.RunPython.noop),
+    ]
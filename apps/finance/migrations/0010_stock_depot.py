@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("commerce", "0019_depots"),
+        ("finance", "0009_valorisation_stock"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stock",
+            name="depot",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="entrees",
+                to="commerce.depot",
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from apps.core.fields import QuantiteField
 from apps.core.models import BaseModel, TenantModel
 
 
@@ -9,7 +10,7 @@ class Stock(TenantModel):
         "commerce.Produit", on_delete=models.CASCADE, related_name="stocks"
     )
 
-    quantite = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    quantite = QuantiteField(default=0, validators=[MinValueValidator(0)])
     fournisseur = models.ForeignKey(
         "partners.Partner",
         on_delete=models.PROTECT,
@@ -22,6 +23,15 @@ class Stock(TenantModel):
 
     date_entree = models.DateField(db_index=True)
 
+    # Dépôt réceptionnaire (vide : dépôt principal, entrées antérieures)
+    depot = models.ForeignKey(
+        "commerce.Depot",
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name="entrees",
+    )
+
     def __str__(self):
         return f"{self.produit.nom} - {self.quantite}"
 
@@ -47,3 +57,112 @@ class Depense(TenantModel):
 
     def __str__(self):
         return f"{self.type} - {self.montant}"
+
+
+class CoucheStock(TenantModel):
+    """
+    Couche de coût FIFO : une quantité entrée en stock à un coût unitaire.
+
+    Les sorties consomment les couches les plus anciennes d'abord
+    (`quantite_restante` décroît) ; une couche épuisée n'est plus lue.
+
+    Attributs:
+        produit (ForeignKey): Produit concerné
+        stock (ForeignKey): Entrée de stock d'origine (None: ajustement, retour)
+        quantite (Decimal): Quantité entrée
+        quantite_restante (Decimal): Quantité non encore consommée
+        cout_unitaire (Decimal): Coût d'achat par unité du produit
+    """
+
+    produit = models.ForeignKey(
+        "commerce.Produit", on_delete=models.CASCADE, related_name="couches_stock"
+    )
+    stock = models.ForeignKey(
+        Stock, on_delete=models.SET_NULL, null=True, blank=True, related_name="couches"
+    )
+    quantite = QuantiteField()
+    quantite_restante = QuantiteField()
+    cout_unitaire = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["produit", "created_at"],
+                condition=models.Q(quantite_restante__gt=0),
+                name="couche_stock_ouverte_idx",
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.produit_id}: {self.quantite_restante}/{self.quantite} "
+            f"@ {self.cout_unitaire}"
+        )
+
+
+class ValeurStock(TenantModel):
+    """
+    Valorisation courante du stock d'un produit (mise à jour à chaque mouvement).
+
+    Attributs:
+        produit (OneToOneField): Produit concerné
+        quantite (Decimal): Quantité valorisée (égale au stock du produit)
+        valeur_fifo (Decimal): Valeur des couches FIFO restantes
+        valeur_cmp (Decimal): Valeur au coût moyen pondéré (CMP)
+
+    Le CMP unitaire vaut `valeur_cmp / quantite`.
+    """
+
+    produit = models.OneToOneField(
+        "commerce.Produit", on_delete=models.CASCADE, related_name="valeur_stock"
+    )
+    quantite = QuantiteField(default=0)
+    valeur_fifo = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    valeur_cmp = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+
+    @property
+    def cout_moyen(self):
+        """Coût moyen pondéré unitaire (0 si le stock est vide)."""
+        return self.valeur_cmp / self.quantite if self.quantite else 0
+
+    def __str__(self):
+        return (
+            f"{self.produit_id}: {self.quantite} "
+            f"(FIFO {self.valeur_fifo}, CMP {self.valeur_cmp})"
+        )
+
+
+class CoutVente(TenantModel):
+    """
+    Coût des marchandises vendues (COGS) d'un produit dans une vente.
+
+    Une annulation enregistre la ligne opposée (quantité et coûts
+    négatifs) à sa date : le coût des ventes d'une période est la somme
+    des lignes de la période.
+
+    Attributs:
+        vente (ForeignKey): Vente concernée
+        produit (ForeignKey): Produit vendu
+        quantite (Decimal): Quantité vendue (négative pour une annulation)
+        cout_fifo (Decimal): Coût selon les couches FIFO consommées
+        cout_cmp (Decimal): Coût au coût moyen pondéré
+    """
+
+    vente = models.ForeignKey(
+        "commerce.Vente", on_delete=models.CASCADE, related_name="couts"
+    )
+    produit = models.ForeignKey(
+        "commerce.Produit", on_delete=models.CASCADE, related_name="couts_vente"
+    )
+    quantite = QuantiteField()
+    cout_fifo = models.DecimalField(max_digits=18, decimal_places=4)
+    cout_cmp = models.DecimalField(max_digits=18, decimal_places=4)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["entreprise", "created_at"]),
+            models.Index(fields=["vente", "produit"]),
+        ]
+
+    def __str__(self):
+        return f"{self.vente_id} {self.produit_id}: {self.cout_fifo}"
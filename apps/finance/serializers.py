@@ -1,9 +1,10 @@
 from rest_framework import serializers
 
-from apps.commerce.models import Produit
+from apps.commerce.models import CatalogueUnites, Produit
+from apps.commerce.serializers import ProduitSerializer, valider_depot
+from apps.core.fields import quantite_vers_entier
+from apps.core.serializers import DynamicFieldsModelSerializer, QuantiteField
 from apps.partners.models import Partner
-
-from apps.commerce.serializers import ProduitSerializer
 from apps.partners.serializers import PartnerSerializer
 
 from .models import Depense, Stock
@@ -20,7 +21,7 @@ class DepenseSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class StockSerializer(serializers.ModelSerializer):
+class StockSerializer(DynamicFieldsModelSerializer):
     """
     Serializer pour les entrées de stock.
     
@@ -30,8 +31,14 @@ class StockSerializer(serializers.ModelSerializer):
     **Fields**:
     - `id`: UUID unique (lecture seule)
     - `produit`: UUID du produit (FK vers Produit)
-    - `quantite`: Quantité ajoutée (doit être > 0)
+    - `quantite`: Quantité ajoutée (doit être > 0, décimale possible)
+    - `unite`: Unité de `quantite` (écriture seule, optionnel, défaut: unité du
+      produit) ; la quantité est convertie et stockée dans l'unité du produit
     - `fournisseur`: UUID du fournisseur (Partner avec type="fournisseur")
+    - `depot`: UUID du dépôt réceptionnaire (optionnel, défaut: dépôt principal) ;
+      le modifier déplace la quantité d'un dépôt à l'autre
+    - `produit_detail`, `fournisseur_detail`: objets liés (lecture seule,
+      uniquement avec `?expand=produit` / `?expand=fournisseur`)
     - `prix_achat`: Prix d'achat unitaire (optionnel)
     - `date_entree`: Date d'entrée du stock (indexed)
     - `entreprise`: Défini automatiquement (lecture seule)
@@ -70,38 +77,62 @@ class StockSerializer(serializers.ModelSerializer):
     ```
     """
     
-    # Champs écriture (POST / PUT)
-    produit = serializers.PrimaryKeyRelatedField(
-        queryset=Produit.objects.all(),
-        # source="produit",
-        write_only=True
+    quantite = QuantiteField()
+    unite = serializers.ChoiceField(
+        choices=CatalogueUnites.get_choices(), write_only=True, required=False
     )
 
+    produit = serializers.PrimaryKeyRelatedField(queryset=Produit.objects.all())
+
     fournisseur = serializers.PrimaryKeyRelatedField(
-        queryset=Partner.objects.filter(type="fournisseur"),
-        # source="fournisseur",
-        write_only=True
+        queryset=Partner.objects.filter(type="fournisseur")
     )
 
-    # Champs lecture (GET)
+    # Objets liés, renvoyés uniquement sur demande (`?expand=`)
     produit_detail = ProduitSerializer(source="produit", read_only=True)
     fournisseur_detail = PartnerSerializer(source="fournisseur", read_only=True)
 
     class Meta:
         model = Stock
         fields = [
-            "id", "quantite", "prix_achat", "date_entree",
-            "entreprise", "produit", "fournisseur",
+            "id", "quantite", "unite", "prix_achat", "date_entree",
+            "entreprise", "produit", "fournisseur", "depot",
             "produit_detail", "fournisseur_detail",
             "created_at", "updated_at"
         ]
         read_only_fields = ("entreprise",)
+        expandable_fields = {
+            "produit": "produit_detail",
+            "fournisseur": "fournisseur_detail",
+        }
     
+    def validate_depot(self, value):
+        """Vérifie que le dépôt appartient à l'entreprise."""
+        return valider_depot(self, value)
+
     def validate_quantite(self, value):
         """Vérifie que la quantité est positive."""
         if value <= 0:
             raise serializers.ValidationError("La quantité doit être strictement positive.")
         return value
+
+    def validate(self, data):
+        """Convertit la quantité dans l'unité du produit."""
+        unite = data.pop("unite", None)
+        if unite:
+            produit = data.get("produit") or getattr(self.instance, "produit", None)
+            if produit is None or "quantite" not in data:
+                raise serializers.ValidationError(
+                    {"unite": "`unite` accompagne `produit` et `quantite`."}
+                )
+            try:
+                data["quantite"] = produit.convert_quantity_from(
+                    data["quantite"], unite
+                )
+                quantite_vers_entier(data["quantite"])
+            except ValueError as exc:
+                raise serializers.ValidationError({"quantite": str(exc)})
+        return data
     
     def create(self, validated_data):
         """Assigne automatiquement l'entreprise lors de la création."""
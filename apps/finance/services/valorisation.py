@@ -0,0 +1,348 @@
+"""
+Valorisation du stock : couches FIFO et coût moyen pondéré (CMP).
+
+Chaque mouvement de stock journalisé (`MouvementStock`) est valorisé au
+fil de l'eau, dans la transaction qui l'écrit :
+
+- une entrée crée une couche FIFO à son coût (`Stock.prix_achat`) et
+  augmente la valeur au CMP ;
+- une sortie consomme les couches les plus anciennes et diminue la
+  valeur au CMP courant ; une vente enregistre son coût (`CoutVente`) ;
+- une annulation ou un retour remet en stock au coût de la vente d'origine ;
+- une entrée dont le prix d'achat est corrigé avant toute sortie est
+  revalorisée (`recoter_entree`).
+
+La valeur du stock se lit dans `ValeurStock` (une ligne par produit) et
+le coût des ventes d'une période dans `CoutVente` : aucun rapport ne
+relit l'historique des entrées.
+"""
+
+from collections import defaultdict, deque
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.finance.models import CoucheStock, CoutVente, ValeurStock
+
+PRECISION = Decimal("0.0001")
+
+# Couches lues par requête lors d'une sortie (une seule suffit en général).
+PAQUET_COUCHES = 20
+
+
+class CoucheEntameeError(Exception):
+    """Levée lorsqu'une entrée déjà (en partie) sortie du stock change de coût."""
+
+
+def _arrondir(montant):
+    return Decimal(montant).quantize(PRECISION)
+
+
+def _couches_ouvertes(demandes):
+    """
+    Lit, par produit, les couches les plus anciennes couvrant la quantité demandée.
+
+    Lecture par l'index partiel des couches ouvertes `(produit, created_at)`,
+    par paquets de `PAQUET_COUCHES` : seules les couches nécessaires sont
+    lues, même si le produit a des millions d'entrées.
+
+    Args:
+        demandes (dict): {produit_id: quantite à sortir (Decimal)}
+
+    Returns:
+        dict: {produit_id: deque[CoucheStock]} du plus ancien au plus récent
+    """
+    couches = defaultdict(deque)
+    for produit_id, demande in demandes.items():
+        ouvertes = CoucheStock.objects.filter(
+            produit_id=produit_id, quantite_restante__gt=0
+        ).order_by("created_at", "id")
+        lues = couches[produit_id]
+        while demande > 0:
+            paquet = list(ouvertes[len(lues) : len(lues) + PAQUET_COUCHES])
+            lues.extend(paquet)
+            demande -= sum(couche.quantite_restante for couche in paquet)
+            if len(paquet) < PAQUET_COUCHES:
+                break
+    return couches
+
+
+def _verrouiller_valeurs(mouvements):
+    """Verrouille (et crée au besoin) la `ValeurStock` des produits concernés."""
+    entreprises = {m.produit_id: m.entreprise_id for m in mouvements}
+    valeurs = ValeurStock.objects.select_for_update().in_bulk(
+        list(entreprises), field_name="produit_id"
+    )
+    manquants = [pk for pk in entreprises if pk not in valeurs]
+    if manquants:
+        ValeurStock.objects.bulk_create(
+            [
+                ValeurStock(entreprise_id=entreprises[pk], produit_id=pk)
+                for pk in manquants
+            ],
+            ignore_conflicts=True,
+        )
+        valeurs.update(
+            ValeurStock.objects.select_for_update().in_bulk(
+                manquants, field_name="produit_id"
+            )
+        )
+    return valeurs
+
+
+# Entrées qui reprennent une vente : valorisées au coût de la vente d'origine
+# (mouvement de référence la vente).
+TYPES_REPRISE = ("annulation", "retour")
+
+
+def _couts_annules(mouvements):
+    """
+    Coûts unitaires des ventes reprises : {(vente_id, produit_id): (fifo, cmp)}.
+    """
+    ventes = {
+        m.reference for m in mouvements if m.type in TYPES_REPRISE and m.quantite > 0
+    }
+    if not ventes:
+        return {}
+    lignes = (
+        CoutVente.objects.filter(vente_id__in=ventes, quantite__gt=0)
+        .values("vente_id", "produit_id")
+        .annotate(quantite=Sum("quantite"), fifo=Sum("cout_fifo"), cmp=Sum("cout_cmp"))
+    )
+    return {
+        (ligne["vente_id"], ligne["produit_id"]): (
+            ligne["fifo"] / ligne["quantite"],
+            ligne["cmp"] / ligne["quantite"],
+        )
+        for ligne in lignes
+        if ligne["quantite"]
+    }
+
+
+def valoriser(mouvements, couts=None):
+    """
+    Valorise des mouvements de stock déjà journalisés.
+
+    Le coût ne dépend pas de l'historique : verrouillage des `ValeurStock`,
+    lecture des seules couches à consommer (une requête par produit sorti),
+    puis écritures groupées (couches, coûts des ventes, valeurs).
+
+    Args:
+        mouvements (list[MouvementStock]): Mouvements dans leur ordre d'application
+        couts (dict): {produit_id: coût unitaire} des entrées et ajustements
+            positifs ; à défaut, le CMP courant du produit est utilisé
+
+    Returns:
+        list[CoutVente]: Coûts des ventes (et de leurs annulations ou retours)
+            enregistrés
+    """
+    # Un transfert entre dépôts ne change ni la quantité ni la valeur du produit.
+    mouvements = [m for m in mouvements if m.type != "transfert"]
+    if not mouvements:
+        return []
+    couts = couts or {}
+
+    with transaction.atomic():
+        valeurs = _verrouiller_valeurs(mouvements)
+        demandes = defaultdict(Decimal)
+        for mouvement in mouvements:
+            if mouvement.quantite < 0:
+                demandes[mouvement.produit_id] -= mouvement.quantite
+        couches = _couches_ouvertes(demandes)
+        annules = _couts_annules(mouvements)
+
+        nouvelles, modifiees, couts_vente = [], {}, []
+        for mouvement in mouvements:
+            valeur = valeurs[mouvement.produit_id]
+            ouvertes = couches[mouvement.produit_id]
+            if mouvement.quantite > 0:
+                couche = _entrer(valeur, mouvement, couts, annules, couts_vente)
+                ouvertes.append(couche)
+                nouvelles.append(couche)
+            else:
+                _sortir(valeur, mouvement, ouvertes, modifiees, couts_vente)
+
+        maintenant = timezone.now()
+        existantes = [c for c in modifiees.values() if not c._state.adding]
+        for objet in [*existantes, *valeurs.values()]:
+            objet.updated_at = maintenant
+
+        CoucheStock.objects.bulk_create(nouvelles, batch_size=1000)
+        CoucheStock.objects.bulk_update(
+            existantes, ["quantite_restante", "updated_at"], batch_size=1000
+        )
+        CoutVente.objects.bulk_create(couts_vente, batch_size=1000)
+        ValeurStock.objects.bulk_update(
+            list(valeurs.values()),
+            ["quantite", "valeur_fifo", "valeur_cmp", "updated_at"],
+            batch_size=1000,
+        )
+    return couts_vente
+
+
+def _entrer(valeur, mouvement, couts, annules, couts_vente):
+    """Applique une entrée ; retourne la nouvelle couche (non sauvegardée)."""
+    quantite = mouvement.quantite
+    if (
+        mouvement.type in TYPES_REPRISE
+        and (mouvement.reference, mouvement.produit_id) in annules
+    ):
+        unitaire_fifo, unitaire_cmp = annules[
+            (mouvement.reference, mouvement.produit_id)
+        ]
+        couts_vente.append(
+            CoutVente(
+                entreprise_id=mouvement.entreprise_id,
+                vente_id=mouvement.reference,
+                produit_id=mouvement.produit_id,
+                quantite=-quantite,
+                cout_fifo=-_arrondir(quantite * unitaire_fifo),
+                cout_cmp=-_arrondir(quantite * unitaire_cmp),
+            )
+        )
+    else:
+        cout = couts.get(mouvement.produit_id)
+        unitaire_fifo = unitaire_cmp = cout if cout is not None else valeur.cout_moyen
+
+    couche = CoucheStock(
+        entreprise_id=mouvement.entreprise_id,
+        produit_id=mouvement.produit_id,
+        stock_id=mouvement.reference if mouvement.type == "entree" else None,
+        quantite=quantite,
+        quantite_restante=quantite,
+        cout_unitaire=_arrondir(unitaire_fifo),
+    )
+    valeur.quantite += quantite
+    valeur.valeur_fifo += _arrondir(quantite * unitaire_fifo)
+    valeur.valeur_cmp += _arrondir(quantite * unitaire_cmp)
+    return couche
+
+
+def _sortir(valeur, mouvement, ouvertes, modifiees, couts_vente):
+    """
+    Applique une sortie : consomme les couches FIFO et, pour une vente,
+    enregistre son coût.
+    """
+    quantite = -mouvement.quantite
+    cout_cmp = _arrondir(quantite * valeur.cout_moyen)
+
+    reste, cout_fifo = quantite, Decimal(0)
+    while reste and ouvertes:
+        couche = ouvertes[0]
+        prise = min(reste, couche.quantite_restante)
+        couche.quantite_restante -= prise
+        modifiees[id(couche)] = couche
+        cout_fifo += _arrondir(prise * couche.cout_unitaire)
+        reste -= prise
+        if not couche.quantite_restante:
+            ouvertes.popleft()
+    if reste:
+        # Stock non couvert par des couches (antérieur à la valorisation) :
+        # valorisé au CMP, sans couche à consommer.
+        cout_fifo += _arrondir(reste * valeur.cout_moyen)
+    valeur.valeur_fifo -= cout_fifo
+
+    valeur.quantite -= quantite
+    valeur.valeur_cmp -= cout_cmp
+    if valeur.quantite <= 0:
+        valeur.valeur_cmp = Decimal(0)
+
+    if mouvement.type == "vente":
+        couts_vente.append(
+            CoutVente(
+                entreprise_id=mouvement.entreprise_id,
+                vente_id=mouvement.reference,
+                produit_id=mouvement.produit_id,
+                quantite=quantite,
+                cout_fifo=cout_fifo,
+                cout_cmp=cout_cmp,
+            )
+        )
+
+
+def recoter_entree(stock_id, cout):
+    """
+    Revalorise au coût corrigé la couche FIFO d'une entrée de stock.
+
+    La valeur FIFO et CMP du produit suit l'écart. Les `ValeurStock` sont
+    verrouillées avant les couches, dans l'ordre de `valoriser`.
+
+    Args:
+        stock_id: UUID de l'entrée (`Stock`)
+        cout (Decimal): Nouveau coût unitaire (`Stock.prix_achat`)
+
+    Raises:
+        CoucheEntameeError: Une partie de l'entrée est déjà sortie du stock,
+            valorisée à l'ancien coût (rien n'est écrit)
+    """
+    produit_ids = set(
+        CoucheStock.objects.filter(stock_id=stock_id).values_list(
+            "produit_id", flat=True
+        )
+    )
+    if not produit_ids:
+        return
+    cout = _arrondir(cout)
+
+    with transaction.atomic():
+        valeurs = ValeurStock.objects.select_for_update().in_bulk(
+            list(produit_ids), field_name="produit_id"
+        )
+        couches = list(
+            CoucheStock.objects.filter(stock_id=stock_id).exclude(cout_unitaire=cout)
+        )
+        if any(couche.quantite_restante < couche.quantite for couche in couches):
+            raise CoucheEntameeError(
+                "Entrée déjà sortie du stock (en partie) : son prix d'achat "
+                "n'est plus modifiable."
+            )
+        maintenant = timezone.now()
+        for couche in couches:
+            ecart = _arrondir(couche.quantite * cout) - _arrondir(
+                couche.quantite * couche.cout_unitaire
+            )
+            valeur = valeurs[couche.produit_id]
+            valeur.valeur_fifo += ecart
+            if valeur.quantite > 0:
+                valeur.valeur_cmp += ecart
+            valeur.updated_at = maintenant
+            couche.cout_unitaire = cout
+            couche.updated_at = maintenant
+
+        CoucheStock.objects.bulk_update(couches, ["cout_unitaire", "updated_at"])
+        ValeurStock.objects.bulk_update(
+            list(valeurs.values()), ["valeur_fifo", "valeur_cmp", "updated_at"]
+        )
+
+
+def valeur_stock(entreprise_id):
+    """
+    Valeur du stock d'une entreprise.
+
+    Returns:
+        dict: {"fifo": Decimal, "cmp": Decimal}
+    """
+    totaux = ValeurStock.objects.filter(entreprise_id=entreprise_id).aggregate(
+        fifo=Sum("valeur_fifo"), cmp=Sum("valeur_cmp")
+    )
+    return {cle: _arrondir(total or 0) for cle, total in totaux.items()}
+
+
+def cout_des_ventes(entreprise_id, debut, fin):
+    """
+    Coût des marchandises vendues sur une période (annulations déduites).
+
+    Args:
+        entreprise_id: Entreprise concernée
+        debut (datetime): Début de période (inclus)
+        fin (datetime): Fin de période (exclue)
+
+    Returns:
+        dict: {"fifo": Decimal, "cmp": Decimal}
+    """
+    totaux = CoutVente.objects.filter(
+        entreprise_id=entreprise_id, created_at__gte=debut, created_at__lt=fin
+    ).aggregate(fifo=Sum("cout_fifo"), cmp=Sum("cout_cmp"))
+    return {cle: _arrondir(total or 0) for cle, total in totaux.items()}
@@ -4,33 +4,137 @@ Signaux Django pour l'app finance.
 Gère les actions automatiques lors de la création/modification des modèles.
 """
 
-from django.db.models.signals import post_save
+from collections import defaultdict
+
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from apps.commerce.services.depots import depot_principal
+from apps.commerce.services.mouvements import enregistrer_mouvements
+from apps.commerce.services.stock import (
+    decrement_stock_bulk,
+    increment_stock,
+    increment_stock_bulk,
+)
+
 from .models import Stock
+from .services.valorisation import recoter_entree
 
 
 @receiver(post_save, sender=Stock)
 def increment_product_quantity(sender, instance, created, **kwargs):
     """
     Signal pour incrémenter la quantité du produit lors d'une entrée de stock.
-    
+
     Déclenché automatiquement après la création d'une instance Stock.
     Met à jour la quantite du Produit en ajoutant la quantité spécifiée.
-    
+
     Args:
         sender: Classe Stock
         instance: Instance Stock créée
         created: Boolean indiquant si c'est une création (True) ou modification (False)
         **kwargs: Arguments additionnels du signal
-    
+
     Comportement:
-    - Vérifie que c'est une création (created=True)
-    - Récupère le produit associé
-    - Ajoute la quantité du stock à la quantité du produit
-    - Sauvegarde le produit avec update_fields pour optimiser
+    - Création : ajoute la quantité au dépôt de l'entrée (principal par
+      défaut) via un UPDATE atomique (moteur de stock), sans relire ni
+      sauvegarder le produit, et journalise une entrée (`MouvementStock`)
+      valorisée au `prix_achat`
+    - Modification : revalorise la couche FIFO de l'entrée si le
+      `prix_achat` change (refusé si elle est entamée), puis applique l'écart
+      avec la version précédente (quantité, produit ou dépôt modifiés) et le
+      journalise comme ajustement
     """
     if created:
-        produit = instance.produit
-        produit.quantite += instance.quantite
-        produit.save(update_fields=['quantite'])
+        depot_id = instance.depot_id or depot_principal(instance.entreprise_id)
+        increment_stock(instance.produit_id, instance.quantite, depot_id)
+        enregistrer_mouvements(
+            instance.entreprise_id,
+            "entree",
+            {instance.produit_id: instance.quantite},
+            instance.pk,
+            couts={instance.produit_id: instance.prix_achat},
+            depot_id=depot_id,
+        )
+        return
+
+    precedent = getattr(instance, "_stock_precedent", None)
+    if precedent is None:
+        return
+    produit_id, depot_id, quantite, prix_achat = precedent
+    if instance.prix_achat is not None and instance.prix_achat != prix_achat:
+        # Avant les écarts : un retrait pourrait entamer la couche de l'entrée.
+        recoter_entree(instance.pk, instance.prix_achat)
+    ecarts = defaultdict(int)
+    ecarts[(depot_id, produit_id)] -= quantite
+    ecarts[(instance.depot_id, instance.produit_id)] += instance.quantite
+    appliquer_ecarts_stock(instance, ecarts)
+
+
+@receiver(pre_save, sender=Stock)
+def memoriser_stock_precedent(sender, instance, **kwargs):
+    """Mémorise produit, dépôt, quantité et prix enregistrés avant une modification."""
+    if instance._state.adding:
+        return
+    instance._stock_precedent = (
+        Stock.objects.filter(pk=instance.pk)
+        .values_list("produit_id", "depot_id", "quantite", "prix_achat")
+        .first()
+    )
+
+
+@receiver(post_delete, sender=Stock)
+def decrement_product_quantity(sender, instance, origin=None, **kwargs):
+    """
+    Retire du stock du produit la quantité d'une entrée supprimée.
+
+    Ignoré lorsque la suppression vient d'un autre objet (suppression en
+    cascade d'un produit ou d'une entreprise).
+
+    Raises:
+        StockInsuffisantError: Si la quantité a déjà été (en partie) vendue
+    """
+    modele = getattr(origin, "model", None) or type(origin)
+    if modele is not Stock:
+        return
+    appliquer_ecarts_stock(
+        instance, {(instance.depot_id, instance.produit_id): -instance.quantite}
+    )
+
+
+def appliquer_ecarts_stock(stock, ecarts):
+    """
+    Applique et journalise (ajustement) les écarts de stock d'une entrée modifiée.
+
+    Args:
+        stock: Entrée de stock à l'origine des écarts
+        ecarts (dict): {(depot_id, produit_id): variation signée} ; un dépôt
+            vide désigne le dépôt principal
+
+    Raises:
+        StockInsuffisantError: Si un retrait dépasse le stock du dépôt
+    """
+    principal = None
+    par_depot = defaultdict(dict)
+    for (depot_id, produit_id), quantite in ecarts.items():
+        if not quantite:
+            continue
+        if depot_id is None:
+            principal = principal or depot_principal(stock.entreprise_id)
+            depot_id = principal
+        par_depot[depot_id][produit_id] = (
+            par_depot[depot_id].get(produit_id, 0) + quantite
+        )
+
+    for depot_id, quantites in par_depot.items():
+        quantites = {pk: q for pk, q in quantites.items() if q}
+        decrement_stock_bulk({pk: -q for pk, q in quantites.items() if q < 0}, depot_id)
+        increment_stock_bulk({pk: q for pk, q in quantites.items() if q > 0}, depot_id)
+        enregistrer_mouvements(
+            stock.entreprise_id,
+            "ajustement",
+            quantites,
+            stock.pk,
+            couts={pk: stock.prix_achat for pk in quantites},
+            depot_id=depot_id,
+        )
@@ -1 +1,92 @@
-# Create your tests here.
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APIClient
+
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import Role, User
+from apps.commerce.models import Produit
+from apps.commerce.services.ventes import creer_vente
+from apps.finance.models import CoucheStock, Stock, ValeurStock
+from apps.partners.models import Partner
+from apps.tenants.models import Entreprise
+
+CACHE_LOCAL = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class PrixAchatEntreeTests(TestCase):
+    """Correction du prix d'achat d'une entrée de stock et couche FIFO."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.entreprise = Entreprise.objects.create(
+            nom="E", secteur="commerce", type="boutique", adresse="Bujumbura"
+        )
+        cls.user = User.objects.create_user(
+            email="admin@e.bi",
+            password="x",
+            nom="Admin",
+            prenom="E",
+            role=Role.objects.create(nom="ADMIN"),
+            entreprise=cls.entreprise,
+        )
+        cls.fournisseur = Partner.objects.create(
+            entreprise=cls.entreprise, type="fournisseur", nom="F", email="f@e.bi"
+        )
+        cls.client_ = Partner.objects.create(
+            entreprise=cls.entreprise, type="client", nom="C", email="c@e.bi"
+        )
+        cls.produit = Produit.objects.create(
+            entreprise=cls.entreprise, nom="P", categorie="c", prix=10
+        )
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.entree = Stock.objects.create(
+            entreprise=self.entreprise,
+            produit=self.produit,
+            fournisseur=self.fournisseur,
+            quantite=10,
+            prix_achat=4,
+            date_entree=date.today(),
+        )
+
+    def corriger(self, **champs):
+        return self.api.patch(f"/api/stocks/{self.entree.pk}/", champs, format="json")
+
+    def valeur(self):
+        return ValeurStock.objects.values_list("valeur_fifo", "valeur_cmp").get(
+            produit=self.produit
+        )
+
+    def test_couche_intacte_revalorisee(self):
+        reponse = self.corriger(prix_achat="5.50")
+        self.assertEqual(reponse.status_code, 200, reponse.content)
+        self.assertEqual(
+            CoucheStock.objects.get(stock=self.entree).cout_unitaire, Decimal("5.5")
+        )
+        self.assertEqual(self.valeur(), (55, 55))
+
+    def test_prix_et_quantite_corriges_ensemble(self):
+        reponse = self.corriger(prix_achat="5", quantite=12)
+        self.assertEqual(reponse.status_code, 200, reponse.content)
+        self.assertEqual(CoucheStock.objects.get(stock=self.entree).cout_unitaire, 5)
+        self.assertEqual(self.valeur(), (60, 60))
+
+    def test_couche_entamee_refusee(self):
+        creer_vente(
+            self.entreprise,
+            self.client_,
+            "payee",
+            [{"produit": self.produit, "quantite": 3, "prix_unitaire": 10}],
+        )
+        reponse = self.corriger(prix_achat="5")
+        self.assertEqual(reponse.status_code, 400, reponse.content)
+        self.assertIn("prix_achat", reponse.data)
+        self.entree.refresh_from_db()
+        self.assertEqual(self.entree.prix_achat, 4)
+        self.assertEqual(CoucheStock.objects.get(stock=self.entree).cout_unitaire, 4)
+        self.assertEqual(self.valeur(), (28, 28))
@@ -1,9 +1,16 @@
+from contextlib import contextmanager
+
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import ModelViewSet
 
-from apps.core.mixins import TenantQuerySetMixin
+from django.db import transaction
+
+from apps.commerce.services.stock import StockInsuffisantError
+from apps.core.filters import RechercheFilter
+from apps.core.mixins import ExpandQuerySetMixin, IdempotencyMixin, TenantQuerySetMixin
 from apps.core.permissions import (
     HasRolePermission,
     IsAuthenticatedAndTenant,
@@ -13,9 +20,10 @@ from apps.core.permissions import (
 
 from .models import Depense, Stock
 from .serializers import DepenseSerializer, StockSerializer
+from .services.valorisation import CoucheEntameeError
 
 
-class DepenseViewSet(TenantQuerySetMixin, ModelViewSet):
+class DepenseViewSet(IdempotencyMixin, TenantQuerySetMixin, ModelViewSet):
     serializer_class = DepenseSerializer
     permission_classes = [
         IsAuthenticatedAndTenant,
@@ -44,7 +52,9 @@ class DepenseViewSet(TenantQuerySetMixin, ModelViewSet):
         return Depense.objects.filter(entreprise=self.request.user.entreprise)
 
 
-class StockViewSet(TenantQuerySetMixin, ModelViewSet):
+class StockViewSet(
+    ExpandQuerySetMixin, IdempotencyMixin, TenantQuerySetMixin, ModelViewSet
+):
     """
     API Endpoint pour gérer les entrées de stock.
     
@@ -71,7 +81,11 @@ class StockViewSet(TenantQuerySetMixin, ModelViewSet):
     Filtrage et recherche:
     - Filtre par: produit, fournisseur, date_entree
     - Recherche: nom du produit ou du fournisseur
+    - `?fields=` : champs renvoyés ; `?expand=produit,fournisseur` : objets liés
     - Tri par: date_entree, created_at
+
+    Modifier ou supprimer une entrée ajuste le stock du produit (mouvement
+    "ajustement") ; refusé (400) si la quantité retirée a déjà été vendue.
     """
     serializer_class = StockSerializer
     permission_classes = [
@@ -84,11 +98,11 @@ class StockViewSet(TenantQuerySetMixin, ModelViewSet):
 
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        RechercheFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["produit", "fournisseur", "date_entree"]
-    search_fields = ["produit__nom", "fournisseur__nom"]
+    search_fields = ["produit__recherche", "fournisseur__recherche"]
     ordering_fields = ["date_entree", "created_at"]
     ordering = ["-date_entree"]
 
@@ -99,4 +113,27 @@ class StockViewSet(TenantQuerySetMixin, ModelViewSet):
 
         return Stock.objects.filter(entreprise=self.request.user.entreprise)
 
+    def perform_update(self, serializer):
+        with self._ajustement_stock():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with self._ajustement_stock():
+            super().perform_destroy(instance)
 
+    @contextmanager
+    def _ajustement_stock(self):
+        """
+        Exécute la modification dans une transaction ; rupture de stock ou
+        prix d'achat d'une entrée entamée -> 400.
+        """
+        try:
+            with transaction.atomic():
+                yield
+        except StockInsuffisantError as exc:
+            raise ValidationError(
+                f"Stock insuffisant : la quantité retirée a déjà été vendue "
+                f"(disponible: {exc.disponible})."
+            )
+        except CoucheEntameeError as exc:
+            raise ValidationError({"prix_achat": str(exc)})
@@ -6,4 +6,4 @@ from .models import Partner
 # Register your models here.
 @admin.register(Partner)
 class PartnerAdmin(admin.ModelAdmin):
-    pass
+    readonly_fields = ("montant_paye", "reste_a_payer")
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("partners", "0003_alter_partner_email_and_more"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="partner",
+            index=models.Index(
+                fields=["entreprise", "updated_at"],
+                name="partners_pa_entrepr_ad1b55_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("partners", "0005_partner_recherche"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="partner",
+            name="montant_paye",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name="partner",
+            name="reste_a_payer",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 
+from apps.core.fields import RechercheField
 from apps.core.models import BaseModel, TenantModel
 
 
@@ -17,6 +18,10 @@ class Partner(TenantModel):
         email (str): Adresse email unique par entreprise (optionnel)
         telephone (str): Numéro de téléphone (max 20 caractères)
         adresse (str): Adresse complète (optionnel)
+        recherche (str): nom, prénom, email et téléphone normalisés (calculé
+            automatiquement)
+        montant_paye (Decimal): Total des paiements reçus du client
+        reste_a_payer (Decimal): Encours du client (créances non soldées)
         entreprise (ForeignKey): Entreprise propriétaire
         created_at (datetime): Horodatage de création
         updated_at (datetime): Horodatage de la dernière modification
@@ -57,6 +62,11 @@ class Partner(TenantModel):
     email = models.EmailField(blank=True, unique=True)
     telephone = models.CharField(max_length=20)
     adresse = models.TextField(blank=True)
+    recherche = RechercheField(sources=("nom", "prenom", "email", "telephone"))
+
+    # Soldes tenus par `apps.commerce.services.paiements` (clients uniquement)
+    montant_paye = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    reste_a_payer = models.DecimalField(max_digits=14, decimal_places=2, default=0)
 
     def __str__(self):
         """Retourne une représentation lisible du partenaire."""
@@ -68,6 +78,8 @@ class Partner(TenantModel):
         indexes = [
             models.Index(fields=["entreprise", "type"]),
             models.Index(fields=["entreprise", "nom"]),
+            models.Index(fields=["entreprise", "updated_at"]),
+            models.Index(fields=["entreprise", "recherche"]),
         ]
         
         constraints = [
@@ -1,13 +1,13 @@
-from rest_framework import serializers
+from apps.core.serializers import DynamicFieldsModelSerializer
 
 from .models import Partner
 
 
-class PartnerSerializer(serializers.ModelSerializer):
+class PartnerSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Partner
-        fields = "__all__"
-        read_only_fields = ("entreprise",)
+        exclude = ("recherche",)
+        read_only_fields = ("entreprise", "montant_paye", "reste_a_payer")
 
     def create(self, validated_data):
         validated_data["entreprise"] = self.context["request"].user.entreprise
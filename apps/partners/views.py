@@ -5,7 +5,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from apps.core.mixins import TenantQuerySetMixin
+from apps.core.filters import RechercheFilter
+from apps.core.mixins import ChangeFeedMixin, TenantQuerySetMixin
 from apps.core.permissions import (
     HasRolePermission,
     IsAuthenticatedAndTenant,
@@ -17,7 +18,7 @@ from .models import Partner
 from .serializers import PartnerSerializer
 
 
-class PartnerViewSet(TenantQuerySetMixin, ModelViewSet):
+class PartnerViewSet(ChangeFeedMixin, TenantQuerySetMixin, ModelViewSet):
     """
     API Endpoint pour gérer les partenaires (clients et fournisseurs).
     
@@ -32,7 +33,8 @@ class PartnerViewSet(TenantQuerySetMixin, ModelViewSet):
     - DELETE /api/partners/{id}/ : Supprimer un partenaire
     
     Permissions: Authentification JWT + Role finance pour créer/modifier
-    Filtrage: nom, email, telephone - Recherche: nom, prenom, email
+    Filtrage: nom, email, telephone - Recherche: nom, prenom, email, telephone
+    (insensible à la casse et aux accents)
     """
     serializer_class = PartnerSerializer
     permission_classes = [
@@ -45,11 +47,11 @@ class PartnerViewSet(TenantQuerySetMixin, ModelViewSet):
 
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        RechercheFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["nom", "email", "telephone"]
-    search_fields = ["nom", "prenom", "email"]
+    search_fields = ["recherche"]
     ordering_fields = ["nom", "created_at"]
     ordering = ["nom"]
 
@@ -68,7 +70,11 @@ class PartnerViewSet(TenantQuerySetMixin, ModelViewSet):
         GET /api/partners/clients/
         Retourne uniquement les partenaires de type "client".
         """
-        queryset = self.get_queryset().filter(type="client")
+        queryset = self.filter_queryset(self.get_queryset().filter(type="client"))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -80,7 +86,11 @@ class PartnerViewSet(TenantQuerySetMixin, ModelViewSet):
         GET /api/partners/fournisseurs/
         Retourne uniquement les partenaires de type "fournisseur".
         """
-        queryset = self.get_queryset().filter(type="fournisseur")
+        queryset = self.filter_queryset(self.get_queryset().filter(type="fournisseur"))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -42,6 +42,33 @@ app.conf.beat_schedule = {
             'expires': 600,  # Expire après 10 minutes
         }
     },
+
+    # Purge les traces de suppression des flux `changes/` tous les jours à 03:00
+    'purge-suppressions': {
+        'task': 'apps.core.tasks.purge_suppressions',
+        'schedule': crontab(hour=3, minute=0),
+        'options': {
+            'expires': 3600,
+        }
+    },
+
+    # Fige le stock des produits ayant bougé (points de stock) tous les jours à 02:00
+    'creer-points-stock': {
+        'task': 'apps.commerce.tasks.creer_points_stock',
+        'schedule': crontab(hour=2, minute=0),
+        'options': {
+            'expires': 3600,
+        }
+    },
+
+    # Récapitulatif des produits en stock bas / faible couverture tous les jours à 06:00
+    'notifier-stocks-bas': {
+        'task': 'apps.commerce.tasks.notifier_stocks_bas',
+        'schedule': crontab(hour=6, minute=0),
+        'options': {
+            'expires': 3600,
+        }
+    },
 }
 
 # Configuration additionnelle
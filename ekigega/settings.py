@@ -83,8 +83,8 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ),
-    # "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
-    # "PAGE_SIZE": 10,
+    "DEFAULT_PAGINATION_CLASS": "apps.core.pagination.KeysetPagination",
+    "PAGE_SIZE": int(os.environ.get("API_PAGE_SIZE", 50)),
 }
 
 SIMPLE_JWT = {
@@ -198,6 +198,21 @@ CELERY_RESULT_BACKEND = 'django-db'
 # Temps de vie par défaut pour cache analytics (en secondes)
 ANALYTICS_CACHE_TTL = int(os.environ.get("ANALYTICS_CACHE_TTL"))
 
+# Cache mémoire par processus (L1) devant Redis : nombre d'entrées, durée
+# de vie maximale d'une entrée et délai de relecture des versions (en secondes)
+CACHE_L1_TAILLE = int(os.environ.get("CACHE_L1_TAILLE", 1000))
+CACHE_L1_TTL = float(os.environ.get("CACHE_L1_TTL", 30))
+CACHE_L1_VERSION_TTL = float(os.environ.get("CACHE_L1_VERSION_TTL", 1))
+
+# Durée de conservation des réponses rejouables via `Idempotency-Key` (en secondes)
+IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 86400))
+
+# Durée de vie des produits mis en cache pour `produits/scan/{code}/` (en secondes)
+SCAN_CACHE_TTL = int(os.environ.get("SCAN_CACHE_TTL", 3600))
+
+# Durée de conservation des traces de suppression des flux `changes/` (en jours)
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get("SYNC_TOMBSTONE_RETENTION_DAYS", 90))
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
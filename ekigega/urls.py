@@ -12,6 +12,8 @@ from apps.ai.ml.views.analytics import ExpenseMLAnalyticsView, SalesMLAnalyticsV
 from apps.ai.ml.views.health import EnterpriseHealthView
 from apps.commerce.views import (
     CategorieViewSet,
+    DepotViewSet,
+    InventaireViewSet,
     ProduitViewSet,
     VenteViewSet,
 )
@@ -28,6 +30,8 @@ router.register(r"partners", PartnerViewSet, basename="partners")
 router.register(r"tenants", EntrepriseViewSet, basename="tenants")
 router.register(r"categories", CategorieViewSet, basename="categories")
 router.register(r"produits", ProduitViewSet, basename="produits")
+router.register(r"depots", DepotViewSet, basename="depots")
+router.register(r"inventaires", InventaireViewSet, basename="inventaires")
 router.register(r"stocks", StockViewSet, basename="stock")
 router.register(r"ventes", VenteViewSet, basename="ventes")
 router.register(r"depenses", DepenseViewSet, basename="depenses")
@@ -79,13 +83,38 @@ swagger_info = openapi.Info(
       - Nombre de ventes, clients, produits en stock
       - Panier moyen
       - Top 10 produits les plus vendus
-    - **Caching** : résultats mis en cache pour performance
+    - **Caching** : résultats mis en cache par entreprise ; toute écriture (vente,
+      paiement, dépense, stock, produit, partenaire) invalide le cache de l'entreprise
+      au commit
 
     ## Endpoints principaux
 
     ### Commerce (`/api/`)
     - **Catégories** : `GET/POST/PATCH /categories/` — gestion des catégories
     - **Produits** : `GET/POST/PATCH /produits/` — gestion des produits
+    - **Stock bas** : `GET /produits/low-stock/` — produits sous leur point de commande
+      (`seuil_reappro`) ; un récapitulatif quotidien (seuil et jours de couverture
+      sur 30 jours de ventes) est envoyé par e-mail aux rôles Admin et Ventes
+    - **Scan caisse** : `GET /produits/scan/{code}/` — produit par `code_barre` ou `sku`
+      (uniques par entreprise), servi depuis le cache de l'entreprise
+    - **Stock à date** : `GET /produits/stock-a-date/?date=` — stock de chaque produit
+      à une date
+    - **Mouvements** : `GET /produits/{id}/mouvements/?depuis=&jusqu_a=` — journal des
+      entrées, ventes, annulations et ajustements, avec solde initial et final
+    - **Dépôts** : `GET/POST/PATCH /depots/` — emplacements de stock (réserve,
+      comptoirs) ; le stock est tenu par dépôt, `produit.quantite` reste le total
+      - `GET /depots/{id}/stock/` — stock de chaque produit dans le dépôt
+      - `POST /depots/transferts/` — transférer du stock entre deux dépôts
+      - `depot` (optionnel, défaut : dépôt principal) sur `POST /ventes/`,
+        `POST /ventes/bulk/` et `POST /stocks/`
+    - **Inventaires** : `GET/POST /inventaires/` — sessions de comptage physique d'un
+      dépôt
+      - `POST /inventaires/{id}/comptages/` — charger les quantités comptées en lot
+        (JSON `items` ou fichier CSV `produit;quantite;unite`)
+      - `POST /inventaires/{id}/valider/` — tous les écarts passés en ajustements,
+        dans une seule transaction
+      - `GET /inventaires/{id}/ecarts/?tous=` — rapport d'écarts (compté, système,
+        écart)
     - **Unités** : `GET/POST /unites/` — unités de mesure (globales)
     - **Ventes** : 
       - `POST /ventes/` — créer une vente avec items
@@ -94,6 +123,15 @@ swagger_info = openapi.Info(
       - `GET /ventes/{id}/items/` — récupérer les lignes
       - `PATCH /ventes/{id}/mark_paid/` — marquer payée
       - `PATCH /ventes/{id}/mark_cancelled/` — annuler
+      - `POST /ventes/bulk/` — importer un lot de ventes (synchronisation POS hors
+        ligne)
+      - `PATCH /ventes/bulk-status/` — marquer un lot de ventes payées ou annulées
+        (`{"ids": [...], "statut": "payee"}`), résultat par vente
+      - `GET/POST /ventes/{id}/paiements/` — paiements d'une vente (partiels acceptés) ;
+        `montant_paye` et `reste_a_payer` sont tenus sur la vente et sur le client
+      - `GET/POST /ventes/{id}/retours/` — retour total ou partiel : stock réintégré,
+        lignes, marges et créance diminuées, excédent remboursé (paiement négatif) ;
+        `PATCH /ventes/{id}/` avec `statut: rembourse` retourne toute la vente
 
     ### Finance (`/api/`)
     - **Stock** : `GET/POST /stocks/` — enregistrement des approvisionnements
@@ -105,7 +143,17 @@ swagger_info = openapi.Info(
 
     ### Analytics (`/api/analytics/`)
     - **Dashboard** : `GET /dashboard/` — KPIs synthétiques
-    - **Cashflow** : `GET /cashflow/` — entrées/sorties de trésorerie
+    - **Cashflow** : `GET /cashflow/` — entrées/sorties de trésorerie (entrées =
+      paiements encaissés, à leur date)
+    - **Créances** : `GET /receivables-aging/` — balance âgée du reste à payer par
+      client (0-30, 31-60, 61-90, plus de 90 jours)
+    - **Valorisation** : `GET /valorisation/?debut=&fin=` — valeur du stock et coût des
+      ventes de la période (FIFO et coût moyen pondéré, depuis `prix_achat`)
+    - **Marges** : `GET /margins/?par=produit|categorie|client&debut=&fin=&limit=` —
+      plus fortes et plus faibles contributions à la marge brute (coût unitaire
+      FIFO figé sur chaque ligne de vente)
+    - **Cache** : `GET /cache-stats/` — succès/échecs du cache mémoire (L1) et de Redis
+      pour le worker qui répond (superutilisateurs)
 
     ### Exports (`/api/exports/`)
     - **Trigger** : `POST /trigger/` — Déclencher un export asynchrone (Excel/CSV)
@@ -122,13 +170,38 @@ swagger_info = openapi.Info(
         {
           "produit": "<uuid_produit>",
           "quantite": 5,
-          "unite": "<uuid_unite (optionnel)>",
+          "unite": "<code unité (optionnel), ex: g pour un produit au kg>",
           "prix_unitaire": 10.50
         }
       ]
     }
     ```
 
+    ## Pagination
+    Les listes sont paginées par curseur (`?page_size=`, 50 par défaut, 500 max) :
+    ```json
+    {"next": "https://.../api/ventes/?cursor=...", "previous": null, "results": [...]}
+    ```
+    Suivre `next` / `previous` tels quels ; le curseur est opaque et propre au tri
+    demandé.
+
+    ## Champs et objets liés
+    Les relations sont renvoyées par leur UUID. `?expand=` ajoute les objets
+    liés (`GET /ventes/?expand=client,produit` → `client_detail`, `produit_detail` ;
+    `GET /stocks/?expand=produit,fournisseur`) et `?fields=` restreint les champs
+    renvoyés (`GET /produits/?fields=id,nom,prix`), en lecture uniquement.
+
+    ## Synchronisation incrémentale
+    `GET /produits/changes/?cursor=` et `GET /partners/changes/?cursor=` renvoient
+    uniquement les objets modifiés (`updated`) et supprimés (`deleted`) depuis le
+    curseur. Rappeler avec le `cursor` reçu tant que `has_more` est vrai ; un
+    curseur expiré renvoie 410 (synchronisation complète requise).
+
+    ## Idempotence
+    `POST /ventes/`, `POST /stocks/` et `POST /depenses/` acceptent l'en-tête
+    `Idempotency-Key` : une requête rejouée avec la même clé renvoie la réponse
+    initiale (en-tête `Idempotent-Replayed: true`) sans créer de doublon.
+
     ## Codes de statut HTTP
 
     | Code | Description |
@@ -139,7 +212,9 @@ swagger_info = openapi.Info(
     | 401 | Non authentifié |
     | 403 | Permission refusée |
     | 404 | Non trouvé |
-    | 409 | Conflit (ex: doublon détecté) |
+    | 409 | Conflit (ex: doublon détecté, requête idempotente en cours) |
+    | 410 | Curseur de synchronisation expiré |
+    | 422 | `Idempotency-Key` réutilisée avec un autre corps de requête |
     | 500 | Erreur serveur |
 
     ## Rate Limiting